@@ -0,0 +1,292 @@
+"""
+Versioned JSON API under /api/v1.
+
+Mirrors the list pages (same columns and filters as the exports, same
+keyset pagination) and the read-only stored procedures, without rendering
+any templates. Rows are fetched as plain tuples and returned as arrays
+alongside a "columns" list; ?shape=objects turns them into objects.
+?fields=Name,City selects a subset of columns (for list resources the
+unrequested columns are never read from the database). Responses are
+compressed when the client accepts it (see compression.py).
+"""
+import json
+from datetime import datetime, timedelta
+
+from flask import Blueprint, Response, request
+
+import statements
+from cities import city_match_mode
+from conditional import conditional
+from db import execute_query, execute_result_sets
+from export import EXPORTS, json_default
+from forms import opt
+from graph import INTRO_BUDGET_MS, INTRO_MAX_HOPS, intro_index
+from pagination import filter_conditions, keyset_page, page_size
+from search import network_search, search_all
+from stats import DASHBOARD_TABLES, STALE_AFTER_DAYS, STALE_CONTACTS_LIMIT, STALE_MAX_DAYS, dashboard_stats
+from table_versions import PROCEDURE_READS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+API_VERSION = 1
+
+# Keyset sort keys for each list resource (on the EXPORTS column aliases,
+# ending in a unique key) and the tables its ETag is keyed on.
+RESOURCES = {
+    'users': ([('u.Name', 'Name', 'ASC', False)], ('User', 'UserC')),
+    'connections': ([('c.Name', 'Name', 'ASC', False)], ('Connection', 'ConnectionC')),
+    'companies': ([('o.Name', 'Name', 'ASC', False)], ('Organization', 'Company')),
+    'schools': ([('o.Name', 'Name', 'ASC', False)], ('Organization', 'School')),
+    'conversations': ([
+        ('t.Start', 'Start', 'DESC', True),
+        ('t.User_N', 'User_N', 'DESC', False),
+        ('t.Connect_N', 'Connect_N', 'DESC', False),
+    ], ('Talked', 'Connection')),
+    'work-experience': ([
+        ('w.Start', 'Start', 'DESC', True),
+        ('w.Name', 'Name', 'DESC', False),
+        ('w.Org_N', 'Org_N', 'DESC', False),
+    ], ('Worked', 'Organization', 'Company')),
+    'education': ([
+        ('wt.Graduation', 'Graduation', 'DESC', True),
+        ('wt.Name', 'Name', 'DESC', False),
+        ('wt.School_N', 'School_N', 'DESC', False),
+    ], ('Went_To', 'User', 'Connection', 'School', 'Organization')),
+    'applications': ([
+        ('m.Posted', 'Posted', 'DESC', False),
+        ('m.User_N', 'User_N', 'DESC', False),
+        ('m.Job', 'Job', 'DESC', False),
+    ], ('Makes',)),
+}
+
+api = Blueprint('api', __name__, url_prefix=f'/api/v{API_VERSION}')
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def dumps(value):
+    """Serialize to JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value, default=json_default)
+    return json.dumps(value, default=json_default, separators=(',', ':')).encode()
+
+
+def _json(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+def _requested_fields(available):
+    """Columns named in ?fields=, in `available` order; all of them if none were asked for."""
+    value = request.args.get('fields')
+    if not value:
+        return list(available)
+    wanted = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = wanted.difference(available)
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    return [field for field in available if field in wanted]
+
+
+def _table(columns, rows):
+    """Apply ?fields= and ?shape= to tuple rows."""
+    fields = _requested_fields(columns)
+    if fields != list(columns):
+        positions = [list(columns).index(field) for field in fields]
+        rows = [tuple(row[i] for i in positions) for row in rows]
+    if request.args.get('shape') == 'objects':
+        return {'columns': fields, 'rows': [dict(zip(fields, row)) for row in rows]}
+    return {'columns': fields, 'rows': rows}
+
+
+def _dict_table(rows):
+    """Same as _table for rows that arrive as dicts (multi-result CALLs, caches)."""
+    columns = list(rows[0]) if rows else []
+    return _table(columns, [tuple(row.values()) for row in rows])
+
+
+def _list_view(resource):
+    spec = EXPORTS[resource]
+    sort_keys, _tables = RESOURCES[resource]
+    sort_fields = [field for _column, field, _direction, _nullable in sort_keys]
+
+    def view():
+        fields = _requested_fields([alias for _expr, alias in spec['columns']])
+        # Sort keys are always selected (the cursor tokens need them) but
+        # only returned if asked for.
+        selected = fields + [field for field in sort_fields if field not in fields]
+        expressions = dict((alias, expr) for expr, alias in spec['columns'])
+        select_sql = "SELECT " + ", ".join(f"{expressions[alias]} AS {alias}" for alias in selected)
+        select_sql += f"\n{spec['from']}"
+
+        conditions, params, filters = filter_conditions(request.args, spec['filters'])
+        page = keyset_page(
+            select_sql,
+            sort_keys,
+            conditions,
+            params,
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            limit=page_size(request.args.get('limit')),
+            columns=True,
+        )
+        if page is None:
+            raise ApiError('database unavailable', 503)
+
+        rows = page['rows']
+        if len(selected) > len(fields):
+            rows = [row[:len(fields)] for row in rows]
+        if request.args.get('shape') == 'objects':
+            rows = [dict(zip(fields, row)) for row in rows]
+        return _json({
+            'columns': fields,
+            'rows': rows,
+            'filters': filters,
+            'next': page['next'],
+            'prev': page['prev'],
+            'limit': page['limit'],
+        })
+
+    view.__doc__ = f"One keyset page of {resource}, with the same filters as its list page."
+    return view
+
+
+for _name, (_sort_keys, _tables) in RESOURCES.items():
+    api.add_url_rule(
+        f'/{_name}',
+        f"list_{_name.replace('-', '_')}",
+        conditional(*_tables, cache_body=True)(_list_view(_name)),
+    )
+
+
+@api.route('/')
+def index():
+    """The resources and procedures this version of the API serves."""
+    return _json({
+        'version': API_VERSION,
+        'resources': {
+            name: {
+                'fields': [alias for _expr, alias in EXPORTS[name]['columns']],
+                'filters': sorted(EXPORTS[name]['filters']),
+            }
+            for name in RESOURCES
+        },
+        'procedures': ['stats', 'search', 'search/network', 'last-contacted', 'connections/city', 'intros'],
+    })
+
+
+@api.route('/stats')
+@conditional(*DASHBOARD_TABLES)
+def stats():
+    """Dashboard counters and the most recent conversations."""
+    counters, recent = dashboard_stats.get()
+    return _json({'stats': counters, 'recent': _dict_table(recent)})
+
+
+@api.route('/search')
+@conditional('User', 'Connection', 'Organization', 'Company')
+def search():
+    """Ranked full-text search across users, connections and companies (?q=)."""
+    query = request.args.get('q', '')
+    return _json(_dict_table(search_all(query) if query else []))
+
+
+@api.route('/search/network')
+@conditional('User', *PROCEDURE_READS['Search_Connections_By_Company_Industry_Location'])
+def search_network():
+    """Search_Connections_By_Company_Industry_Location for ?user_n= and optional filters."""
+    user_n = opt(request.args.get('user_n'))
+    if not user_n:
+        raise ApiError('user_n is required')
+    result = network_search(
+        user_n,
+        opt(request.args.get('company')),
+        opt(request.args.get('industry')),
+        opt(request.args.get('city')),
+        city_match_mode(request.args.get('match')),
+        columns=True,
+    )
+    if result is None:
+        raise ApiError('database unavailable', 503)
+    return _json(_table(*result))
+
+
+@api.route('/last-contacted')
+def last_contacted():
+    """
+    Last_Time_Contacted for ?user_n= and ?connect_n=, and/or the user's
+    Stale_Contacts older than ?days= (not cached: the cut-off moves with the clock).
+    """
+    user_n = opt(request.args.get('user_n'))
+    connect_n = opt(request.args.get('connect_n'))
+    if not user_n:
+        raise ApiError('user_n is required')
+    days = max(request.args.get('days', STALE_AFTER_DAYS, type=int), 1)
+    if days > STALE_MAX_DAYS:
+        raise ApiError(f'days must be at most {STALE_MAX_DAYS}')
+
+    last_contact = None
+    if connect_n:
+        rows = execute_query(statements.LAST_TIME_CONTACTED, (user_n, connect_n))
+        if rows is None:
+            raise ApiError('database unavailable', 503)
+        last_contact = rows[0] if rows else None
+
+    result = execute_query(
+        statements.STALE_CONTACTS,
+        (user_n, datetime.now() - timedelta(days=days), STALE_CONTACTS_LIMIT),
+        columns=True,
+    )
+    if result is None:
+        raise ApiError('database unavailable', 503)
+    return _json({'last_contact': last_contact, 'days': days, 'stale': _table(*result)})
+
+
+@api.route('/connections/city')
+@conditional('User', *PROCEDURE_READS['Connections_In_City'])
+def connections_in_city():
+    """Connections_In_City: home-address and work-location matches for ?city= and ?user_n=."""
+    city = opt(request.args.get('city'))
+    user_n = opt(request.args.get('user_n'))
+    if not city or not user_n:
+        raise ApiError('city and user_n are required')
+    result_sets = execute_result_sets(
+        statements.CONNECTIONS_IN_CITY,
+        (city, user_n, city_match_mode(request.args.get('match'))),
+    )
+    if result_sets is None:
+        raise ApiError('database unavailable', 503)
+    home, work = result_sets
+    return _json({'home': _dict_table(home), 'work': _dict_table(work)})
+
+
+@api.route('/intros')
+def intros():
+    """Ranked warm-introduction paths from ?user_n= to ?org= (same as /intros)."""
+    user_n = opt(request.args.get('user_n'))
+    org = opt(request.args.get('org'))
+    if not user_n or not org:
+        raise ApiError('user_n and org are required')
+    result = intro_index.find_paths(
+        user_n,
+        org,
+        max_hops=request.args.get('max_hops', INTRO_MAX_HOPS, type=int),
+        limit=min(max(request.args.get('limit', 10, type=int), 1), 100),
+        budget_ms=min(request.args.get('budget_ms', INTRO_BUDGET_MS, type=float), INTRO_BUDGET_MS * 5),
+    )
+    if result is None:
+        raise ApiError('database unavailable', 503)
+    return _json(result)
+
+
+@api.errorhandler(ApiError)
+def _api_error(error):
+    return _json({'error': error.message}, error.status)
+
@@ -1,232 +1,214 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
-import mysql.connector
-from mysql.connector import Error
-from datetime import datetime
+from flask import Flask, Response, abort, render_template, request, jsonify, redirect, url_for, flash
+from datetime import datetime, timedelta
 import os
 from functools import wraps
 
+import click
+from mysql.connector import Error
+
+import bulk_import
+import changefeed
+import cleanup
+import compression
+import db
+import export
+import metrics
+import readmodels
+import statements
+import writebehind
+from api import api
+from assets import asset_pipeline
+from changefeed import change_feed
+from db import execute_query, execute_result_sets
+from cities import city_match_mode
+from conditional import conditional
+from forms import normalize_dt, opt
+from graph import INTRO_BUDGET_MS, INTRO_MAX_HOPS, intro_index
+from pagination import filter_conditions, keyset_page, page_size
+from refdata import TYPEAHEAD_LIMIT, TYPEAHEAD_QUERIES, reference_data, typeahead
+from search import network_search, search_all, search_cache
+from stats import DASHBOARD_TABLES, STALE_AFTER_DAYS, STALE_CONTACTS_LIMIT, STALE_MAX_DAYS, dashboard_stats
+from table_versions import PROCEDURE_READS, table_versions
+from writebehind import write_behind
+
 app = Flask(__name__)
 # Use an environment variable for the secret key; fall back to a dev-safe default
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-me')
 
-# Database configuration
-# Note: we do NOT store any passwords in the database itself.
-# For the DB connection, password is optional and only read from an env var if set.
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'database': os.getenv('DB_NAME', 'network_assistant'),
-    'user': os.getenv('DB_USER', 'root'),
-    'port': int(os.getenv('DB_PORT', 3306)),
-}
-
-db_password = os.getenv('DB_PASSWORD')
-if db_password:
-    DB_CONFIG['password'] = db_password
-
-def get_db_connection():
-    """Create and return a database connection"""
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        # Ensure stored procedures that perform writes are committed automatically
-        connection.autocommit = True
-        return connection
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
-        return None
-
-def execute_query(query, params=None, fetch=True):
-    """Execute a query (or CALL) and return results"""
-    connection = get_db_connection()
-    if not connection:
-        return None
-    
-    try:
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute(query, params or ())
-        
-        if fetch:
-            # For stored procedures that end with SELECT we want all rows.
-            results = cursor.fetchall()
-        else:
-            connection.commit()
-            results = cursor.rowcount
-        
-        cursor.close()
-        connection.close()
-        return results
-    except Error as e:
-        print(f"Error executing query: {e}")
-        if connection:
-            connection.close()
-        return None
+db.init_app(app)
+metrics.init_app(app)
+compression.init_app(app)
+asset_pipeline.init_app(app)
+intro_index.init_app(app)
+write_behind.init_app(app)
+change_feed.init_app(app)
+app.register_blueprint(api)
+
+
+@app.route('/health/db')
+def db_health():
+    """Connection pool statistics for monitoring"""
+    return jsonify({**db.pool.stats(), 'replicas': db.replica_stats(), 'statements': db.statement_stats()})
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Query and pool metrics in the Prometheus text format"""
+    pool_stats = db.pool.stats()
+    totals = {f'db_pool_{name}_total': pool_stats.pop(name) for name in db.ConnectionPool.COUNTERS}
+    gauges = {f'db_pool_{name}': value for name, value in pool_stats.items()}
+    graph = intro_index.stats()
+    gauges.update({'intro_graph_nodes': graph['nodes'], 'intro_graph_edges': graph['edges']})
+    gauges.update({f'search_cache_{name}': value for name, value in search_cache.stats().items()})
+    gauges.update({f'change_feed_{name}': value for name, value in change_feed.stats().items()})
+    if writebehind.WRITE_BEHIND:
+        gauges.update({f'write_behind_{name}': value for name, value in write_behind.stats().items()})
+    return Response(metrics.render(gauges, totals), mimetype='text/plain; version=0.0.4')
+
 
 @app.route('/')
+@conditional(*DASHBOARD_TABLES)
 def index():
     """Homepage with dashboard statistics"""
-    stats = {}
-    
-    # Get user count
-    users = execute_query("SELECT COUNT(*) as count FROM User")
-    stats['users'] = users[0]['count'] if users else 0
-    
-    # Get connection count
-    connections = execute_query("SELECT COUNT(*) as count FROM Connection")
-    stats['connections'] = connections[0]['count'] if connections else 0
-    
-    # Get company count
-    companies = execute_query("SELECT COUNT(*) as count FROM Company")
-    stats['companies'] = companies[0]['count'] if companies else 0
-    
-    # Get school count
-    schools = execute_query("SELECT COUNT(*) as count FROM School")
-    stats['schools'] = schools[0]['count'] if schools else 0
-    
-    # Get recent conversations
-    recent_talks = execute_query("""
-        SELECT t.*, u.Name as UserName, c.Name as ConnectionName
-        FROM Talked t
-        JOIN User u ON t.User_N = u.Name
-        JOIN Connection c ON t.Connect_N = c.Name
-        ORDER BY t.Start DESC
-        LIMIT 5
-    """)
-    
-    return render_template('index.html', stats=stats, recent_talks=recent_talks or [])
+    stats, recent_talks = dashboard_stats.get()
+    return render_template('index.html', stats=stats, recent_talks=recent_talks)
+
+
+def _list_page(select_sql, sort_keys, allowed_filters):
+    """Fetch one keyset page for a list route, honouring ?after/?before/?limit and filters."""
+    conditions, params, filters = filter_conditions(request.args, allowed_filters)
+    page = keyset_page(
+        select_sql,
+        sort_keys,
+        conditions,
+        params,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        limit=page_size(request.args.get('limit')),
+    )
+    return page, filters
+
 
 @app.route('/users')
+@conditional('User', 'UserC', cache_body=True)
 def users():
-    """Display all users"""
-    users_data = execute_query("""
+    """Display users, one page at a time"""
+    page, filters = _list_page("""
         SELECT u.*, uc.Type, uc.Phone_Num, uc.Email
         FROM User u
         LEFT JOIN UserC uc ON u.Name = uc.Name
-        ORDER BY u.Name
-    """)
-    return render_template('users.html', users=users_data or [])
+    """, [('u.Name', 'Name', 'ASC', False)], {'type': 'uc.Type'})
+    return render_template('users.html', users=page['rows'] if page else [],
+                           page=page, filters=filters)
 
 @app.route('/connections')
+@conditional('Connection', 'ConnectionC', cache_body=True)
 def connections():
-    """Display all connections"""
-    connections_data = execute_query("""
+    """Display connections, one page at a time"""
+    page, filters = _list_page("""
         SELECT c.*, cc.Type, cc.Phone_Num, cc.Email
         FROM Connection c
         LEFT JOIN ConnectionC cc ON c.Name = cc.Name
-        ORDER BY c.Name
-    """)
-    return render_template('connections.html', connections=connections_data or [])
+    """, [('c.Name', 'Name', 'ASC', False)], {'relation': 'c.Relation'})
+    return render_template('connections.html', connections=page['rows'] if page else [],
+                           page=page, filters=filters)
 
 @app.route('/companies')
+@conditional('Organization', 'Company', cache_body=True)
 def companies():
     """Display all companies"""
-    companies_data = execute_query("""
-        SELECT o.*, c.Stock, c.Num_Employees, c.Industry
-        FROM Organization o
-        JOIN Company c ON o.Name = c.Org_N AND o.Address = c.Org_A
-        ORDER BY o.Name
-    """)
+    companies_data = execute_query(statements.COMPANIES)
     return render_template('companies.html', companies=companies_data or [])
 
 @app.route('/schools')
+@conditional('Organization', 'School', cache_body=True)
 def schools():
     """Display all schools"""
-    schools_data = execute_query("""
-        SELECT o.*, s.Enrollment, s.Ranking
-        FROM Organization o
-        JOIN School s ON o.Name = s.Org_N AND o.Address = s.Org_A
-        ORDER BY o.Name
-    """)
+    schools_data = execute_query(statements.SCHOOLS)
     return render_template('schools.html', schools=schools_data or [])
 
 @app.route('/conversations')
+@conditional('Talked', 'User', 'Connection', cache_body=True)
 def conversations():
-    """Display all conversations"""
-    conversations_data = execute_query("""
+    """Display conversations, newest first, one page at a time"""
+    page, filters = _list_page("""
         SELECT t.*, u.Name as UserName, c.Name as ConnectionName, c.Relation
         FROM Talked t
         JOIN User u ON t.User_N = u.Name
         JOIN Connection c ON t.Connect_N = c.Name
-        ORDER BY t.Start DESC
-    """)
-    return render_template('conversations.html', conversations=conversations_data or [])
+    """, [
+        ('t.Start', 'Start', 'DESC', True),
+        ('t.User_N', 'User_N', 'DESC', False),
+        ('t.Connect_N', 'Connect_N', 'DESC', False),
+    ], {'user_n': 't.User_N', 'connect_n': 't.Connect_N'})
+    return render_template('conversations.html', conversations=page['rows'] if page else [],
+                           page=page, filters=filters)
 
 @app.route('/work-experience')
+@conditional('Worked', 'Organization', 'Company', cache_body=True)
 def work_experience():
-    """Display all work experience"""
-    work_data = execute_query("""
-        SELECT w.*, o.Name as OrgName, o.Address as OrgAddress,
-               c.Industry, c.Stock, c.Num_Employees
-        FROM Worked w
-        JOIN Organization o ON w.Org_N = o.Name
-        LEFT JOIN Company c ON o.Name = c.Org_N AND o.Address = c.Org_A
-        ORDER BY w.Start DESC
-    """)
-    return render_template('work_experience.html', work_experience=work_data or [])
+    """Display work experience, most recent first, one page at a time"""
+    page, filters = _list_page("""
+        SELECT w.*, w.Org_N AS OrgName
+        FROM Work_View w
+    """, [
+        ('w.Start', 'Start', 'DESC', True),
+        ('w.Name', 'Name', 'DESC', False),
+        ('w.Org_N', 'Org_N', 'DESC', False),
+    ], {'name': 'w.Name', 'org_n': 'w.Org_N'})
+    return render_template('work_experience.html', work_experience=page['rows'] if page else [],
+                           page=page, filters=filters)
 
 @app.route('/applications')
+@conditional('Makes', 'User', cache_body=True)
 def applications():
-    """Display all job applications"""
-    applications_data = execute_query("""
+    """Display job applications, newest first, one page at a time"""
+    page, filters = _list_page("""
         SELECT m.*, u.Name as UserName
         FROM Makes m
         JOIN User u ON m.User_N = u.Name
-        ORDER BY m.Posted DESC
-    """)
-    return render_template('applications.html', applications=applications_data or [])
+    """, [
+        ('m.Posted', 'Posted', 'DESC', False),
+        ('m.User_N', 'User_N', 'DESC', False),
+        ('m.Job', 'Job', 'DESC', False),
+    ], {'user_n': 'm.User_N'})
+    return render_template('applications.html', applications=page['rows'] if page else [],
+                           page=page, filters=filters)
 
 @app.route('/education')
+@conditional('Went_To', 'User', 'Connection', 'School', 'Organization', cache_body=True)
 def education():
-    """Display all education records for users and connections."""
-    education_data = execute_query("""
-        SELECT
-            wt.*,
-            COALESCE(u.Name, c.Name) AS PersonName,
-            CASE
-                WHEN u.Name IS NOT NULL THEN 'User'
-                WHEN c.Name IS NOT NULL THEN 'Connection'
-                ELSE 'Unknown'
-            END AS PersonType,
-            o.Name AS SchoolName,
-            o.Address AS SchoolAddress,
-            s.Enrollment,
-            s.Ranking
-        FROM Went_To wt
-        LEFT JOIN User u
-          ON wt.Name = u.Name
-        LEFT JOIN Connection c
-          ON wt.Name = c.Name
-        JOIN School s
-          ON wt.School_N = s.Org_N
-        JOIN Organization o
-          ON s.Org_N = o.Name
-         AND s.Org_A = o.Address
-        ORDER BY wt.Graduation DESC
-    """)
-    return render_template('education.html', education=education_data or [])
-
-def _opt(value):
-    """Helper: return None for empty strings so stored procedures see NULL."""
-    if value is None:
-        return None
-    value = value.strip()
-    return value if value != "" else None
-
-
-def _normalize_dt(value):
-    """
-    Accept datetime-local strings (YYYY-MM-DDTHH:MM[:SS]) and
-    convert them into MySQL-friendly 'YYYY-MM-DD HH:MM:SS'.
-    """
-    value = _opt(value)
-    if not value:
-        return None
-    if value.endswith('Z'):
-        value = value[:-1]
-    if 'T' in value:
-        value = value.replace('T', ' ')
-    # datetime-local often omits seconds; pad if we only have YYYY-MM-DD HH:MM
-    if len(value) == 16:
-        value = f"{value}:00"
-    return value
+    """Display education records for users and connections, one page at a time."""
+    page, filters = _list_page("""
+        SELECT wt.*, wt.Name AS PersonName, wt.School_N AS SchoolName
+        FROM Education_View wt
+    """, [
+        ('wt.Graduation', 'Graduation', 'DESC', True),
+        ('wt.Name', 'Name', 'DESC', False),
+        ('wt.School_N', 'School_N', 'DESC', False),
+    ], {'name': 'wt.Name', 'school_n': 'wt.School_N'})
+    return render_template('education.html', education=page['rows'] if page else [],
+                           page=page, filters=filters)
+
+
+@app.route('/export/<entity>.<fmt>')
+def export_entity(entity, fmt):
+    """Stream an entity as CSV or NDJSON; accepts the same filters as its list page."""
+    if entity not in export.EXPORTS or fmt not in export.FORMATS:
+        abort(404)
+
+    sql, params, columns = export.build_query(entity, request.args)
+    try:
+        owner, connection = db.checkout_read_connection()
+    except Error as e:
+        print(f"Error connecting to MySQL: {e}")
+        return 'Database unavailable', 503
+
+    return Response(
+        export.ExportStream(owner, connection, sql, params, columns, fmt),
+        mimetype=export.FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{entity}.{fmt}"'},
+    )
 
 
 @app.route('/add/conversation', methods=['GET', 'POST'])
@@ -240,52 +222,47 @@ def add_conversation():
     - Optionally add work experience and/or education
     by calling the Add_Connection_By_Talking stored procedure.
     """
-    users = execute_query("SELECT Name FROM User ORDER BY Name") or []
-    connections = execute_query("SELECT Name FROM Connection ORDER BY Name") or []
+    users = reference_data.get('users')
 
     if request.method == 'POST':
         user_n = request.form.get('user_n')
 
         # Either pick an existing connection or type a new name.
-        existing_connect = _opt(request.form.get('connect_n_existing'))
-        new_connect = _opt(request.form.get('connect_n_new'))
+        existing_connect = opt(request.form.get('connect_n_existing'))
+        new_connect = opt(request.form.get('connect_n_new'))
         connect_n = existing_connect or new_connect
 
         if not user_n or not connect_n:
             flash('User and Connection name are required.', 'error')
-            return render_template(
-                'add_conversation.html',
-                users=users,
-                connections=connections,
-            )
+            return render_template('add_conversation.html', users=users)
 
-        addr = _opt(request.form.get('addr'))
-        relation = _opt(request.form.get('relation'))
-        phone = _opt(request.form.get('phone'))
-        email = _opt(request.form.get('email'))
-        topic = _opt(request.form.get('topic'))
-        method = _opt(request.form.get('method'))
-        start = _normalize_dt(request.form.get('start'))
-        end = _normalize_dt(request.form.get('end'))
+        addr = opt(request.form.get('addr'))
+        relation = opt(request.form.get('relation'))
+        phone = opt(request.form.get('phone'))
+        email = opt(request.form.get('email'))
+        topic = opt(request.form.get('topic'))
+        method = opt(request.form.get('method'))
+        start = normalize_dt(request.form.get('start'))
+        end = normalize_dt(request.form.get('end'))
 
         # Optional company / work info
-        org_n = _opt(request.form.get('org_n'))
-        org_a = _opt(request.form.get('org_a'))
-        role = _opt(request.form.get('role'))
-        dept = _opt(request.form.get('dept'))
-        job_loc = _opt(request.form.get('job_loc'))
-        job_start = _opt(request.form.get('job_start'))
-        job_end = _opt(request.form.get('job_end'))
-        industry = _opt(request.form.get('industry'))
+        org_n = opt(request.form.get('org_n'))
+        org_a = opt(request.form.get('org_a'))
+        role = opt(request.form.get('role'))
+        dept = opt(request.form.get('dept'))
+        job_loc = opt(request.form.get('job_loc'))
+        job_start = opt(request.form.get('job_start'))
+        job_end = opt(request.form.get('job_end'))
+        industry = opt(request.form.get('industry'))
         num_employees = request.form.get('num_employees')
-        num_employees = int(num_employees) if _opt(num_employees) else None
-        stock = _opt(request.form.get('stock'))
+        num_employees = int(num_employees) if opt(num_employees) else None
+        stock = opt(request.form.get('stock'))
 
         # Optional school info
-        school_n = _opt(request.form.get('school_n'))
-        deg_type = _opt(request.form.get('deg_type'))
-        subject = _opt(request.form.get('subject'))
-        graduation = _opt(request.form.get('graduation'))
+        school_n = opt(request.form.get('school_n'))
+        deg_type = opt(request.form.get('deg_type'))
+        subject = opt(request.form.get('subject'))
+        graduation = opt(request.form.get('graduation'))
 
         params = (
             user_n,
@@ -314,30 +291,54 @@ def add_conversation():
             graduation,
         )
 
-        result = execute_query(
-            "CALL Add_Connection_By_Talking("
-            "%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,"
-            "%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,"
-            "%s,%s,%s,%s"
-            ")",
-            params,
-            fetch=True,
-        )
+        if writebehind.WRITE_BEHIND:
+            return _queue_conversation(params)
+
+        result = execute_query(statements.ADD_CONNECTION_BY_TALKING, params, fetch=True)
 
         if result is None:
             flash('Error adding connection and conversation.', 'error')
         else:
+            table_versions.bump_procedure('Add_Connection_By_Talking',
+                                          result[0].get('TablesChanged') if result else None)
+            intro_index.add_conversation(user_n, connect_n, org_n, job_end, school_n)
             flash('Connection and conversation saved successfully.', 'success')
 
         return redirect(url_for('conversations'))
 
-    return render_template('add_conversation.html', users=users, connections=connections)
+    return render_template('add_conversation.html', users=users)
+
+
+def _queue_conversation(params):
+    """Write-behind path for add_conversation: queue the CALL and return straight away."""
+    if params[0] not in {user['Name'] for user in reference_data.get('users')}:
+        flash(f"Unknown user '{params[0]}'.", 'error')
+        return redirect(url_for('add_conversation'))
+    if params[8] is None:
+        # Fix the start time now, so a replayed job hits the same Talked row
+        # instead of logging the conversation twice.
+        params = params[:8] + (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),) + params[9:]
+
+    job_id = write_behind.enqueue(params)
+    status_url = url_for('conversation_status', job_id=job_id)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'id': job_id, 'status': 'queued', 'status_url': status_url}), 202
+    flash(f'Conversation queued (#{job_id}); it will appear shortly.', 'success')
+    return redirect(url_for('conversations'))
+
+
+@app.route('/add/conversation/status/<int:job_id>')
+def conversation_status(job_id):
+    """Status of a queued conversation: queued, done, or failed (with the error)."""
+    status = write_behind.status(job_id) if writebehind.WRITE_BEHIND else None
+    if status is None:
+        return jsonify({'error': 'unknown job'}), 404
+    return jsonify(status)
 
 
 @app.route('/delete/connection', methods=['GET', 'POST'])
 def delete_connection():
     """Function 2: Delete_Connection – remove a connection and related rows."""
-    connections = execute_query("SELECT Name FROM Connection ORDER BY Name") or []
     deleted_summary = None
 
     if request.method == 'POST':
@@ -345,28 +346,83 @@ def delete_connection():
         if not connect_n:
             flash('Please select a connection to delete.', 'error')
         else:
-            rows = execute_query("CALL Delete_Connection(%s)", (connect_n,), fetch=True)
+            rows = execute_query(statements.DELETE_CONNECTION, (connect_n,), fetch=True)
             if rows is None or len(rows) == 0:
                 flash('Error deleting connection.', 'error')
             else:
                 deleted_summary = rows[0]
+                table_versions.bump_procedure('Delete_Connection')
+                intro_index.remove_connection(connect_n)
                 flash(f"Deleted connection '{connect_n}' and related records.", 'success')
 
     return render_template(
         'delete_connection.html',
-        connections=connections,
         deleted_summary=deleted_summary,
     )
 
 
+@app.route('/connections/cleanup', methods=['GET', 'POST'])
+def cleanup_connections():
+    """Delete, or merge into one canonical connection, many connections at once."""
+    report = None
+    names = []
+    form = request.form if request.method == 'POST' else request.args
+
+    if request.method == 'POST':
+        names = [line.strip() for line in form.get('names', '').splitlines() if line.strip()]
+        stale_days = form.get('stale_days', type=int)
+        if not names:
+            names = cleanup.select_connections(form, stale_days) or []
+        into = (form.get('into') or '').strip() if form.get('mode') == 'merge' else None
+
+        if not names:
+            flash('No connections matched; enter names or choose a filter.', 'error')
+        elif form.get('mode') == 'merge' and not into:
+            flash('Please choose the connection to merge into.', 'error')
+        elif form.get('action') == 'preview':
+            flash(f"{len(names)} connection{'' if len(names) == 1 else 's'} selected.", 'success')
+        else:
+            try:
+                result = cleanup.cleanup_connections(names, into)
+            except ValueError as e:
+                flash(str(e), 'error')
+                result = None
+            except Error as e:
+                print(f"Error cleaning up connections: {e}")
+                flash('Error cleaning up connections; earlier chunks were kept.', 'error')
+                result = None
+                # Earlier chunks may have committed; don't serve caches from before them.
+                table_versions.bump_procedure('Delete_Connection')
+                intro_index.invalidate()
+            if result is not None:
+                report = result.as_dict()
+                table_versions.bump_procedure('Delete_Connection')
+                intro_index.invalidate()
+                verb = f"Merged into '{into}'" if into else 'Deleted'
+                flash(f"{verb}: {result.connections} connections, {report['TotalDeleted']} rows removed.",
+                      'success')
+
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify(report or {'error': 'cleanup failed', 'selected': len(names)}), 200 if report else 400
+
+    return render_template('cleanup_connections.html', report=report, names=names, form=form)
+
+
 @app.route('/update/conversation', methods=['GET', 'POST'])
 def update_conversation():
     """Function 3: Update_Conversation – modify an existing conversation."""
-    conversations = execute_query("""
+    # One keyset page of conversations to pick from, narrowed by ?user_n= and
+    # ?connect_n=, rather than every row in Talked.
+    page, filters = _list_page("""
         SELECT t.User_N, t.Connect_N, t.Topic, t.Method, t.Start, t.End
         FROM Talked t
-        ORDER BY t.Start DESC
-    """) or []
+    """, [
+        ('t.Start', 'Start', 'DESC', True),
+        ('t.User_N', 'User_N', 'DESC', False),
+        ('t.Connect_N', 'Connect_N', 'DESC', False),
+    ], {'user_n': 't.User_N', 'connect_n': 't.Connect_N'})
+    conversations = [dict(conv) for conv in page['rows']] if page else []
+    users = reference_data.get('users')
 
     # Pre-format start timestamps for selectors to avoid manual typing errors
     for conv in conversations:
@@ -388,6 +444,9 @@ def update_conversation():
                 conversations=conversations,
                 updated_row=updated_row,
                 selected_key=selected_key,
+                users=users,
+                page=page,
+                filters=filters,
             )
 
         try:
@@ -399,17 +458,20 @@ def update_conversation():
                 conversations=conversations,
                 updated_row=updated_row,
                 selected_key=selected_key,
+                users=users,
+                page=page,
+                filters=filters,
             )
 
         selected_key = conversation_key
 
-        new_topic = _opt(request.form.get('new_topic'))
-        new_method = _opt(request.form.get('new_method'))
-        new_start = _normalize_dt(request.form.get('new_start'))
-        new_end = _normalize_dt(request.form.get('new_end'))
+        new_topic = opt(request.form.get('new_topic'))
+        new_method = opt(request.form.get('new_method'))
+        new_start = normalize_dt(request.form.get('new_start'))
+        new_end = normalize_dt(request.form.get('new_end'))
 
         rows = execute_query(
-            "CALL Update_Conversation(%s,%s,%s,%s,%s,%s,%s)",
+            statements.UPDATE_CONVERSATION,
             (
                 user_n,
                 connect_n,
@@ -423,6 +485,7 @@ def update_conversation():
         )
         if rows:
             updated_row = rows[0]
+            table_versions.bump_procedure('Update_Conversation')
             flash('Conversation updated.', 'success')
         else:
             flash('No matching conversation found to update.', 'error')
@@ -432,40 +495,36 @@ def update_conversation():
         conversations=conversations,
         updated_row=updated_row,
         selected_key=selected_key,
+        users=users,
+        page=page,
+        filters=filters,
     )
 
 
 @app.route('/add/work-experience', methods=['GET', 'POST'])
 def add_work_experience():
     """Function 4: Add_Work_Experience – add a new role/experience."""
-    # People can be the main user or any existing connection.
-    # For simplicity we offer all Connection names and all User names.
-    people = execute_query("""
-        SELECT Name, 'Connection' AS source FROM Connection
-        UNION
-        SELECT Name, 'User' AS source FROM User
-        ORDER BY Name
-    """) or []
-
+    # People can be the main user or any existing connection; the form picks
+    # them through /typeahead/people rather than a full list.
     if request.method == 'POST':
         name = request.form.get('name')
-        org_n = _opt(request.form.get('org_n'))
-        org_a = _opt(request.form.get('org_a'))
-        role = _opt(request.form.get('role'))
-        start = _opt(request.form.get('start'))
-        end = _opt(request.form.get('end'))
-        dept = _opt(request.form.get('dept'))
-        job_loc = _opt(request.form.get('job_loc'))
-        industry = _opt(request.form.get('industry'))
+        org_n = opt(request.form.get('org_n'))
+        org_a = opt(request.form.get('org_a'))
+        role = opt(request.form.get('role'))
+        start = opt(request.form.get('start'))
+        end = opt(request.form.get('end'))
+        dept = opt(request.form.get('dept'))
+        job_loc = opt(request.form.get('job_loc'))
+        industry = opt(request.form.get('industry'))
         num_employees = request.form.get('num_employees')
-        num_employees = int(num_employees) if _opt(num_employees) else None
-        stock = _opt(request.form.get('stock'))
+        num_employees = int(num_employees) if opt(num_employees) else None
+        stock = opt(request.form.get('stock'))
 
         if not (name and org_n and role and start):
             flash('Name, organization, role, and start date are required.', 'error')
         else:
             rows = execute_query(
-                "CALL Add_Work_Experience(%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)",
+                statements.ADD_WORK_EXPERIENCE,
                 (
                     name,
                     org_n,
@@ -482,37 +541,61 @@ def add_work_experience():
                 fetch=True,
             )
             if rows:
+                table_versions.bump_procedure('Add_Work_Experience')
+                intro_index.add_work_experience(name, org_n, end)
                 flash('Work experience added.', 'success')
             else:
                 flash('Error adding work experience.', 'error')
 
             return redirect(url_for('work_experience'))
 
-    return render_template('add_work_experience.html', people=people)
+    return render_template('add_work_experience.html')
+
+
+@app.route('/import', methods=['GET', 'POST'])
+def import_contacts():
+    """Bulk import connections and conversations from a CSV/NDJSON upload."""
+    report = None
+
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        fmt = bulk_import.detect_format(upload.filename if upload else None)
+        if not upload or not fmt:
+            flash('Please choose a .csv or .ndjson file.', 'error')
+        else:
+            result = bulk_import.import_stream(upload.stream, fmt)
+            if result is None:
+                flash('Error importing file.', 'error')
+            else:
+                report = result.as_dict()
+                if result.rows_imported:
+                    # Bulk rows land in the same tables the procedure writes.
+                    table_versions.bump_procedure('Add_Connection_By_Talking')
+                    intro_index.invalidate()
+                flash(f"Imported {result.rows_imported} of {result.rows_read} rows.",
+                      'success' if not result.error_count else 'error')
+
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify(report or {'error': 'import failed'}), 200 if report else 400
+
+    return render_template('import.html', report=report)
 
 
 @app.route('/search/network', methods=['GET'])
+@conditional('User', *PROCEDURE_READS['Search_Connections_By_Company_Industry_Location'])
 def search_network():
     """Function 5: Search_Connections_By_Company_Industry_Location."""
     user_n = request.args.get('user_n')
-    company = _opt(request.args.get('company'))
-    industry = _opt(request.args.get('industry'))
-    city = _opt(request.args.get('city'))
+    company = opt(request.args.get('company'))
+    industry = opt(request.args.get('industry'))
+    city = opt(request.args.get('city'))
+    city_match = city_match_mode(request.args.get('match'))
 
-    users = execute_query("SELECT Name FROM User ORDER BY Name") or []
+    users = reference_data.get('users')
     results = []
 
     if user_n:
-        results = execute_query(
-            "CALL Search_Connections_By_Company_Industry_Location(%s,%s,%s,%s)",
-            (
-                user_n,
-                company,
-                industry,
-                city,
-            ),
-            fetch=True,
-        ) or []
+        results = network_search(user_n, company, industry, city, city_match) or []
 
     return render_template(
         'search_network.html',
@@ -522,135 +605,223 @@ def search_network():
         company=company or '',
         industry=industry or '',
         city=city or '',
+        city_match=city_match,
     )
 
 
 @app.route('/last-contacted')
 def last_time_contacted():
-    """Function 6: Last_Time_Contacted – show when you last spoke to a connection."""
+    """
+    Function 6: Last_Time_Contacted – show when you last spoke to a connection,
+    plus the connections you haven't spoken to in `days` days (Stale_Contacts).
+    """
     user_n = request.args.get('user_n')
-    connect_n = request.args.get('connect_n')
+    connect_n = opt(request.args.get('connect_n'))
+    days = min(max(request.args.get('days', STALE_AFTER_DAYS, type=int), 1), STALE_MAX_DAYS)
 
-    users = execute_query("SELECT Name FROM User ORDER BY Name") or []
-    connections = execute_query("SELECT Name FROM Connection ORDER BY Name") or []
+    users = reference_data.get('users')
     result = None
+    stale = []
 
     if user_n and connect_n:
         rows = execute_query(
-            "CALL Last_Time_Contacted(%s,%s)",
+            statements.LAST_TIME_CONTACTED,
             (user_n, connect_n),
             fetch=True,
         )
         if rows:
             result = rows[0]
 
+    if user_n:
+        stale = execute_query(
+            statements.STALE_CONTACTS,
+            (user_n, datetime.now() - timedelta(days=days), STALE_CONTACTS_LIMIT),
+            fetch=True,
+        ) or []
+
     return render_template(
         'last_contacted.html',
         users=users,
-        connections=connections,
         selected_user=user_n or '',
         selected_connection=connect_n or '',
+        days=days,
         result=result,
+        stale=stale,
     )
 
 
 @app.route('/connections/city', methods=['GET'])
+@conditional('User', *PROCEDURE_READS['Connections_In_City'])
 def connections_in_city():
     """Function 7: Connections_In_City – list connections associated with a city."""
-    city = _opt(request.args.get('city'))
+    city = opt(request.args.get('city'))
     user_n = request.args.get('user_n')
+    city_match = city_match_mode(request.args.get('match'))
 
-    users = execute_query("SELECT Name FROM User ORDER BY Name") or []
+    users = reference_data.get('users')
     home_results = []
     work_results = []
 
     if city and user_n:
-        # Stored procedure returns two result sets; using two separate SELECTs is simpler here.
-        home_results = execute_query(
-            """
-            SELECT DISTINCT
-                C.Name,
-                C.Address
-            FROM Connection C
-            LEFT JOIN Talked T
-              ON T.Connect_N = C.Name
-             AND T.User_N    = %s
-            WHERE C.Address LIKE CONCAT('%%', %s, '%%')
-              AND T.User_N IS NOT NULL
-            """,
-            (user_n, city),
-            fetch=True,
-        ) or []
-
-        work_results = execute_query(
-            """
-            SELECT DISTINCT
-                C.Name,
-                W.Location,
-                W.Role,
-                W.Org_N AS Company
-            FROM Connection C
-            JOIN Worked W
-              ON W.Name = C.Name
-            LEFT JOIN Talked T
-              ON T.Connect_N = C.Name
-             AND T.User_N    = %s
-            WHERE W.Location LIKE CONCAT('%%', %s, '%%')
-              AND T.User_N IS NOT NULL
-            """,
-            (user_n, city),
-            fetch=True,
-        ) or []
+        # One round trip: the procedure returns the home-address matches and
+        # the work-location matches as two result sets.
+        result_sets = execute_result_sets(
+            statements.CONNECTIONS_IN_CITY,
+            (city, user_n, city_match),
+        )
+        if result_sets is None:
+            flash('Error looking up connections in this city.', 'error')
+        else:
+            home_results, work_results = result_sets
 
     return render_template(
         'connections_in_city.html',
         users=users,
         city=city or '',
+        city_match=city_match,
         selected_user=user_n or '',
         home_results=home_results,
         work_results=work_results,
     )
 
+
+@app.route('/intros')
+def warm_intros():
+    """Ranked warm-introduction paths from ?user_n= to the company or school ?org=, as JSON."""
+    user_n = opt(request.args.get('user_n'))
+    org = opt(request.args.get('org'))
+    if not user_n or not org:
+        return jsonify({'error': 'user_n and org are required'}), 400
+
+    result = intro_index.find_paths(
+        user_n,
+        org,
+        max_hops=request.args.get('max_hops', INTRO_MAX_HOPS, type=int),
+        limit=min(max(request.args.get('limit', 10, type=int), 1), 100),
+        budget_ms=min(request.args.get('budget_ms', INTRO_BUDGET_MS, type=float), INTRO_BUDGET_MS * 5),
+    )
+    if result is None:
+        return jsonify({'error': 'database unavailable'}), 503
+    return jsonify(result)
+
+
+@app.route('/typeahead/<kind>')
+def typeahead_names(kind):
+    """Names of users/connections/people/organizations starting with ?q=, as JSON."""
+    if kind not in TYPEAHEAD_QUERIES:
+        abort(404)
+    limit = min(max(request.args.get('limit', TYPEAHEAD_LIMIT, type=int), 1), 50)
+    return jsonify({'results': typeahead(kind, request.args.get('q'), limit)})
+
+
 @app.route('/search')
+@conditional('User', 'Connection', 'Organization', 'Company')
 def search():
     """Search functionality"""
     query = request.args.get('q', '')
     if not query:
         return render_template('search.html', results=[])
-    
-    # Search across multiple tables
-    results = []
-    
-    # Search users
-    users = execute_query("""
-        SELECT 'User' as type, Name as title, Address as subtitle, NULL as extra
-        FROM User
-        WHERE Name LIKE %s OR Address LIKE %s
-    """, (f'%{query}%', f'%{query}%'))
-    if users:
-        results.extend(users)
-    
-    # Search connections
-    connections = execute_query("""
-        SELECT 'Connection' as type, Name as title, Address as subtitle, Relation as extra
-        FROM Connection
-        WHERE Name LIKE %s OR Address LIKE %s OR Relation LIKE %s
-    """, (f'%{query}%', f'%{query}%', f'%{query}%'))
-    if connections:
-        results.extend(connections)
-    
-    # Search companies
-    companies = execute_query("""
-        SELECT 'Company' as type, o.Name as title, o.Address as subtitle, c.Industry as extra
-        FROM Organization o
-        JOIN Company c ON o.Name = c.Org_N AND o.Address = c.Org_A
-        WHERE o.Name LIKE %s OR c.Industry LIKE %s
-    """, (f'%{query}%', f'%{query}%'))
-    if companies:
-        results.extend(companies)
-    
+
+    # One ranked full-text query across users, connections and companies
+    results = search_all(query)
+
     return render_template('search.html', results=results, query=query)
 
+@app.cli.command('backfill-cities')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows per UPDATE batch.')
+def backfill_cities(batch_size):
+    """Recompute the parsed City columns on Connection and Worked."""
+    rows = execute_query(statements.BACKFILL_CITIES, (batch_size,), fetch=True)
+    if rows is None:
+        raise click.ClickException('Backfill failed; see the error above.')
+    click.echo(f"Updated {rows[0]['RowsUpdated']} rows.")
+
+
+@app.cli.command('check-read-models')
+@click.option('--repair', is_flag=True, help='Rebuild the read models if they have drifted.')
+@click.option('--sample', default=readmodels.SAMPLE_SIZE, show_default=True,
+              help='Keys to show per kind of difference.')
+def check_read_models(repair, sample):
+    """Compare Work_View / Education_View with the base tables."""
+    report = readmodels.check(sample)
+    if report is None:
+        raise click.ClickException('Check failed; see the error above.')
+    for view, kinds in report.items():
+        for kind, result in kinds.items():
+            click.echo(f"{view}: {result['count']} {kind}")
+            for key in result['sample']:
+                click.echo(f"    {', '.join(str(value) for value in key.values())}")
+
+    if not readmodels.drift(report):
+        click.echo('Read models are consistent.')
+        return
+    if not repair:
+        raise click.ClickException('Read models have drifted; rerun with --repair to rebuild them.')
+    if not readmodels.rebuild():
+        raise click.ClickException('Rebuild failed; see the error above.')
+    click.echo('Read models rebuilt.')
+
+
+@app.cli.command('prune-change-log')
+@click.option('--days', default=7, show_default=True, help='Keep this many days of changes.')
+def prune_change_log(days):
+    """Delete Change_Log rows older than --days (run it from cron)."""
+    try:
+        deleted = changefeed.prune(datetime.now() - timedelta(days=days))
+    except Error as e:
+        raise click.ClickException(f'Prune failed: {e}')
+    click.echo(f"Deleted {deleted} change log rows.")
+
+
+@app.cli.command('import-contacts')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']),
+              help='Input format (default: from the file extension).')
+@click.option('--chunk-size', default=bulk_import.DEFAULT_CHUNK_SIZE, show_default=True,
+              help='Rows per transaction.')
+def import_contacts_command(path, fmt, chunk_size):
+    """Bulk import connections and conversations from a CSV/NDJSON file."""
+    fmt = fmt or bulk_import.detect_format(path)
+    if not fmt:
+        raise click.UsageError('Cannot tell the format from the file name; pass --format.')
+
+    def progress(report):
+        click.echo(f"chunk {report.chunks}: {report.rows_imported} imported, "
+                   f"{report.error_count} failed, {report.rows_read} read")
+
+    with open(path, 'rb') as fh:
+        report = bulk_import.import_stream(fh, fmt, chunk_size, progress)
+    if report is None:
+        raise click.ClickException('Import failed; see the error above.')
+    for err in report.errors:
+        click.echo(f"line {err['line']}: {err['error']}", err=True)
+    click.echo(f"Imported {report.rows_imported} of {report.rows_read} rows.")
+
+
+@app.cli.command('cleanup-connections')
+@click.argument('names_file', type=click.File('r'))
+@click.option('--into', help='Merge the listed connections into this one instead of just deleting them.')
+@click.option('--chunk-size', default=cleanup.DEFAULT_CHUNK_SIZE, show_default=True,
+              help='Connections per transaction.')
+def cleanup_connections_command(names_file, into, chunk_size):
+    """Delete (or merge) the connections listed one per line in NAMES_FILE."""
+    names = [line.strip() for line in names_file if line.strip()]
+
+    def progress(report):
+        click.echo(f"chunk {report.chunks}: {report.connections} of {len(names)} connections")
+
+    try:
+        report = cleanup.cleanup_connections(names, into, chunk_size, progress)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    except Error as e:
+        raise click.ClickException(f'Cleanup failed: {e}')
+    if report is None:
+        raise click.ClickException('Cleanup failed; see the error above.')
+    for key, value in report.as_dict().items():
+        click.echo(f"{key}: {value}")
+
+
 if __name__ == '__main__':
     # Run without Flask's debug reloader to avoid OS permission issues on some systems
     app.run(debug=False, host='127.0.0.1', port=5000)
@@ -0,0 +1,141 @@
+"""
+Fingerprinted, minified and precompressed static assets.
+
+At startup every CSS and JS file under static/ is minified (when rcssmin /
+rjsmin are installed), hashed, and compressed once with gzip and brotli.
+url_for('static', filename='css/style.css') then returns
+/static/css/style.<hash>.css, which is served from memory with a one-year
+immutable Cache-Control, so browsers stop revalidating it on every page.
+Editing a file changes its hash and therefore its URL. Other static files,
+and the unhashed names, are served by Flask as before.
+"""
+import hashlib
+import mimetypes
+import os
+
+from flask import Response, current_app, request
+
+from compression import compress
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+ASSET_FINGERPRINT = os.getenv('ASSET_FINGERPRINT', '1') == '1'
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+MINIFIERS = {
+    '.css': rcssmin.cssmin if rcssmin else None,
+    '.js': rjsmin.jsmin if rjsmin else None,
+}
+
+
+class Asset:
+    """One static file's processed body and its precompressed variants."""
+
+    def __init__(self, filename, body):
+        self.filename = filename
+        self.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        self.etag = hashlib.sha1(body).hexdigest()[:12]
+        stem, ext = os.path.splitext(filename)
+        self.fingerprinted = f'{stem}.{self.etag}{ext}'
+        self.variants = {None: body, 'gzip': compress(body, 'gzip', 9)}
+        if brotli is not None:
+            self.variants['br'] = compress(body, 'br', 11)
+
+    def response(self):
+        encoding = None
+        for candidate in ('br', 'gzip'):
+            if candidate in self.variants and request.accept_encodings[candidate] > 0:
+                encoding = candidate
+                break
+        response = Response(self.variants[encoding], mimetype=self.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(self.etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = ASSET_MAX_AGE
+        response.cache_control.immutable = True
+        return response.make_conditional(request)
+
+
+class AssetPipeline:
+    """Builds the assets for an app's static folder and hooks them into url_for and the static route."""
+
+    def __init__(self):
+        self.folder = None
+        self.by_name = {}
+        self.by_fingerprint = {}
+        # Digest of every fingerprint; changes whenever any asset URL does.
+        self.version = ''
+        self._mtimes = {}
+
+    def init_app(self, app):
+        if not ASSET_FINGERPRINT or not app.static_folder:
+            return
+        self.folder = app.static_folder
+        self.build()
+        serve_static = app.view_functions['static']
+
+        def static(filename):
+            if app.debug:
+                self.refresh()
+            asset = self.by_fingerprint.get(filename)
+            if asset is None:
+                return serve_static(filename=filename)
+            return asset.response()
+
+        app.view_functions['static'] = static
+        app.url_defaults(self._rewrite_url)
+
+    def _sources(self):
+        for root, _dirs, files in os.walk(self.folder):
+            for name in files:
+                if os.path.splitext(name)[1] in MINIFIERS:
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, self.folder).replace(os.sep, '/'), path
+
+    def build(self):
+        by_name, mtimes = {}, {}
+        for filename, path in self._sources():
+            mtimes[filename] = os.path.getmtime(path)
+            with open(path, 'rb') as fh:
+                body = fh.read()
+            minify = MINIFIERS[os.path.splitext(filename)[1]]
+            if minify is not None:
+                body = minify(body.decode('utf-8')).encode('utf-8')
+            by_name[filename] = Asset(filename, body)
+        self.by_name = by_name
+        self.by_fingerprint = {asset.fingerprinted: asset for asset in by_name.values()}
+        self.version = hashlib.sha1(' '.join(sorted(self.by_fingerprint)).encode()).hexdigest()[:12]
+        self._mtimes = mtimes
+
+    def refresh(self):
+        """Rebuild if any source changed (only checked in debug mode)."""
+        current = {filename: os.path.getmtime(path) for filename, path in self._sources()}
+        if current != self._mtimes:
+            self.build()
+
+    def _rewrite_url(self, endpoint, values):
+        if endpoint != 'static':
+            return
+        if current_app.debug:
+            self.refresh()
+        asset = self.by_name.get(values.get('filename'))
+        if asset is not None:
+            values['filename'] = asset.fingerprinted
+
+
+asset_pipeline = AssetPipeline()
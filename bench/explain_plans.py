@@ -0,0 +1,378 @@
+"""
+Query-plan check: EXPLAIN every statement the app and the stored procedures run.
+
+Statements issued by the routes are collected by requesting each page once
+through the Flask test client and recording what reaches
+metrics.observe_query (with the real parameters). Statements inside the
+procedures are read out of network_assistant_functions.sql, with their
+parameters and local variables bound to sample values from the loaded data.
+Each one is EXPLAINed and flagged for full table scans, full index scans,
+temporary tables and filesorts; for flagged tables an index is proposed from
+the statement's equality, ORDER BY and range columns.
+
+    python -m bench.generate_data --scale 100k
+    python -m bench.explain_plans --write-baseline bench/plan_baseline.json
+    python -m bench.explain_plans --baseline bench/plan_baseline.json   # exit 1 on new flags
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+import metrics
+from app import app
+from bench.load_driver import procedure_cases, route_cases, sample_params
+from db import DB_CONFIG
+
+FUNCTIONS_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'network_assistant_functions.sql')
+
+# Routes not covered by the load driver's cases.
+EXTRA_PATHS = (
+    '/typeahead/connections?q=a',
+    '/typeahead/organizations?q=a',
+    '/export/conversations.ndjson',
+    '/export/connections.ndjson',
+    '/api/v1/conversations?fields=Topic',
+    '/api/v1/work-experience',
+    '/api/v1/education',
+    '/api/v1/applications',
+)
+
+EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE|INSERT\b.*\bSELECT\b)', re.IGNORECASE | re.DOTALL)
+
+_PROCEDURE = re.compile(r'CREATE PROCEDURE\s+(\w+)\s*\((.*?)\)\s*BEGIN(.*?)END\$\$', re.DOTALL)
+_DECLARE = re.compile(r'DECLARE\s+(v_\w+)\s+\w+(?:\([^)]*\))?(?:\s+DEFAULT\s+(.+?))?\s*;', re.DOTALL)
+_STATEMENT_START = re.compile(r'^\s*(SELECT|UPDATE|DELETE|INSERT)\b', re.IGNORECASE | re.MULTILINE)
+_VARIABLE = re.compile(r'\b([pv]_\w+)\b')
+_SQL_KEYWORDS = {
+    'ON', 'WHERE', 'LEFT', 'RIGHT', 'INNER', 'CROSS', 'JOIN', 'USING', 'SET', 'ORDER', 'GROUP',
+    'HAVING', 'LIMIT', 'UNION', 'FOR',
+}
+
+
+def fingerprint(sql):
+    """Stable id for a statement: its text with whitespace collapsed."""
+    return hashlib.sha1(' '.join(sql.split()).encode()).hexdigest()[:12]
+
+
+def collect_route_statements(p):
+    """(source, sql, params) for every statement the routes issue, first occurrence only."""
+    collected = {}
+    current = ['']
+    original = metrics.observe_query
+
+    def record(query, params, seconds, rows=None, error=False):
+        if EXPLAINABLE.match(query):
+            collected.setdefault(fingerprint(query), (current[0], query, params))
+        return original(query, params, seconds, rows=rows, error=error)
+
+    metrics.observe_query = record
+    try:
+        client = app.test_client()
+        rng = p['rng']
+        for name, request_fn in route_cases(p):
+            current[0] = name
+            request_fn(client, rng).get_data()
+        for path in EXTRA_PATHS:
+            current[0] = f'GET {path}'
+            client.get(path).get_data()
+    finally:
+        metrics.observe_query = original
+    return list(collected.values())
+
+
+def _strip_comments(sql):
+    sql = re.sub(r'/\*.*?\*/', '', sql, flags=re.DOTALL)
+    return re.sub(r'--[^\n]*', '', sql)
+
+
+def parse_procedures(path=FUNCTIONS_SQL):
+    """{name: (parameter names, {local: default expression}, [statements])}."""
+    with open(path) as fh:
+        text = fh.read()
+    procedures = {}
+    for name, header, body in _PROCEDURE.findall(text):
+        params = re.findall(r'\bIN\s+(p_\w+)', header)
+        body = _strip_comments(body)
+        declares = {var: default for var, default in _DECLARE.findall(body)}
+        statements = []
+        for segment in body.split(';'):
+            match = _STATEMENT_START.search(segment)
+            if not match:
+                continue
+            statement = segment[match.start():].strip()
+            # SELECT ... INTO v_x reads into a local; EXPLAIN the read itself.
+            statement = re.sub(r'\bINTO\s+v_\w+(\s*,\s*v_\w+)*', '', statement)
+            if not re.search(r'\bFROM\b|\bUPDATE\b', statement, re.IGNORECASE):
+                continue  # SELECT of locals only
+            if re.match(r'\s*INSERT\b', statement, re.IGNORECASE) and not re.search(
+                    r'\bSELECT\b', statement, re.IGNORECASE):
+                continue  # INSERT ... VALUES has no plan worth checking
+            statements.append(statement)
+        procedures[name] = (params, declares, statements)
+    return procedures
+
+
+def bind(statement, values):
+    """Replace p_/v_ names with %s placeholders; returns (sql, params)."""
+    params = []
+
+    def placeholder(match):
+        params.append(values.get(match.group(1)))
+        return '%s'
+
+    sql = _VARIABLE.sub(placeholder, statement.replace('%', '%%'))
+    if not params:
+        return statement, params
+    return sql, params
+
+
+def procedure_arguments(p):
+    """Sample CALL arguments for every procedure: the load driver's, plus the maintenance ones."""
+    rng = p['rng']
+    talked = rng.choice(p['talked'])
+    arguments = {name.split()[-1]: params_fn(rng) for name, _sql, params_fn, _w in procedure_cases(p)}
+    arguments.update({
+        'Refresh_Last_Contact': (talked['User_N'], talked['Connect_N']),
+        'Stale_Contacts': (talked['User_N'], datetime.now() - timedelta(days=90), 100),
+        'Backfill_Cities': (1000,),
+        'Bump_Table_Versions': ('Talked,Last_Contact',),
+    })
+    return arguments
+
+
+def collect_procedure_statements(connection, p, path=FUNCTIONS_SQL):
+    """(source, sql, params) for every plannable statement inside the procedures."""
+    arguments = procedure_arguments(p)
+    cursor = connection.cursor()
+    collected = []
+    for name, (params, declares, statements) in parse_procedures(path).items():
+        values = dict(zip(params, arguments.get(name, ())))
+        for var, default in declares.items():
+            if default:
+                sql, bound = bind(default, values)
+                cursor.execute(f"SELECT {sql}", bound)
+                values[var] = cursor.fetchone()[0]
+        for statement in statements:
+            sql, bound = bind(statement, values)
+            collected.append((f'CALL {name}', sql, bound))
+    cursor.close()
+    return collected
+
+
+def table_aliases(sql):
+    """{alias or table name: table} for the FROM/JOIN/UPDATE targets of a statement."""
+    aliases = {}
+    for table, alias in re.findall(r'\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql, re.IGNORECASE):
+        aliases[table] = table
+        if alias and alias.upper() not in _SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def propose_index(sql, alias, table, schema):
+    """
+    Columns for an index on `table` serving this statement (equality columns,
+    then ORDER BY, then one range column), or None if an existing index
+    already starts with them.
+    """
+    if len(set(table_aliases(sql).values())) == 1:
+        column = rf'(?:\b{re.escape(alias)}\.)?\b(\w+)'
+    else:
+        column = rf'\b{re.escape(alias)}\.(\w+)'
+    known = {name.lower(): name for name in schema['columns'].get(table, ())}
+    # An UPDATE's SET assignments are not predicates.
+    predicates = re.sub(r'\bSET\b.*?(?=\bWHERE\b|$)', '', sql, flags=re.IGNORECASE | re.DOTALL)
+    equality, ordering, ranges = [], [], []
+
+    def add(target, name):
+        name = known.get(name.lower())
+        if name and name not in equality + ordering + ranges:
+            target.append(name)
+
+    for name in re.findall(column + r'\s*(?:=|\bIN\b)', predicates, re.IGNORECASE):
+        add(equality, name)
+    for name in re.findall(r'(?<![<>!])=\s*' + column, predicates, re.IGNORECASE):
+        add(equality, name)
+    order = re.search(r'\bORDER BY\b(.*?)(?:\bLIMIT\b|$)', sql, re.IGNORECASE | re.DOTALL)
+    if order:
+        for name in re.findall(column, order.group(1)):
+            if name.upper() not in ('ASC', 'DESC'):
+                add(ordering, name)
+    for name in re.findall(column + r'\s*(?:<=|>=|<|>|\bBETWEEN\b)', predicates, re.IGNORECASE):
+        add(ranges, name)
+
+    columns = equality + ordering + ranges[:1]
+    if not columns:
+        return None
+    for index_columns in schema['indexes'].get(table, {}).values():
+        if index_columns[:len(columns)] == columns:
+            return None
+    return columns
+
+
+def load_schema(connection):
+    """
+    {'indexes': {table: {index name: [columns in order]}},
+     'columns': {table: [columns]}} for the current database.
+    """
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+        ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+    """)
+    indexes = {}
+    for table, index, column in cursor.fetchall():
+        indexes.setdefault(table, {}).setdefault(index, []).append(column)
+    cursor.execute("""
+        SELECT TABLE_NAME, COLUMN_NAME
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+        ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """)
+    columns = {}
+    for table, column in cursor.fetchall():
+        columns.setdefault(table, []).append(column)
+    cursor.close()
+    return {'indexes': indexes, 'columns': columns}
+
+
+def explain(connection, sql, params, schema, min_rows):
+    """EXPLAIN one statement; returns {'plan', 'flags', 'proposals', 'notes'}."""
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute("EXPLAIN " + sql, params or ())
+        plan = cursor.fetchall()
+    except mysql.connector.Error as e:
+        return {'plan': [], 'flags': [], 'proposals': [], 'notes': [f'EXPLAIN failed: {e}']}
+    finally:
+        cursor.close()
+
+    aliases = table_aliases(sql)
+    flags, proposals, notes = [], [], []
+    for row in plan:
+        alias = row.get('table') or ''
+        table = aliases.get(alias, alias)
+        extra = row.get('Extra') or ''
+        if (row.get('rows') or 0) < min_rows:
+            continue
+        found = []
+        if row.get('type') == 'ALL':
+            found.append('full_scan')
+        elif row.get('type') == 'index':
+            found.append('full_index_scan')
+        if 'Using temporary' in extra:
+            found.append('temporary')
+        if 'Using filesort' in extra:
+            found.append('filesort')
+        if not found:
+            continue
+        flags.extend(f'{flag}:{table}' for flag in found)
+        if table.startswith('<'):
+            continue  # derived table or union result
+        columns = propose_index(sql, alias, table, schema)
+        if columns:
+            statement = f"CREATE INDEX idx_{table.lower()}_{'_'.join(c.lower() for c in columns)} " \
+                        f"ON {table}({', '.join(columns)});"
+            if statement not in proposals:
+                proposals.append(statement)
+    if re.search(r"LIKE\s+CONCAT\(\s*'%%'", sql, re.IGNORECASE):
+        notes.append("leading-wildcard LIKE: no B-tree index can serve it (consider FULLTEXT)")
+    return {'plan': plan, 'flags': sorted(set(flags)), 'proposals': proposals, 'notes': notes}
+
+
+def check(connection, statements, min_rows):
+    schema = load_schema(connection)
+    results = {}
+    for source, sql, params in statements:
+        key = fingerprint(sql)
+        if key in results:
+            continue
+        result = explain(connection, sql, params, schema, min_rows)
+        results[key] = {'source': source, 'sql': ' '.join(sql.split()), **result}
+    return results
+
+
+def render(results):
+    lines = []
+    for key, r in results.items():
+        if not (r['flags'] or r['notes']):
+            continue
+        lines.append(f"[{key}] {r['source']}")
+        lines.append(f"    {r['sql'][:160]}{'...' if len(r['sql']) > 160 else ''}")
+        for flag in r['flags']:
+            lines.append(f"    flag: {flag}")
+        for proposal in r['proposals']:
+            lines.append(f"    propose: {proposal}")
+        for note in r['notes']:
+            lines.append(f"    note: {note}")
+    flagged = sum(1 for r in results.values() if r['flags'])
+    lines.append(f"{len(results)} statements explained, {flagged} flagged")
+    return '\n'.join(lines)
+
+
+def regressions(results, baseline):
+    """Flags present now that the baseline did not accept, as (key, source, flag)."""
+    accepted = baseline.get('statements', {})
+    new = []
+    for key, r in results.items():
+        allowed = set(accepted.get(key, {}).get('flags', ()))
+        new.extend((key, r['source'], flag) for flag in r['flags'] if flag not in allowed)
+    return new
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--min-rows', type=int, default=1000,
+                        help='ignore plan rows estimated to touch fewer rows than this')
+    parser.add_argument('--baseline', help='exit 1 if any statement has a flag not accepted here')
+    parser.add_argument('--write-baseline', metavar='PATH', help='accept the current flags and save them')
+    parser.add_argument('--output', help='write full JSON results here')
+    args = parser.parse_args()
+
+    connection = mysql.connector.connect(**DB_CONFIG)
+    try:
+        p = sample_params(connection, args.seed)
+        statements = collect_route_statements(p)
+        statements += collect_procedure_statements(connection, p)
+        results = check(connection, statements, args.min_rows)
+    finally:
+        connection.close()
+
+    print(render(results))
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2, default=str)
+            fh.write('\n')
+
+    if args.write_baseline:
+        baseline = {'statements': {
+            key: {'source': r['source'], 'sql': r['sql'], 'flags': r['flags']}
+            for key, r in results.items() if r['flags']
+        }}
+        with open(args.write_baseline, 'w') as fh:
+            json.dump(baseline, fh, indent=2, sort_keys=True)
+            fh.write('\n')
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            new = regressions(results, json.load(fh))
+        for key, source, flag in new:
+            print(f"plan regression [{key}] {source}: {flag}", file=sys.stderr)
+        if new:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
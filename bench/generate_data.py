@@ -0,0 +1,222 @@
+"""
+Deterministic synthetic data generator for benchmarking.
+
+Fills the tables from network_assistant_schema.sql at a chosen scale with
+realistic fan-out: every connection is talked to by 1-3 users (1-4
+conversations each), worked at 1-3 companies and studied at 0-2 schools. The same --seed and --scale always
+produce the same rows, so runs can be compared between commits.
+
+    python -m bench.generate_data --scale 100k
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+
+from db import DB_CONFIG
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+FIRST_NAMES = (
+    'Alex', 'Blake', 'Casey', 'Dana', 'Eli', 'Frankie', 'Gale', 'Harper', 'Indy', 'Jordan',
+    'Kai', 'Logan', 'Morgan', 'Noor', 'Oakley', 'Parker', 'Quinn', 'Riley', 'Sage', 'Taylor',
+)
+LAST_NAMES = (
+    'Adams', 'Baker', 'Chen', 'Diaz', 'Evans', 'Fischer', 'Garcia', 'Hughes', 'Ito', 'Jones',
+    'Khan', 'Lopez', 'Moreau', 'Nakamura', 'Okafor', 'Patel', 'Rossi', 'Silva', 'Tanaka', 'Weber',
+)
+CITIES = (
+    ('Springfield', 'IL'), ('Metropolis', 'NY'), ('Lakeside', 'MI'), ('Silicon City', 'CA'),
+    ('College Town', 'PA'), ('Austin', 'TX'), ('Denver', 'CO'), ('Portland', 'OR'),
+    ('Nashville', 'TN'), ('Raleigh', 'NC'), ('Madison', 'WI'), ('Boulder', 'CO'),
+    ('Seattle', 'WA'), ('Boston', 'MA'), ('Atlanta', 'GA'), ('Phoenix', 'AZ'),
+)
+STREETS = ('Oak St', 'Pine Ave', 'River Rd', 'Hilltop Dr', 'Maple Ln', 'Market St', 'Elm St', 'Cedar Blvd')
+RELATIONS = ('Colleague', 'Former Manager', 'Recruiter', 'Classmate', 'Mentor', 'Friend')
+METHODS = ('Zoom', 'Phone', 'Email', 'Coffee', 'LinkedIn')
+TOPICS = ('Career advice', 'Referral request', 'Job application follow-up', 'Catch up', 'Interview prep')
+INDUSTRIES = ('Technology', 'Consulting', 'Manufacturing', 'Finance', 'Healthcare', 'Retail', 'Energy')
+ROLES = ('Engineer', 'Analyst', 'Manager', 'Designer', 'Consultant', 'Recruiter', 'Director')
+DEPARTMENTS = ('R&D', 'Analytics', 'HR', 'Sales', 'Operations', 'Finance')
+DEGREES = ('Undergraduate', 'Graduate', 'PhD')
+SUBJECTS = ('Computer Science', 'Economics', 'Biology', 'History', 'Mathematics', 'Design')
+
+# Children first so TRUNCATE order is irrelevant once FK checks are off.
+TABLES = (
+    'Went_To', 'Last_Contact', 'Talked', 'Worked', 'Makes', 'School', 'Company', 'Organization',
+    'ConnectionC', 'Connection', 'UserC', 'User', 'Work_View', 'Education_View', 'Change_Log',
+)
+
+BATCH_SIZE = 5000
+
+
+def parse_scale(value):
+    """Accept 10k / 100k / 1m or a plain connection count."""
+    if value.lower() in SCALES:
+        return SCALES[value.lower()]
+    return int(value)
+
+
+def _address(rng, number):
+    city, state = rng.choice(CITIES)
+    street = f"{number} {rng.choice(STREETS)}"
+    if rng.random() < 0.3:
+        return f"{street}, {city}, {state} {rng.randint(10000, 99999)}"
+    return f"{street}, {city}"
+
+
+def _location(rng):
+    city, state = rng.choice(CITIES)
+    return f"{city}, {state}" if rng.random() < 0.5 else city
+
+
+def _person(rng, index):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {index:07d}"
+
+
+def generate(connections, seed=42):
+    """Yield (table, columns, rows) batches for the given number of connections."""
+    rng = random.Random(seed)
+    num_users = max(5, connections // 2000)
+    num_companies = max(3, connections // 50)
+    num_schools = max(1, connections // 500)
+    epoch = datetime(2020, 1, 1)
+
+    users = [f"User {i:05d}" for i in range(num_users)]
+    yield 'User', ('Name', 'Address'), [(u, _address(rng, i)) for i, u in enumerate(users)]
+    yield 'UserC', ('Name', 'Type', 'Phone_Num', 'Email'), [
+        (u, rng.choice(('Premium', 'Basic')), f"555-{i % 10000:04d}", f"user{i}@example.com")
+        for i, u in enumerate(users)
+    ]
+
+    companies = [f"Company {i:06d}" for i in range(num_companies)]
+    schools = [f"School {i:05d}" for i in range(num_schools)]
+    org_rows = []
+    company_rows = []
+    school_rows = []
+    for i, name in enumerate(companies):
+        address = _address(rng, i)
+        org_rows.append((name, address, None, None))
+        company_rows.append((name, address, name[-4:], rng.randint(10, 50000), rng.choice(INDUSTRIES)))
+    for i, name in enumerate(schools):
+        address = _address(rng, i)
+        org_rows.append((name, address, None, None))
+        school_rows.append((name, address, rng.randint(500, 60000), rng.randint(1, 500)))
+    yield 'Organization', ('Name', 'Address', 'Phone_Num', 'Email'), org_rows
+    yield 'Company', ('Org_N', 'Org_A', 'Stock', 'Num_Employees', 'Industry'), company_rows
+    yield 'School', ('Org_N', 'Org_A', 'Enrollment', 'Ranking'), school_rows
+
+    makes = []
+    for u in users:
+        for j in range(10):
+            posted = epoch + timedelta(minutes=rng.randint(0, 5 * 365 * 24 * 60))
+            makes.append((
+                u, f"{rng.choice(ROLES)} #{j}", posted.date(), posted.date() + timedelta(days=14),
+                posted, rng.random() < 0.9, rng.random() < 0.5, _person(rng, rng.randint(0, connections)),
+            ))
+    yield 'Makes', ('User_N', 'Job', 'Start', 'Complete', 'Posted', 'Resume', 'Cover_L', 'Recruiter'), makes
+
+    def worked_row(name):
+        start = date(2005, 1, 1) + timedelta(days=rng.randint(0, 18 * 365))
+        end = None if rng.random() < 0.3 else start + timedelta(days=rng.randint(90, 2000))
+        return (name, None, start, end, rng.choice(ROLES), rng.choice(DEPARTMENTS), _location(rng))
+
+    conn_cols = ('Name', 'Address', 'Relation')
+    conc_cols = ('Name', 'Type', 'Phone_Num', 'Email')
+    talked_cols = ('User_N', 'Connect_N', 'Topic', 'Method', 'Start', 'End')
+    worked_cols = ('Name', 'Org_N', 'Start', 'End', 'Role', 'Department', 'Location')
+    went_cols = ('Name', 'School_N', 'Type', 'Subject', 'Graduation')
+
+    for offset in range(0, connections, BATCH_SIZE):
+        conn_rows, conc_rows, talked_rows, worked_rows, went_rows = [], [], [], [], []
+        for i in range(offset, min(offset + BATCH_SIZE, connections)):
+            name = _person(rng, i)
+            conn_rows.append((name, _address(rng, i), rng.choice(RELATIONS)))
+            if rng.random() < 0.7:
+                conc_rows.append((name, 'personal', f"555-{i % 10000:04d}", f"c{i}@example.com"))
+            for user in rng.sample(users, rng.randint(1, min(3, num_users))):
+                # A short history per pair; distinct minutes keep (User_N, Connect_N, Start) unique.
+                minutes = rng.sample(range(5 * 365 * 24 * 60), rng.randint(1, 4))
+                for minute in minutes:
+                    start = epoch + timedelta(minutes=minute)
+                    talked_rows.append((
+                        user, name, rng.choice(TOPICS), rng.choice(METHODS),
+                        start, start + timedelta(minutes=rng.randint(5, 90)),
+                    ))
+            for org in rng.sample(companies, rng.randint(1, min(3, num_companies))):
+                row = worked_row(name)
+                worked_rows.append((row[0], org) + row[2:])
+            for school in rng.sample(schools, rng.randint(0, min(2, num_schools))):
+                went_rows.append((
+                    name, school, rng.choice(DEGREES), rng.choice(SUBJECTS),
+                    date(2000, 5, 15) + timedelta(days=365 * rng.randint(0, 24)),
+                ))
+        yield 'Connection', conn_cols, conn_rows
+        yield 'ConnectionC', conc_cols, conc_rows
+        yield 'Talked', talked_cols, talked_rows
+        yield 'Worked', worked_cols, worked_rows
+        yield 'Went_To', went_cols, went_rows
+
+    # Users have work history too, so warm-intro and education queries see both.
+    worked_rows = []
+    for u in users:
+        for org in rng.sample(companies, min(2, num_companies)):
+            row = worked_row(u)
+            worked_rows.append((row[0], org) + row[2:])
+    yield 'Worked', worked_cols, worked_rows
+
+
+def load(connection, connections, seed=42):
+    """Truncate the schema and insert a generated dataset; returns row counts."""
+    cursor = connection.cursor()
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    cursor.execute("SET UNIQUE_CHECKS = 0")
+    for table in TABLES:
+        cursor.execute(f"TRUNCATE TABLE {table}")
+
+    counts = {}
+    for table, columns, rows in generate(connections, seed):
+        if not rows:
+            continue
+        sql = (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))})"
+        )
+        for start in range(0, len(rows), BATCH_SIZE):
+            cursor.executemany(sql, rows[start:start + BATCH_SIZE])
+        connection.commit()
+        counts[table] = counts.get(table, 0) + len(rows)
+
+    cursor.execute("SET UNIQUE_CHECKS = 1")
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    cursor.execute("CALL Refresh_Stats_Counters()")
+    cursor.execute("CALL Refresh_Last_Contacts()")
+    cursor.execute("CALL Refresh_Read_Models()")
+    connection.commit()
+    cursor.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scale', default='10k', help='10k, 100k, 1m or a connection count')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    connections = parse_scale(args.scale)
+    connection = mysql.connector.connect(**DB_CONFIG)
+    started = time.perf_counter()
+    try:
+        counts = load(connection, connections, args.seed)
+    finally:
+        connection.close()
+
+    for table, count in counts.items():
+        print(f"{table:<14} {count:>10,}")
+    print(f"Loaded in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
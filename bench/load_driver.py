@@ -0,0 +1,284 @@
+"""
+Load driver: times every Flask route and stored procedure against a local MySQL.
+
+Routes are exercised in-process through the Flask test client (the same
+pooled data-access path production uses); procedures are called directly,
+with the write procedures rolled back so the dataset stays unchanged.
+
+    python -m bench.generate_data --scale 100k
+    python -m bench.load_driver --iterations 200 --output bench_results/$(git rev-parse --short HEAD).json
+    python -m bench.report bench_results/<before>.json bench_results/<after>.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+import mysql.connector
+
+from app import app
+from db import DB_CONFIG
+
+
+def sample_params(connection, seed=42):
+    """Pick realistic argument values from the loaded data."""
+    rng = random.Random(seed)
+    cursor = connection.cursor(dictionary=True)
+
+    def column(sql):
+        cursor.execute(sql)
+        return [next(iter(row.values())) for row in cursor.fetchall()]
+
+    params = {
+        'users': column("SELECT Name FROM User ORDER BY Name LIMIT 50"),
+        'connections': column("SELECT Name FROM Connection ORDER BY Name LIMIT 500"),
+        'companies': column("SELECT Org_N FROM Company ORDER BY Org_N LIMIT 200"),
+        'industries': column("SELECT DISTINCT Industry FROM Company LIMIT 20"),
+        'cities': column("SELECT DISTINCT City FROM Worked WHERE City IS NOT NULL LIMIT 20"),
+    }
+    cursor.execute("SELECT User_N, Connect_N, Start FROM Talked ORDER BY Start DESC LIMIT 200")
+    params['talked'] = cursor.fetchall()
+    cursor.close()
+    params['rng'] = rng
+    return params
+
+
+def route_cases(p):
+    """(name, callable(client, rng)) pairs covering every GET route."""
+    def pick(key):
+        return lambda rng: rng.choice(p[key])
+
+    user = pick('users')
+    conn = pick('connections')
+    company = pick('companies')
+    city = pick('cities')
+
+    def get(path_fn):
+        return lambda client, rng: client.get(path_fn(rng))
+
+    def deep_page(path):
+        # Follow the first page's next cursor a few times to show latency is flat.
+        def run(client, rng):
+            response = client.get(path)
+            for _ in range(5):
+                body = response.get_data(as_text=True)
+                marker = 'after='
+                if marker not in body:
+                    break
+                token = body.split(marker, 1)[1].split('&', 1)[0].split('"', 1)[0]
+                response = client.get(f"{path}?after={token}")
+            return response
+        return run
+
+    return [
+        ('GET /', get(lambda rng: '/')),
+        ('GET /users', get(lambda rng: '/users')),
+        ('GET /connections', get(lambda rng: '/connections')),
+        ('GET /connections (6 pages)', deep_page('/connections')),
+        ('GET /companies', get(lambda rng: '/companies')),
+        ('GET /schools', get(lambda rng: '/schools')),
+        ('GET /conversations', get(lambda rng: '/conversations')),
+        ('GET /conversations (6 pages)', deep_page('/conversations')),
+        ('GET /work-experience', get(lambda rng: '/work-experience')),
+        ('GET /applications', get(lambda rng: '/applications')),
+        ('GET /education', get(lambda rng: '/education')),
+        ('GET /search', get(lambda rng: f"/search?q={company(rng).split()[0]}")),
+        ('GET /search/network', get(lambda rng: f"/search/network?user_n={user(rng)}&company={company(rng)}")),
+        ('GET /last-contacted', get(lambda rng: f"/last-contacted?user_n={user(rng)}&connect_n={conn(rng)}")),
+        ('GET /connections/city', get(lambda rng: f"/connections/city?user_n={user(rng)}&city={city(rng)}")),
+        ('GET /connections/city (substring)',
+         get(lambda rng: f"/connections/city?user_n={user(rng)}&city={city(rng)}&match=substring")),
+        ('GET /add/conversation', get(lambda rng: '/add/conversation')),
+        ('GET /delete/connection', get(lambda rng: '/delete/connection')),
+        ('GET /update/conversation', get(lambda rng: '/update/conversation')),
+        ('GET /add/work-experience', get(lambda rng: '/add/work-experience')),
+    ]
+
+
+def procedure_cases(p):
+    """(name, sql, params_fn, writes) for every stored procedure."""
+    def talked(rng):
+        return rng.choice(p['talked'])
+
+    return [
+        ('CALL Add_Connection_By_Talking',
+         "CALL Add_Connection_By_Talking(" + ','.join(['%s'] * 24) + ")",
+         lambda rng: (
+             rng.choice(p['users']), f"Bench Contact {rng.randint(0, 10**9)}", '1 Bench St, Austin',
+             'Colleague', None, None, 'Benchmark', 'Zoom', '2025-01-01 10:00:00', '2025-01-01 10:30:00',
+             rng.choice(p['companies']), None, 'Engineer', 'R&D', 'Austin', '2024-01-01', None,
+             None, None, None, None, None, None, None,
+         ), True),
+        ('CALL Delete_Connection', "CALL Delete_Connection(%s)",
+         lambda rng: (rng.choice(p['connections']),), True),
+        ('CALL Update_Conversation', "CALL Update_Conversation(%s,%s,%s,%s,%s,%s,%s)",
+         lambda rng: (lambda t: (t['User_N'], t['Connect_N'], t['Start'], 'Bench topic', None, None, None))(talked(rng)),
+         True),
+        ('CALL Add_Work_Experience', "CALL Add_Work_Experience(%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)",
+         lambda rng: (rng.choice(p['connections']), f"Bench Org {rng.randint(0, 10**9)}", None, 'Engineer',
+                      '2024-01-01', None, None, 'Austin', None, None, None), True),
+        ('CALL Search_Connections_By_Company_Industry_Location',
+         "CALL Search_Connections_By_Company_Industry_Location(%s,%s,%s,%s,%s)",
+         lambda rng: (rng.choice(p['users']), None, rng.choice(p['industries']), rng.choice(p['cities']), 'exact'),
+         False),
+        ('CALL Last_Time_Contacted', "CALL Last_Time_Contacted(%s,%s)",
+         lambda rng: (lambda t: (t['User_N'], t['Connect_N']))(talked(rng)), False),
+        ('CALL Connections_In_City', "CALL Connections_In_City(%s,%s,%s)",
+         lambda rng: (rng.choice(p['cities']), rng.choice(p['users']), 'exact'), False),
+    ]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, errors, wall_seconds):
+    latencies = sorted(latencies)
+    n = len(latencies)
+    return {
+        'n': n,
+        'errors': errors,
+        'throughput': n / wall_seconds if wall_seconds else None,
+        'mean_ms': sum(latencies) / n * 1000 if n else None,
+        'p50_ms': percentile(latencies, 50) * 1000 if n else None,
+        'p95_ms': percentile(latencies, 95) * 1000 if n else None,
+        'p99_ms': percentile(latencies, 99) * 1000 if n else None,
+    }
+
+
+def run_case(fn, iterations, concurrency, warmup, seed):
+    """Run fn(rng) `iterations` times over `concurrency` threads; fn returns True on success."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(index, count):
+        rng = random.Random(seed + index)
+        for _ in range(warmup):
+            fn(rng)
+        local, failed = [], 0
+        for _ in range(count):
+            started = time.perf_counter()
+            ok = fn(rng)
+            local.append(time.perf_counter() - started)
+            failed += 0 if ok else 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    per_thread = [iterations // concurrency + (1 if i < iterations % concurrency else 0)
+                  for i in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(i, n)) for i, n in enumerate(per_thread)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+_procedure_connections = threading.local()
+
+
+def _call_procedure(sql, params, writes):
+    """CALL on a per-thread connection; write procedures are rolled back."""
+    connection = getattr(_procedure_connections, 'connection', None)
+    if connection is None:
+        connection = mysql.connector.connect(consume_results=True, **DB_CONFIG)
+        _procedure_connections.connection = connection
+    connection.autocommit = not writes
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        cursor.close()
+        return True
+    except mysql.connector.Error:
+        return False
+    finally:
+        if writes:
+            connection.rollback()
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--iterations', type=int, default=100, help='timed calls per case')
+    parser.add_argument('--concurrency', type=int, default=4, help='worker threads per case')
+    parser.add_argument('--warmup', type=int, default=3, help='untimed calls per thread')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', help='run only cases whose name contains this text')
+    parser.add_argument('--output', help='write JSON results here (default: stdout)')
+    args = parser.parse_args()
+
+    connection = mysql.connector.connect(**DB_CONFIG)
+    try:
+        p = sample_params(connection, args.seed)
+    finally:
+        connection.close()
+
+    results = {}
+    client_local = threading.local()
+
+    def client():
+        if not hasattr(client_local, 'client'):
+            client_local.client = app.test_client()
+        return client_local.client
+
+    for name, request_fn in route_cases(p):
+        if args.only and args.only not in name:
+            continue
+        results[name] = run_case(
+            lambda rng, fn=request_fn: fn(client(), rng).status_code < 400,
+            args.iterations, args.concurrency, args.warmup, args.seed,
+        )
+        print(f"{name:<55} p95 {results[name]['p95_ms']:.1f} ms", flush=True)
+
+    for name, sql, params_fn, writes in procedure_cases(p):
+        if args.only and args.only not in name:
+            continue
+        results[name] = run_case(
+            lambda rng, sql=sql, params_fn=params_fn, writes=writes:
+                _call_procedure(sql, params_fn(rng), writes),
+            args.iterations, args.concurrency, args.warmup, args.seed,
+        )
+        print(f"{name:<55} p95 {results[name]['p95_ms']:.1f} ms", flush=True)
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'iterations': args.iterations,
+            'concurrency': args.concurrency,
+            'database': DB_CONFIG['database'],
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as fh:
+            fh.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Render load_driver results, or compare two runs.
+
+    python -m bench.report bench_results/abc123.json
+    python -m bench.report bench_results/abc123.json bench_results/def456.json --fail-on-regression 20
+"""
+import argparse
+import json
+import sys
+
+
+def _fmt(value, spec='.1f'):
+    return '-' if value is None else format(value, spec)
+
+
+def _delta(before, after):
+    if not before or after is None:
+        return None
+    return (after - before) / before * 100
+
+
+def render_single(report):
+    meta = report['meta']
+    lines = [
+        f"revision {meta.get('revision')}  iterations {meta['iterations']}  concurrency {meta['concurrency']}",
+        f"{'case':<55} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5}",
+    ]
+    for name, r in report['results'].items():
+        lines.append(
+            f"{name:<55} {_fmt(r['throughput']):>8} {_fmt(r['p50_ms']):>8} "
+            f"{_fmt(r['p95_ms']):>8} {_fmt(r['p99_ms']):>8} {r['errors']:>5}"
+        )
+    return '\n'.join(lines)
+
+
+def compare(before, after):
+    """Return (text, worst p95 regression in percent) for two reports."""
+    lines = [
+        f"{before['meta'].get('revision')} -> {after['meta'].get('revision')}",
+        f"{'case':<55} {'p95 before':>10} {'p95 after':>10} {'p95 Δ%':>8} {'req/s Δ%':>9}",
+    ]
+    worst = 0.0
+    for name, new in after['results'].items():
+        old = before['results'].get(name)
+        if old is None:
+            lines.append(f"{name:<55} {'-':>10} {_fmt(new['p95_ms']):>10} {'new':>8} {'':>9}")
+            continue
+        p95_delta = _delta(old['p95_ms'], new['p95_ms'])
+        tput_delta = _delta(old['throughput'], new['throughput'])
+        if p95_delta is not None:
+            worst = max(worst, p95_delta)
+        lines.append(
+            f"{name:<55} {_fmt(old['p95_ms']):>10} {_fmt(new['p95_ms']):>10} "
+            f"{_fmt(p95_delta, '+.1f'):>8} {_fmt(tput_delta, '+.1f'):>9}"
+        )
+    return '\n'.join(lines), worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('reports', nargs='+', help='one report, or a baseline and a candidate')
+    parser.add_argument('--fail-on-regression', type=float, metavar='PCT',
+                        help='exit 1 if any p95 got worse by more than PCT percent')
+    args = parser.parse_args()
+
+    loaded = []
+    for path in args.reports[:2]:
+        with open(path) as fh:
+            loaded.append(json.load(fh))
+
+    if len(loaded) == 1:
+        print(render_single(loaded[0]))
+        return
+
+    text, worst = compare(*loaded)
+    print(text)
+    if args.fail_on_regression is not None and worst > args.fail_on_regression:
+        print(f"p95 regression of {worst:.1f}% exceeds {args.fail_on_regression}%", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+"""
+Bulk import of connections, conversations and work/school history.
+
+Each input row carries the same fields as the /add/conversation form and
+is validated with the same helpers. Rows are streamed from CSV or NDJSON and
+written in chunks: one transaction per chunk, one multi-row INSERT per table.
+If a chunk fails (e.g. a duplicate conversation), it is replayed row by row
+through Add_Connection_By_Talking so the failing rows can be reported
+individually while the rest still land.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from mysql.connector import Error
+
+from db import get_db_connection
+from forms import normalize_dt, opt
+from table_versions import PROCEDURE_WRITES
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Parameter order of Add_Connection_By_Talking, named like the form fields.
+FIELDS = (
+    'user_n', 'connect_n', 'addr', 'relation', 'phone', 'email', 'topic', 'method',
+    'start', 'end',
+    'org_n', 'org_a', 'role', 'dept', 'job_loc', 'job_start', 'job_end',
+    'industry', 'num_employees', 'stock',
+    'school_n', 'deg_type', 'subject', 'graduation',
+)
+
+UNKNOWN_ADDRESS = 'Unknown address'
+
+# Same merge Add_Connection_By_Talking applies: topic/method are assigned before
+# Last_Start so they compare against the stored value.
+LAST_CONTACT_MERGE = (
+    'Last_Topic = IF(VALUES(Last_Start) >= Last_Start, VALUES(Last_Topic), Last_Topic), '
+    'Last_Method = IF(VALUES(Last_Start) >= Last_Start, VALUES(Last_Method), Last_Method), '
+    'Last_End = GREATEST(COALESCE(Last_End, VALUES(Last_End)), COALESCE(VALUES(Last_End), Last_End)), '
+    'Last_Start = GREATEST(Last_Start, VALUES(Last_Start)), '
+    'Conversations = Conversations + VALUES(Conversations)'
+)
+
+# Tables a chunk can write; the same set Add_Connection_By_Talking bumps.
+BUMPED_TABLES = PROCEDURE_WRITES['Add_Connection_By_Talking']
+
+
+class ImportReport:
+    """Running totals and per-row errors for one import."""
+
+    MAX_ERRORS = 1000
+
+    def __init__(self):
+        self.rows_read = 0
+        self.rows_imported = 0
+        self.chunks = 0
+        self.errors = []
+        self.error_count = 0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {
+            'rows_read': self.rows_read,
+            'rows_imported': self.rows_imported,
+            'rows_failed': self.error_count,
+            'chunks': self.chunks,
+            'errors': self.errors,
+        }
+
+
+def _text(value):
+    if value is None:
+        return None
+    return opt(str(value))
+
+
+def validate_row(raw, known_users):
+    """
+    Turn one input record into Add_Connection_By_Talking parameters.
+
+    Raises ValueError with a user-facing message for invalid rows.
+    """
+    row = {field: _text(raw.get(field)) for field in FIELDS}
+
+    if not row['user_n'] or not row['connect_n']:
+        raise ValueError('User and Connection name are required.')
+    if row['user_n'] not in known_users:
+        raise ValueError(f"User '{row['user_n']}' does not exist.")
+
+    for field in ('start', 'end'):
+        row[field] = normalize_dt(row[field])
+        if row[field]:
+            try:
+                datetime.fromisoformat(row[field])
+            except ValueError:
+                raise ValueError(f"Invalid {field} datetime: {row[field]!r}") from None
+    # Start is part of Talked's key; undated conversations are logged as "now",
+    # as Add_Connection_By_Talking does.
+    row['start'] = row['start'] or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    for field in ('job_start', 'job_end', 'graduation'):
+        if row[field]:
+            try:
+                date.fromisoformat(row[field])
+            except ValueError:
+                raise ValueError(f"Invalid {field} date: {row[field]!r}") from None
+
+    if row['num_employees']:
+        try:
+            row['num_employees'] = int(row['num_employees'])
+        except ValueError:
+            raise ValueError(f"Invalid num_employees: {row['num_employees']!r}") from None
+
+    return tuple(row[field] for field in FIELDS)
+
+
+def read_records(stream, fmt):
+    """Yield (line_number, dict) from a binary CSV or NDJSON stream."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+            continue
+        yield line_number, record if isinstance(record, dict) else ValueError('Expected a JSON object.')
+
+
+def detect_format(filename):
+    """'csv' or 'ndjson' from a file name; None if unrecognised."""
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl', '.json')):
+        return 'ndjson'
+    return None
+
+
+def _fold_last_contact(summary, user_n, connect_n, topic, method, start, end):
+    """Merge one conversation into a chunk's per-pair Last_Contact rows."""
+    key = (user_n, connect_n)
+    previous = summary.get(key)
+    if previous is None:
+        summary[key] = (user_n, connect_n, start, end, topic, method, 1)
+        return
+    _u, _c, last_start, last_end, last_topic, last_method, count = previous
+    if start >= last_start:
+        last_start, last_topic, last_method = start, topic, method
+    if end is not None and (last_end is None or end > last_end):
+        last_end = end
+    summary[key] = (user_n, connect_n, last_start, last_end, last_topic, last_method, count + 1)
+
+
+def _insert_many(cursor, table, columns, rows, on_duplicate=None):
+    """One multi-row INSERT for `rows` (a list of tuples)."""
+    if not rows:
+        return
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+        + ', '.join([placeholders] * len(rows))
+    )
+    if on_duplicate:
+        sql += f" ON DUPLICATE KEY UPDATE {on_duplicate}"
+    cursor.execute(sql, [value for row in rows for value in row])
+
+
+class BulkImporter:
+    """Writes validated rows in chunked, batched transactions."""
+
+    def __init__(self, connection, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+        self.connection = connection
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.report = ImportReport()
+        # Names already written during this import; keeps repeated contacts and
+        # organizations out of the per-chunk INSERTs.
+        self.seen_connections = set()
+        self.seen_orgs = set()
+
+    def _write_chunk(self, rows):
+        """Fast path: the whole chunk as one transaction of multi-row INSERTs."""
+        connections, contacts, orgs, companies, schools = {}, {}, {}, {}, {}
+        talked, worked, went_to = [], [], []
+        last_contact = {}
+
+        for (user_n, connect_n, addr, relation, phone, email, topic, method, start, end,
+             org_n, org_a, role, dept, job_loc, job_start, job_end,
+             industry, num_employees, stock,
+             school_n, deg_type, subject, graduation) in rows:
+            if connect_n not in self.seen_connections:
+                connections.setdefault(connect_n, (connect_n, addr, relation))
+            if phone is not None or email is not None:
+                contacts[connect_n] = (connect_n, 'personal', phone, email)
+            talked.append((user_n, connect_n, topic, method, start, end))
+            _fold_last_contact(last_contact, user_n, connect_n, topic, method, start, end)
+
+            if org_n is not None:
+                if org_n not in self.seen_orgs:
+                    orgs.setdefault(org_n, (org_n, org_a or UNKNOWN_ADDRESS, None, None))
+                if industry is not None or num_employees is not None or stock is not None:
+                    companies[org_n] = (org_n, org_a or UNKNOWN_ADDRESS, stock, num_employees, industry)
+                worked.append((connect_n, org_n, job_start, job_end, role, dept, job_loc))
+
+            if school_n is not None:
+                if school_n not in self.seen_orgs:
+                    orgs.setdefault(school_n, (school_n, org_a or UNKNOWN_ADDRESS, None, None))
+                schools[school_n] = (school_n, org_a or UNKNOWN_ADDRESS, None, None)
+                went_to.append((connect_n, school_n, deg_type, subject, graduation))
+
+        cursor = self.connection.cursor()
+        try:
+            _insert_many(cursor, 'Connection', ('Name', 'Address', 'Relation'),
+                         list(connections.values()), 'Name = Name')
+            _insert_many(cursor, 'ConnectionC', ('Name', 'Type', 'Phone_Num', 'Email'),
+                         list(contacts.values()),
+                         'Type = VALUES(Type), Phone_Num = VALUES(Phone_Num), Email = VALUES(Email)')
+            _insert_many(cursor, 'Talked', ('User_N', 'Connect_N', 'Topic', 'Method', 'Start', 'End'),
+                         talked)
+            _insert_many(cursor, 'Last_Contact',
+                         ('User_N', 'Connect_N', 'Last_Start', 'Last_End', 'Last_Topic', 'Last_Method',
+                          'Conversations'),
+                         list(last_contact.values()), LAST_CONTACT_MERGE)
+            _insert_many(cursor, 'Organization', ('Name', 'Address', 'Phone_Num', 'Email'),
+                         list(orgs.values()), 'Name = Name')
+            _insert_many(cursor, 'Company', ('Org_N', 'Org_A', 'Stock', 'Num_Employees', 'Industry'),
+                         list(companies.values()),
+                         'Org_A = VALUES(Org_A), Stock = VALUES(Stock), '
+                         'Num_Employees = VALUES(Num_Employees), Industry = VALUES(Industry)')
+            _insert_many(cursor, 'Worked', ('Name', 'Org_N', 'Start', 'End', 'Role', 'Department', 'Location'),
+                         worked)
+            _insert_many(cursor, 'School', ('Org_N', 'Org_A', 'Enrollment', 'Ranking'),
+                         list(schools.values()), 'Org_A = VALUES(Org_A)')
+            _insert_many(cursor, 'Went_To', ('Name', 'School_N', 'Type', 'Subject', 'Graduation'),
+                         went_to)
+            cursor.execute("CALL Bump_Table_Versions(%s)", (','.join(BUMPED_TABLES),))
+            self.connection.commit()
+        except Error:
+            self.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        self.seen_connections.update(connections)
+        self.seen_orgs.update(orgs)
+
+    def _write_rows_individually(self, numbered_rows):
+        """Slow path: replay a failed chunk through the stored procedure, row by row."""
+        cursor = self.connection.cursor()
+        imported = 0
+        try:
+            for line, params in numbered_rows:
+                cursor.execute("SAVEPOINT import_row")
+                try:
+                    cursor.execute(
+                        "CALL Add_Connection_By_Talking(" + ','.join(['%s'] * len(FIELDS)) + ")",
+                        params,
+                    )
+                    cursor.fetchall()
+                except Error as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT import_row")
+                    self.report.add_error(line, e.msg)
+                    continue
+                imported += 1
+                self.seen_connections.add(params[1])
+                for org in (params[10], params[20]):
+                    if org is not None:
+                        self.seen_orgs.add(org)
+            self.connection.commit()
+        except Error:
+            self.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+        return imported
+
+    def _flush(self, numbered_rows):
+        if not numbered_rows:
+            return
+        try:
+            self._write_chunk([params for _line, params in numbered_rows])
+            imported = len(numbered_rows)
+        except Error:
+            imported = self._write_rows_individually(numbered_rows)
+        self.report.rows_imported += imported
+        self.report.chunks += 1
+        if self.progress:
+            self.progress(self.report)
+
+    def run(self, records, known_users):
+        """Validate and import an iterable of (line, record) pairs."""
+        pending = []
+        for line, record in records:
+            self.report.rows_read += 1
+            if isinstance(record, Exception):
+                self.report.add_error(line, str(record))
+                continue
+            try:
+                pending.append((line, validate_row(record, known_users)))
+            except ValueError as e:
+                self.report.add_error(line, str(e))
+                continue
+            if len(pending) >= self.chunk_size:
+                self._flush(pending)
+                pending = []
+        self._flush(pending)
+        return self.report
+
+
+def import_stream(stream, fmt, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Import a CSV/NDJSON binary stream on the request's pooled connection.
+
+    Returns an ImportReport, or None if no database connection is available.
+    """
+    connection = get_db_connection()
+    if not connection:
+        return None
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT Name FROM User")
+    known_users = {name for (name,) in cursor.fetchall()}
+    cursor.close()
+
+    connection.autocommit = False
+    try:
+        importer = BulkImporter(connection, chunk_size, progress)
+        return importer.run(read_records(stream, fmt), known_users)
+    finally:
+        try:
+            connection.autocommit = True
+        except Error:
+            pass
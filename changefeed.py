@@ -0,0 +1,233 @@
+"""
+Row-level change feed over the Change_Log table.
+
+Triggers on every base table append (Seq, Table_Name, Op, Row_Key, Old_Key)
+in the same transaction as the change, so a committed write always has its
+log rows. ChangeFeed tails the log from a checkpoint:
+
+    feed = ChangeFeed(checkpoint=saved_seq)
+    for change in feed.poll():
+        ...
+    saved_seq = feed.checkpoint
+
+Seq values come from AUTO_INCREMENT, which is assigned at insert time, not
+commit time: a long transaction can commit rows below a Seq that was already
+read. The feed therefore delivers rows as soon as they are visible, but only
+moves the checkpoint past a missing Seq once it has been missing for
+CHANGE_FEED_GAP_TIMEOUT seconds (after that it is taken to be a rolled-back
+insert). Delivery is at-least-once across restarts, so handlers should be
+idempotent.
+
+With CHANGE_FEED=1 a background thread tails the log for this process from
+the current head and hands each batch to the subscribed in-process caches.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+from mysql.connector import Error
+
+import db
+
+CHANGE_FEED = os.getenv('CHANGE_FEED', '0') == '1'
+# Seconds between polls of Change_Log by the background thread.
+CHANGE_FEED_INTERVAL = float(os.getenv('CHANGE_FEED_INTERVAL', 1))
+CHANGE_FEED_BATCH = int(os.getenv('CHANGE_FEED_BATCH', 1000))
+# Seconds a missing Seq is waited for before it is assumed rolled back.
+CHANGE_FEED_GAP_TIMEOUT = float(os.getenv('CHANGE_FEED_GAP_TIMEOUT', 30))
+
+logger = logging.getLogger('network_assistant.change_feed')
+
+Change = namedtuple('Change', 'seq table op key old_key changed_at')
+
+INSERT, UPDATE, DELETE = 'I', 'U', 'D'
+
+_SELECT = "SELECT Seq, Table_Name, Op, Row_Key, Old_Key, Changed_At FROM Change_Log"
+
+
+def _json(value):
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode('utf-8')
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def head():
+    """Highest Seq in the log right now (0 if it is empty)."""
+    connection = db.pool.acquire()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT COALESCE(MAX(Seq), 0) FROM Change_Log")
+        (seq,) = cursor.fetchone()
+        cursor.close()
+        return int(seq)
+    finally:
+        db.pool.release(connection)
+
+
+class ChangeFeed:
+    """
+    Reads Change_Log in Seq order from `checkpoint` (every Seq at or below it
+    has been delivered or given up on). Optionally restricted to `tables`.
+    """
+
+    def __init__(self, checkpoint=0, tables=None, batch_size=CHANGE_FEED_BATCH,
+                 gap_timeout=CHANGE_FEED_GAP_TIMEOUT):
+        self.checkpoint = checkpoint
+        self.tables = frozenset(tables) if tables else None
+        self.batch_size = batch_size
+        self.gap_timeout = gap_timeout
+        # Seq -> when it was first read, for rows delivered above the checkpoint.
+        self._seen = {}
+        self.delivered = 0
+
+    def _fetch(self, cursor, sql, params):
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    def poll(self, connection=None):
+        """
+        Changes committed since the last poll, oldest first. Uses a pooled
+        connection unless one is given. Raises mysql.connector.Error.
+        """
+        owned = connection is None
+        if owned:
+            connection = db.pool.acquire()
+        try:
+            cursor = connection.cursor()
+            rows = []
+            high = max(self._seen, default=self.checkpoint)
+            if high > self.checkpoint:
+                # Late commits inside the window we already read past.
+                rows += self._fetch(cursor, _SELECT + " WHERE Seq > %s AND Seq < %s ORDER BY Seq",
+                                    (self.checkpoint, high))
+            rows += self._fetch(cursor, _SELECT + " WHERE Seq > %s ORDER BY Seq LIMIT %s",
+                                (high, self.batch_size))
+            cursor.close()
+        finally:
+            if owned:
+                db.pool.release(connection)
+
+        now = time.monotonic()
+        changes = []
+        for seq, table, op, key, old_key, changed_at in rows:
+            if seq in self._seen:
+                continue
+            self._seen[seq] = now
+            if self.tables is None or table in self.tables:
+                changes.append(Change(seq, table, op, _json(key), _json(old_key), changed_at))
+        changes.sort()
+        self.delivered += len(changes)
+        self._advance(now)
+        return changes
+
+    def _advance(self, now):
+        while self._seen:
+            lowest = min(self._seen)
+            if lowest > self.checkpoint + 1:
+                # The missing Seqs have been known to be missing since the
+                # first row above them was read.
+                if now - min(self._seen.values()) < self.gap_timeout:
+                    return
+                self.checkpoint = lowest - 1
+            del self._seen[lowest]
+            self.checkpoint = lowest
+
+    def stats(self):
+        return {'checkpoint': self.checkpoint, 'pending': len(self._seen), 'delivered': self.delivered}
+
+
+class ChangeDispatcher:
+    """Tails the log for this process and fans batches out to subscribers."""
+
+    def __init__(self, interval=CHANGE_FEED_INTERVAL):
+        self.interval = interval
+        self.feed = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._app = None
+
+    @property
+    def enabled(self):
+        """Whether changes are being delivered; False again if the thread has died."""
+        return self.feed is not None and self._thread is not None and self._thread.is_alive()
+
+    def subscribe(self, listener, tables=None, on_error=None):
+        """
+        Call listener(changes) with each batch of changes to `tables` (all
+        tables if None). If the listener raises, the batch is lost to it and
+        on_error() is called so it can fall back to a full reload.
+        """
+        with self._lock:
+            self._listeners.append((listener, frozenset(tables) if tables else None, on_error))
+
+    def init_app(self, app):
+        if not CHANGE_FEED or self._thread is not None:
+            return
+        self._app = app
+        try:
+            start = head()
+        except Error as e:
+            print(f"Change feed disabled, could not read Change_Log: {e}")
+            return
+        self.feed = ChangeFeed(checkpoint=start)
+        self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+        self._thread.start()
+
+    def dispatch(self, changes):
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener, tables, on_error in listeners:
+            batch = [change for change in changes if tables is None or change.table in tables]
+            if not batch:
+                continue
+            try:
+                listener(batch)
+            except Exception:
+                logger.exception("Change feed listener %r failed", listener)
+                if on_error is not None:
+                    on_error()
+
+    def _run(self):
+        while True:
+            try:
+                changes = self.feed.poll()
+                if changes:
+                    with self._app.app_context():
+                        self.dispatch(changes)
+                if len(changes) >= self.feed.batch_size:
+                    continue
+            except Error as e:
+                print(f"Error reading change feed: {e}")
+            except Exception:
+                # Keep tailing; a dead thread would leave subscribers stale.
+                logger.exception("Unexpected change feed error")
+            time.sleep(self.interval)
+
+    def stats(self):
+        return self.feed.stats() if self.feed else {}
+
+
+change_feed = ChangeDispatcher()
+
+
+def prune(before, batch_size=10000):
+    """Delete log rows older than `before` (a datetime) in batches; returns the count."""
+    deleted = 0
+    connection = db.pool.acquire()
+    try:
+        cursor = connection.cursor()
+        while True:
+            cursor.execute("DELETE FROM Change_Log WHERE Changed_At < %s LIMIT %s", (before, batch_size))
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                break
+        cursor.close()
+    finally:
+        db.pool.release(connection)
+    return deleted
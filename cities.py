@@ -0,0 +1,8 @@
+"""Match modes for the city lookup routes."""
+
+CITY_MATCH_MODES = ('exact', 'substring')
+
+
+def city_match_mode(value):
+    """Normalize a ?match= argument; anything unknown means an exact city lookup."""
+    return value if value in CITY_MATCH_MODES else 'exact'
@@ -0,0 +1,224 @@
+"""
+Bulk delete and merge of connections.
+
+Delete_Connection removes one connection per call and sweeps orphaned
+organizations every time. Here a whole set of connections (named, or
+selected by a filter) is removed with set-based DELETEs, one transaction
+per chunk of names, and the orphan-organization sweep runs once at the end.
+Merging re-points a set of duplicate contacts' history at one canonical
+connection before deleting the duplicates the same way.
+"""
+from datetime import datetime, timedelta
+
+from mysql.connector import Error
+
+from db import get_db_connection
+from pagination import filter_conditions
+from table_versions import PROCEDURE_WRITES
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Equality filters for selecting connections, as on the connections list/export.
+CLEANUP_FILTERS = {'relation': 'c.Relation', 'city': 'c.City'}
+
+# Child tables first (Talked and ConnectionC reference Connection); each entry
+# is (table, name column, key in the report) matching Delete_Connection's summary.
+DELETE_STEPS = (
+    ('Talked', 'Connect_N', 'TalkedDeleted'),
+    ('Last_Contact', 'Connect_N', None),
+    ('Worked', 'Name', 'WorkedDeleted'),
+    ('Went_To', 'Name', 'WentToDeleted'),
+    ('ConnectionC', 'Name', 'ConnectionCDeleted'),
+    ('Connection', 'Name', 'ConnectionDeleted'),
+)
+
+# Same sweep as the end of Delete_Connection.
+ORPHAN_ORGS_SQL = """
+    DELETE O
+    FROM Organization O
+    LEFT JOIN Worked W      ON W.Org_N = O.Name
+    LEFT JOIN Company Co    ON Co.Org_N = O.Name
+    LEFT JOIN School Sc     ON Sc.Org_N = O.Name
+    LEFT JOIN Went_To WT    ON WT.School_N = O.Name
+    WHERE W.Org_N IS NULL
+      AND Co.Org_N IS NULL
+      AND Sc.Org_N IS NULL
+      AND WT.School_N IS NULL
+"""
+
+BUMPED_TABLES = PROCEDURE_WRITES['Delete_Connection']
+
+
+class CleanupReport:
+    """Per-table counts summed over every chunk, keyed like Delete_Connection's summary."""
+
+    def __init__(self):
+        self.counts = {key: 0 for _table, _column, key in DELETE_STEPS if key}
+        self.organizations_deleted = 0
+        self.rows_moved = 0
+        self.connections = 0
+        self.chunks = 0
+
+    def as_dict(self):
+        return {
+            **self.counts,
+            'TotalDeleted': sum(self.counts.values()),
+            'OrganizationsDeleted': self.organizations_deleted,
+            'RowsMoved': self.rows_moved,
+            'Connections': self.connections,
+            'Chunks': self.chunks,
+        }
+
+
+def _in_list(names):
+    return ', '.join(['%s'] * len(names))
+
+
+def select_connections(args, stale_days=None):
+    """
+    Names of connections matching the CLEANUP_FILTERS in `args` and, if
+    `stale_days` is given, not spoken to by anyone in that many days (the
+    same test as Stale_Contacts: no conversation that ended, or started
+    without a recorded end, since then).
+    Returns None if no filter is active (so an empty form can't select everyone)
+    or if no database connection is available.
+    """
+    conditions, params, _active = filter_conditions(args, CLEANUP_FILTERS)
+    if stale_days:
+        conditions.append("""NOT EXISTS (
+            SELECT 1 FROM Last_Contact lc
+            WHERE lc.Connect_N = c.Name
+              AND lc.Last_Seen >= %s)""")
+        params.append(datetime.now() - timedelta(days=stale_days))
+    if not conditions:
+        return None
+
+    connection = get_db_connection()
+    if not connection:
+        return None
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT c.Name FROM Connection c WHERE " + " AND ".join(conditions) + " ORDER BY c.Name",
+            params,
+        )
+        return [name for (name,) in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+class ConnectionCleanup:
+    """Runs deletes/merges on one connection with autocommit switched off."""
+
+    def __init__(self, connection, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+        self.connection = connection
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.report = CleanupReport()
+
+    def _delete_chunk(self, cursor, names):
+        placeholders = _in_list(names)
+        for table, column, key in DELETE_STEPS:
+            cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", names)
+            if key:
+                self.report.counts[key] += cursor.rowcount
+
+    def _merge_chunk(self, cursor, names, into):
+        """Move the duplicates' rows onto `into`; rows that would collide stay behind and are deleted."""
+        placeholders = _in_list(names)
+        params = [into, *names]
+        for table, column in (('Talked', 'Connect_N'), ('Worked', 'Name'), ('Went_To', 'Name')):
+            cursor.execute(f"UPDATE IGNORE {table} SET {column} = %s WHERE {column} IN ({placeholders})", params)
+            self.report.rows_moved += cursor.rowcount
+        # Keep the canonical contact details; borrow a duplicate's if it has none.
+        cursor.execute(
+            f"INSERT IGNORE INTO ConnectionC (Name, Type, Phone_Num, Email) "
+            f"SELECT %s, Type, Phone_Num, Email FROM ConnectionC WHERE Name IN ({placeholders}) "
+            f"ORDER BY Name LIMIT 1",
+            params,
+        )
+
+    def _refresh_summary(self, cursor, into):
+        """Rebuild Last_Contact for every pair involving the canonical connection."""
+        cursor.execute("DELETE FROM Last_Contact WHERE Connect_N = %s", (into,))
+        cursor.execute("""
+            INSERT INTO Last_Contact (User_N, Connect_N, Last_Start, Last_End, Last_Topic, Last_Method, Conversations)
+            SELECT T.User_N, T.Connect_N, T.Start, agg.Last_End, T.Topic, T.Method, agg.Conversations
+            FROM (
+                SELECT User_N, MAX(Start) AS Last_Start, MAX(End) AS Last_End, COUNT(*) AS Conversations
+                FROM Talked
+                WHERE Connect_N = %s
+                GROUP BY User_N
+            ) agg
+            JOIN Talked T
+              ON T.User_N    = agg.User_N
+             AND T.Connect_N = %s
+             AND T.Start     = agg.Last_Start
+        """, (into, into))
+
+    def _bump(self, cursor):
+        cursor.execute("CALL Bump_Table_Versions(%s)", (','.join(BUMPED_TABLES),))
+
+    def run(self, names, into=None):
+        """Delete `names` (merging them into `into` first, if given) chunk by chunk."""
+        names = [name for name in dict.fromkeys(names) if name and name != into]
+        cursor = self.connection.cursor()
+        try:
+            if into is not None:
+                cursor.execute("SELECT COUNT(*) FROM Connection WHERE Name = %s", (into,))
+                if cursor.fetchone()[0] == 0:
+                    raise ValueError(f"Connection '{into}' does not exist.")
+
+            for start in range(0, len(names), self.chunk_size):
+                chunk = names[start:start + self.chunk_size]
+                try:
+                    if into is not None:
+                        self._merge_chunk(cursor, chunk, into)
+                    self._delete_chunk(cursor, chunk)
+                    if into is not None:
+                        # Same transaction, so the summary never lags the moved rows.
+                        self._refresh_summary(cursor, into)
+                    # Bump with the chunk, so a failure in a later chunk can't
+                    # leave committed deletes behind unchanged versions.
+                    self._bump(cursor)
+                    self.connection.commit()
+                except Error:
+                    self.connection.rollback()
+                    raise
+                self.report.connections += len(chunk)
+                self.report.chunks += 1
+                if self.progress:
+                    self.progress(self.report)
+
+            try:
+                cursor.execute(ORPHAN_ORGS_SQL)
+                self.report.organizations_deleted = cursor.rowcount
+                self._bump(cursor)
+                self.connection.commit()
+            except Error:
+                self.connection.rollback()
+                raise
+        finally:
+            cursor.close()
+        return self.report
+
+
+def cleanup_connections(names, into=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Delete (or merge into `into`) the given connections on the request's
+    pooled connection. Returns a CleanupReport, or None if no database
+    connection is available. Raises ValueError if `into` does not exist and
+    mysql.connector.Error if a chunk fails (earlier chunks stay committed).
+    """
+    connection = get_db_connection()
+    if not connection:
+        return None
+
+    connection.autocommit = False
+    try:
+        return ConnectionCleanup(connection, chunk_size, progress).run(names, into)
+    finally:
+        try:
+            connection.autocommit = True
+        except Error:
+            pass
@@ -0,0 +1,66 @@
+"""On-the-fly gzip/brotli compression of HTML, JSON and text responses."""
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this many bytes are sent uncompressed.
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_LEVEL = 6
+# Brotli quality for dynamic responses; 4-5 compresses better than gzip -6
+# at about the same speed (the 11 used for static assets is far too slow here).
+BROTLI_QUALITY = 4
+
+COMPRESS_MIMETYPES = {
+    'text/html',
+    'text/plain',
+    'text/csv',
+    'text/css',
+    'application/json',
+    'application/javascript',
+    'application/x-ndjson',
+}
+
+
+def accepted_encoding():
+    """The best encoding this client accepts that we can produce, or None."""
+    if brotli is not None and request.accept_encodings['br'] > 0:
+        return 'br'
+    if request.accept_encodings['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding, level=None):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY if level is None else level)
+    return gzip.compress(body, compresslevel=COMPRESS_LEVEL if level is None else level)
+
+
+def compress_response(response):
+    """Compress a buffered response in place if it is large enough and the client accepts it."""
+    if (response.mimetype not in COMPRESS_MIMETYPES
+            or response.status_code != 200
+            or response.is_streamed
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = accepted_encoding()
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_app(app):
+    app.after_request(compress_response)
@@ -0,0 +1,140 @@
+"""Conditional GET (ETag / Last-Modified / 304) for pages keyed on table versions."""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, make_response, request, session
+
+import db
+import metrics
+from assets import asset_pipeline
+from table_versions import table_versions
+
+# Rendered bodies kept per worker for routes declared with cache_body=True;
+# 0 disables body caching (ETags and 304s still work).
+PAGE_CACHE_SIZE = int(os.getenv('PAGE_CACHE_SIZE', 128))
+
+_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+
+def _template_salt():
+    """Changes whenever a template does, so a deploy never gets a stale 304."""
+    latest = 0.0
+    for root, _dirs, files in os.walk(_TEMPLATE_DIR):
+        for name in files:
+            latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+    return f'{latest:.0f}'
+
+
+TEMPLATE_SALT = _template_salt()
+
+
+def _salt():
+    """Template salt plus the asset fingerprints, since pages embed the fingerprinted URLs."""
+    return f'{TEMPLATE_SALT}:{asset_pipeline.version}'
+
+
+class PageCache:
+    """Small LRU of rendered response bodies keyed by URL and table versions."""
+
+    def __init__(self, size=PAGE_CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+page_cache = PageCache()
+
+
+def _etag(versions):
+    digest = hashlib.sha1(
+        f'{_salt()}:{request.endpoint}:{versions}'.encode()
+    ).hexdigest()
+    return digest[:20]
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return int(last_modified) <= request.if_modified_since.timestamp()
+    return False
+
+
+def _stamp(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = int(last_modified)
+    # Let browsers keep the page but revalidate it on every visit.
+    response.cache_control.no_cache = True
+    return response
+
+
+def conditional(*tables, cache_body=False):
+    """
+    Serve a read-only GET route with validators derived from the tables it reads.
+
+    The ETag changes whenever any of `tables` is written (see table_versions),
+    so a matching If-None-Match / If-Modified-Since is answered with 304
+    without running the view. With cache_body=True the rendered page is also
+    kept per URL until one of the tables changes. Requests carrying flashed
+    messages bypass all of this, since those pages differ per visitor.
+    """
+    # A fixed order, so every worker derives the same ETag from the same versions.
+    tables = tuple(sorted(tables))
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            table_versions.sync()
+            versions = table_versions.get(*tables)
+            last_modified = table_versions.last_modified(*tables)
+            etag = _etag(versions)
+
+            # The page gets stamped with these versions, so it must not be
+            # rendered from a replica that may not have the latest write yet.
+            if last_modified is None or time.time() - last_modified < db.REPLICA_STALENESS:
+                db.use_primary()
+
+            if _not_modified(etag, last_modified):
+                return _stamp(Response(status=304), etag, last_modified)
+
+            key = (request.full_path, versions, asset_pipeline.version)
+            if cache_body:
+                cached = page_cache.get(key)
+                if cached is not None:
+                    body, mimetype = cached
+                    return _stamp(Response(body, mimetype=mimetype), etag, last_modified)
+
+            response = make_response(view(*args, **kwargs))
+            # Never let a page rendered around a database error be revalidated
+            # or served from cache.
+            if response.status_code != 200 or metrics.request_had_db_errors():
+                return response
+            if cache_body and not response.is_streamed and not session.get('_flashes'):
+                page_cache.put(key, (response.get_data(), response.mimetype))
+            return _stamp(response, etag, last_modified)
+        return wrapper
+    return decorator
@@ -0,0 +1,577 @@
+"""Database access layer: pooled MySQL connections and query helpers."""
+import itertools
+import os
+import threading
+import time
+import weakref
+from functools import lru_cache
+
+import mysql.connector
+from mysql.connector import Error, InterfaceError, OperationalError
+from flask import g, has_request_context, request, session
+
+import metrics
+from statements import Statement
+
+# Database configuration
+# Note: we do NOT store any passwords in the database itself.
+# For the DB connection, password is optional and only read from an env var if set.
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'database': os.getenv('DB_NAME', 'network_assistant'),
+    'user': os.getenv('DB_USER', 'root'),
+    'port': int(os.getenv('DB_PORT', 3306)),
+}
+
+db_password = os.getenv('DB_PASSWORD')
+if db_password:
+    DB_CONFIG['password'] = db_password
+
+# Connection pool configuration
+POOL_CONFIG = {
+    # Connections kept open between requests
+    'size': int(os.getenv('DB_POOL_SIZE', 5)),
+    # Extra connections allowed under burst load; closed again when returned
+    'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),
+    # Seconds to wait for a free connection before giving up
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+    # Ping idle connections on checkout and replace dead ones
+    'pre_ping': os.getenv('DB_POOL_PRE_PING', '1') != '0',
+}
+
+# Read replicas as a comma-separated list of host or host:port; plain SELECTs
+# go to a healthy replica, CALLs and writes always to DB_CONFIG (the primary).
+DB_REPLICAS = [host.strip() for host in os.getenv('DB_REPLICAS', '').split(',') if host.strip()]
+
+REPLICA_CONFIG = {
+    # Replicas further behind than this many seconds are skipped
+    'max_lag': float(os.getenv('DB_REPLICA_MAX_LAG', 5)),
+    # Seconds between replication-lag checks per replica
+    'check_interval': float(os.getenv('DB_REPLICA_CHECK_INTERVAL', 5)),
+    # Seconds a failed replica is left alone (grows with repeated failures)
+    'retry_after': float(os.getenv('DB_REPLICA_RETRY_AFTER', 10)),
+    # Seconds to wait for a replica connection before reading from the primary
+    'acquire_timeout': float(os.getenv('DB_REPLICA_ACQUIRE_TIMEOUT', 1)),
+}
+
+# Seconds after a client's write during which its reads go to the primary.
+READ_YOUR_WRITES = float(os.getenv('DB_READ_YOUR_WRITES', 10))
+
+# How far behind the primary a replica we still read from can be: the lag
+# limit plus the time until the next lag sample.
+REPLICA_STALENESS = REPLICA_CONFIG['max_lag'] + REPLICA_CONFIG['check_interval']
+
+
+class PoolTimeoutError(Error):
+    """Raised when no pooled connection becomes free within the timeout."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of MySQL connections.
+
+    Keeps up to `size` idle connections; when all are busy, up to
+    `max_overflow` extra connections are opened and closed again on release.
+    Once the limit is reached, callers wait up to `timeout` seconds.
+    """
+
+    # Lifetime totals in stats(); the other keys there are current levels.
+    COUNTERS = ('checkouts', 'waits', 'timeouts', 'created', 'discarded')
+
+    def __init__(self, config, size=5, max_overflow=10, timeout=30.0, pre_ping=True):
+        self.config = dict(config)
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self._cond = threading.Condition()
+        self._idle = []
+        self._open = 0
+        self._in_use = 0
+        self._counters = dict.fromkeys(self.COUNTERS, 0)
+
+    def _connect(self):
+        # consume_results lets a connection be reused after a CALL whose
+        # trailing result sets were not read.
+        connection = mysql.connector.connect(consume_results=True, **self.config)
+        # Ensure stored procedures that perform writes are committed automatically
+        connection.autocommit = True
+        with self._cond:
+            self._counters['created'] += 1
+        return connection
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def acquire(self):
+        """Check out a connection, waiting up to `timeout` seconds for one."""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            waited = False
+            while True:
+                if self._idle:
+                    connection = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    # Reserve a slot; the connection is opened outside the lock.
+                    self._open += 1
+                    connection = None
+                    break
+                if not waited:
+                    self._counters['waits'] += 1
+                    waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        msg=f"No database connection available after {self.timeout}s"
+                    )
+                self._cond.wait(remaining)
+            self._in_use += 1
+            self._counters['checkouts'] += 1
+
+        try:
+            if connection is not None and self.pre_ping and not connection.is_connected():
+                self._close_quietly(connection)
+                with self._cond:
+                    self._counters['discarded'] += 1
+                connection = None
+            if connection is None:
+                connection = self._connect()
+        except Error:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._counters['checkouts'] -= 1
+                self._cond.notify()
+            raise
+        return connection
+
+    def release(self, connection, discard=False):
+        """Return a connection to the pool, closing it if broken or surplus."""
+        if not discard:
+            try:
+                if connection.in_transaction:
+                    connection.rollback()
+            except Error:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            keep = not discard and len(self._idle) < self.size
+            if keep:
+                self._idle.append(connection)
+            else:
+                self._open -= 1
+                if discard:
+                    self._counters['discarded'] += 1
+            self._cond.notify()
+
+        if not keep:
+            self._close_quietly(connection)
+
+    def stats(self):
+        """Snapshot of pool occupancy and lifetime counters."""
+        with self._cond:
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                **self._counters,
+            }
+
+
+pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+
+
+class Replica:
+    """
+    One read replica: its own connection pool plus health and lag tracking.
+
+    A replica that fails to connect or errors mid-query is skipped for
+    `retry_after` seconds, longer after repeated failures. Replication lag
+    is sampled every `check_interval` seconds on a checked-out connection;
+    replicas behind by more than `max_lag` (or not replicating) are skipped
+    until the next sample says otherwise.
+    """
+
+    MAX_BACKOFF = 6
+
+    def __init__(self, name, config, max_lag=5.0, check_interval=5.0,
+                 retry_after=10.0, acquire_timeout=1.0):
+        self.name = name
+        self.pool = ConnectionPool(config, **{**POOL_CONFIG, 'timeout': acquire_timeout})
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._down_until = 0.0
+        self._next_check = 0.0
+        self.lag = None
+        self._counters = {'reads': 0, 'failures': 0, 'lagging': 0}
+
+    def available(self):
+        with self._lock:
+            return time.monotonic() >= self._down_until
+
+    def mark_failed(self):
+        with self._lock:
+            self._failures += 1
+            self._counters['failures'] += 1
+            backoff = self.retry_after * min(self._failures, self.MAX_BACKOFF)
+            self._down_until = time.monotonic() + backoff
+            # Re-check lag as soon as it comes back.
+            self._next_check = 0.0
+
+    def _check_due(self):
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_check:
+                return False
+            self._next_check = now + self.check_interval
+            return True
+
+    @staticmethod
+    def _measure_lag(connection):
+        """Seconds behind the primary; None if replication is stopped."""
+        cursor = connection.cursor(dictionary=True)
+        try:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except Error:
+                # MySQL < 8.0.22 and MariaDB
+                cursor.execute("SHOW SLAVE STATUS")
+            row = cursor.fetchone()
+            cursor.fetchall()
+        finally:
+            cursor.close()
+        if row is None:
+            # Not configured as a replica (e.g. a read-only proxy): no lag to speak of.
+            return 0.0
+        lag = row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+        return float(lag) if lag is not None else None
+
+    def checkout(self):
+        """A connection if this replica is usable right now, else None."""
+        if not self.available():
+            return None
+        try:
+            connection = self.pool.acquire()
+        except Error as e:
+            print(f"Error connecting to replica {self.name}: {e}")
+            self.mark_failed()
+            return None
+
+        if self._check_due():
+            try:
+                lag = self._measure_lag(connection)
+            except Error as e:
+                print(f"Error checking replica {self.name}: {e}")
+                self.pool.release(connection, discard=True)
+                self.mark_failed()
+                return None
+            with self._lock:
+                self.lag = lag
+                self._failures = 0
+
+        with self._lock:
+            fresh = self.lag is not None and self.lag <= self.max_lag
+            self._counters['reads' if fresh else 'lagging'] += 1
+        if not fresh:
+            self.pool.release(connection)
+            return None
+        return connection
+
+    def stats(self):
+        with self._lock:
+            health = {
+                'available': time.monotonic() >= self._down_until,
+                'lag': self.lag,
+                'consecutive_failures': self._failures,
+                **self._counters,
+            }
+        return {**health, 'pool': self.pool.stats()}
+
+
+def _replica_config(endpoint):
+    host, _sep, port = endpoint.partition(':')
+    return {**DB_CONFIG, 'host': host, 'port': int(port) if port else DB_CONFIG['port']}
+
+
+replicas = [Replica(endpoint, _replica_config(endpoint), **REPLICA_CONFIG) for endpoint in DB_REPLICAS]
+_replica_turn = itertools.count()
+
+
+def checkout_replica():
+    """(replica, connection) from the next usable replica in turn, or (None, None)."""
+    if not replicas:
+        return None, None
+    start = next(_replica_turn)
+    for offset in range(len(replicas)):
+        replica = replicas[(start + offset) % len(replicas)]
+        connection = replica.checkout()
+        if connection is not None:
+            return replica, connection
+    return None, None
+
+
+def replica_stats():
+    return {replica.name: replica.stats() for replica in replicas}
+
+
+STICKY_SESSION_KEY = '_db_primary_until'
+
+
+def use_primary():
+    """Send the rest of this request's reads to the primary."""
+    g.db_primary_only = True
+
+
+def _reads_use_primary():
+    if not replicas or g.get('db_primary_only'):
+        return True
+    # Read-your-writes: a client that just wrote keeps reading from the primary.
+    return has_request_context() and session.get(STICKY_SESSION_KEY, 0) > time.time()
+
+
+@lru_cache(maxsize=512)
+def _replica_safe(query):
+    """Plain SELECTs only; locking reads and everything else need the primary."""
+    if metrics.statement_label(query) not in ('select', 'with'):
+        return False
+    upper = query.upper()
+    return 'FOR UPDATE' not in upper and 'LOCK IN SHARE MODE' not in upper and 'FOR SHARE' not in upper
+
+
+def get_db_connection():
+    """Return the pooled connection bound to the current request"""
+    connection = g.get('db_connection')
+    if connection is None:
+        started = time.perf_counter()
+        try:
+            connection = pool.acquire()
+        except Error as e:
+            metrics.observe_acquire(time.perf_counter() - started, ok=False)
+            print(f"Error connecting to MySQL: {e}")
+            return None
+        metrics.observe_acquire(time.perf_counter() - started)
+        g.db_connection = connection
+    return connection
+
+
+def get_read_connection():
+    """
+    Connection for a plain SELECT: the request's replica connection if reads
+    may go to a replica and one is healthy and current, else the primary's.
+    """
+    if _reads_use_primary():
+        return get_db_connection()
+    connection = g.get('db_read_connection')
+    if connection is None:
+        replica, connection = checkout_replica()
+        if connection is None:
+            return get_db_connection()
+        g.db_read_connection = connection
+        g.db_read_replica = replica
+    return connection
+
+
+def checkout_read_connection():
+    """
+    (pool, connection) for a read that outlives the request's connections,
+    such as a streamed export; the caller releases it to that pool.
+    Raises Error if neither a replica nor the primary is available.
+    """
+    if not _reads_use_primary():
+        replica, connection = checkout_replica()
+        if connection is not None:
+            return replica.pool, connection
+    return pool, pool.acquire()
+
+
+def release_db_connection(exc=None):
+    """Hand the request's connections back to their pools (app context teardown)."""
+    connection = g.pop('db_connection', None)
+    if connection is not None:
+        pool.release(connection)
+    connection = g.pop('db_read_connection', None)
+    if connection is not None:
+        g.pop('db_read_replica').pool.release(connection)
+
+
+def _discard_db_connection(connection):
+    """
+    Drop a connection that failed mid-request so the next query gets a fresh
+    one. Returns True if it was a replica connection (the replica is marked
+    unhealthy).
+    """
+    if g.get('db_read_connection') is connection:
+        g.pop('db_read_connection')
+        replica = g.pop('db_read_replica')
+        replica.pool.release(connection, discard=True)
+        replica.mark_failed()
+        return True
+    if g.get('db_connection') is connection:
+        g.pop('db_connection')
+    pool.release(connection, discard=True)
+    return False
+
+
+# Prepared cursors per pooled connection, keyed by statement name; entries
+# go away with their connection.
+_prepared_cursors = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+_statement_counters = {'prepared': 0, 'executed': 0}
+
+
+def _prepared_cursor(connection, statement):
+    with _prepared_lock:
+        cursors = _prepared_cursors.get(connection)
+        if cursors is None:
+            cursors = _prepared_cursors[connection] = {}
+        cursor = cursors.get(statement.name)
+        if cursor is None:
+            # Connector/Python prepares on the first execute and reuses the
+            # handle while the same SQL string is passed back in.
+            cursor = cursors[statement.name] = connection.cursor(prepared=True)
+            _statement_counters['prepared'] += 1
+        _statement_counters['executed'] += 1
+    return cursor
+
+
+def _forget_prepared(connection, statement):
+    with _prepared_lock:
+        cursor = _prepared_cursors.get(connection, {}).pop(statement.name, None)
+    if cursor is not None:
+        try:
+            cursor.close()
+        except Error:
+            pass
+
+
+def statement_stats():
+    """How many statements were prepared and how many executions reused them."""
+    with _prepared_lock:
+        return dict(_statement_counters)
+
+
+def _execute_prepared(connection, statement, params, fetch, columns):
+    cursor = _prepared_cursor(connection, statement)
+    cursor.execute(statement.sql, tuple(params or ()))
+    if not fetch:
+        connection.commit()
+        return cursor.rowcount
+    rows = cursor.fetchall()
+    names = cursor.column_names
+    if columns:
+        return names, rows
+    return [dict(zip(names, row)) for row in rows]
+
+
+def execute_query(query, params=None, fetch=True, primary=False, columns=False):
+    """
+    Execute a query (or CALL) and return results.
+
+    `query` is SQL text or a registered Statement (see statements.py); the
+    latter runs as a server-side prepared statement on this connection.
+    Plain SELECTs are served by a read replica when one is configured and
+    current; pass primary=True for reads that must see the latest writes.
+    With columns=True rows come back as plain tuples alongside the column
+    names, as (columns, rows), which skips building a dict for every row.
+    """
+    statement = query if isinstance(query, Statement) else None
+    sql = statement.sql if statement else query
+    read = fetch and not primary and _replica_safe(sql)
+    connection = get_read_connection() if read else get_db_connection()
+    if not connection:
+        return None
+
+    started = time.perf_counter()
+    try:
+        if statement is not None and statement.prepare:
+            results = _execute_prepared(connection, statement, params, fetch, columns)
+        else:
+            cursor = connection.cursor(dictionary=not columns)
+            try:
+                cursor.execute(sql, params or ())
+
+                if fetch:
+                    # For stored procedures that end with SELECT we want all rows.
+                    results = cursor.fetchall()
+                    if columns:
+                        results = (cursor.column_names, results)
+                else:
+                    connection.commit()
+                    results = cursor.rowcount
+            finally:
+                cursor.close()
+        metrics.observe_query(sql, params, time.perf_counter() - started,
+                              rows=len(results[1] if columns else results) if fetch else None)
+        return results
+    except Error as e:
+        metrics.observe_query(sql, params, time.perf_counter() - started, error=True)
+        print(f"Error executing query: {e}")
+        if statement is not None:
+            _forget_prepared(connection, statement)
+        if isinstance(e, (InterfaceError, OperationalError)):
+            if _discard_db_connection(connection):
+                # The replica went away; the primary can still answer.
+                return execute_query(query, params, fetch, primary=True, columns=columns)
+        return None
+
+
+def execute_result_sets(query, params=None):
+    """
+    Execute a CALL that returns several result sets and return all of them.
+
+    The result is a list with one list of row dicts per SELECT the procedure
+    ran, in order, or None on error. The statement goes to the server once and
+    every result is read off the wire before returning, so the connection is
+    left clean for the next query.
+    """
+    if isinstance(query, Statement):
+        query = query.sql
+    connection = get_db_connection()
+    if not connection:
+        return None
+
+    started = time.perf_counter()
+    try:
+        cursor = connection.cursor(dictionary=True)
+        try:
+            result_sets = []
+            # multi=True yields once per result; the CALL's trailing status
+            # result carries no rows and is skipped.
+            for result in cursor.execute(query, params or (), multi=True):
+                if result.with_rows:
+                    result_sets.append(result.fetchall())
+        finally:
+            cursor.close()
+        metrics.observe_query(query, params, time.perf_counter() - started,
+                              rows=sum(len(rows) for rows in result_sets))
+        return result_sets
+    except Error as e:
+        metrics.observe_query(query, params, time.perf_counter() - started, error=True)
+        print(f"Error executing query: {e}")
+        if isinstance(e, (InterfaceError, OperationalError)):
+            _discard_db_connection(connection)
+        return None
+
+
+def _stick_to_primary(response):
+    if replicas and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        session[STICKY_SESSION_KEY] = time.time() + READ_YOUR_WRITES
+    return response
+
+
+def init_app(app):
+    """Register the per-request connection teardown and read-your-writes tracking."""
+    app.teardown_appcontext(release_db_connection)
+    app.after_request(_stick_to_primary)
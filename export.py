@@ -0,0 +1,208 @@
+"""Streaming CSV / NDJSON exports backed by unbuffered server-side cursors."""
+import csv
+import io
+import json
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from mysql.connector import Error
+
+import metrics
+from pagination import filter_conditions
+
+FETCH_SIZE = 500
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Explicit column lists keep the export schema stable and let the header go
+# out before the query has produced its first row.
+EXPORTS = {
+    'conversations': {
+        'columns': (
+            ('t.User_N', 'User_N'), ('t.Connect_N', 'Connect_N'), ('c.Relation', 'Relation'),
+            ('t.Topic', 'Topic'), ('t.Method', 'Method'), ('t.Start', 'Start'), ('t.End', 'End'),
+        ),
+        'from': """
+            FROM Talked t
+            JOIN Connection c ON t.Connect_N = c.Name
+        """,
+        'order_by': "t.Start DESC, t.User_N DESC, t.Connect_N DESC",
+        'filters': {'user_n': 't.User_N', 'connect_n': 't.Connect_N'},
+    },
+    'work-experience': {
+        'columns': (
+            ('w.Name', 'Name'), ('w.Org_N', 'Org_N'), ('w.OrgAddress', 'OrgAddress'),
+            ('w.Role', 'Role'), ('w.Department', 'Department'), ('w.Location', 'Location'),
+            ('w.Start', 'Start'), ('w.End', 'End'),
+            ('w.Industry', 'Industry'), ('w.Stock', 'Stock'), ('w.Num_Employees', 'Num_Employees'),
+        ),
+        'from': "FROM Work_View w",
+        'order_by': "w.Start DESC, w.Name DESC, w.Org_N DESC",
+        'filters': {'name': 'w.Name', 'org_n': 'w.Org_N'},
+    },
+    'education': {
+        'columns': (
+            ('wt.Name', 'Name'), ('wt.PersonType', 'PersonType'),
+            ('wt.School_N', 'School_N'), ('wt.SchoolAddress', 'SchoolAddress'),
+            ('wt.Type', 'Type'), ('wt.Subject', 'Subject'), ('wt.Graduation', 'Graduation'),
+        ),
+        'from': "FROM Education_View wt",
+        'order_by': "wt.Graduation DESC, wt.Name DESC, wt.School_N DESC",
+        'filters': {'name': 'wt.Name', 'school_n': 'wt.School_N'},
+    },
+    'connections': {
+        'columns': (
+            ('c.Name', 'Name'), ('c.Address', 'Address'), ('c.City', 'City'), ('c.Relation', 'Relation'),
+            ('cc.Type', 'Type'), ('cc.Phone_Num', 'Phone_Num'), ('cc.Email', 'Email'),
+        ),
+        'from': """
+            FROM Connection c
+            LEFT JOIN ConnectionC cc ON c.Name = cc.Name
+        """,
+        'order_by': "c.Name",
+        'filters': {'relation': 'c.Relation', 'city': 'c.City'},
+    },
+    'users': {
+        'columns': (
+            ('u.Name', 'Name'), ('u.Address', 'Address'),
+            ('uc.Type', 'Type'), ('uc.Phone_Num', 'Phone_Num'), ('uc.Email', 'Email'),
+        ),
+        'from': """
+            FROM User u
+            LEFT JOIN UserC uc ON u.Name = uc.Name
+        """,
+        'order_by': "u.Name",
+        'filters': {'type': 'uc.Type'},
+    },
+    'companies': {
+        'columns': (
+            ('o.Name', 'Name'), ('o.Address', 'Address'), ('o.Phone_Num', 'Phone_Num'), ('o.Email', 'Email'),
+            ('c.Industry', 'Industry'), ('c.Stock', 'Stock'), ('c.Num_Employees', 'Num_Employees'),
+        ),
+        'from': """
+            FROM Organization o
+            JOIN Company c ON o.Name = c.Org_N AND o.Address = c.Org_A
+        """,
+        'order_by': "o.Name",
+        'filters': {'industry': 'c.Industry'},
+    },
+    'schools': {
+        'columns': (
+            ('o.Name', 'Name'), ('o.Address', 'Address'), ('o.Phone_Num', 'Phone_Num'), ('o.Email', 'Email'),
+            ('s.Enrollment', 'Enrollment'), ('s.Ranking', 'Ranking'),
+        ),
+        'from': """
+            FROM Organization o
+            JOIN School s ON o.Name = s.Org_N AND o.Address = s.Org_A
+        """,
+        'order_by': "o.Name",
+        'filters': {},
+    },
+    'applications': {
+        'columns': (
+            ('m.User_N', 'User_N'), ('m.Job', 'Job'), ('m.Posted', 'Posted'), ('m.Start', 'Start'),
+            ('m.Complete', 'Complete'), ('m.Resume', 'Resume'), ('m.Cover_L', 'Cover_L'),
+            ('m.Recruiter', 'Recruiter'),
+        ),
+        'from': "FROM Makes m",
+        'order_by': "m.Posted DESC, m.User_N DESC, m.Job DESC",
+        'filters': {'user_n': 'm.User_N'},
+    },
+}
+
+
+def build_query(entity, args):
+    """SQL, params and column names for an export, honouring the entity's filters."""
+    spec = EXPORTS[entity]
+    conditions, params, _active = filter_conditions(args, spec['filters'])
+    select = ', '.join(f"{expr} AS {alias}" for expr, alias in spec['columns'])
+    sql = f"SELECT {select}\n{spec['from']}"
+    if conditions:
+        sql += "\nWHERE " + "\n  AND ".join(conditions)
+    sql += f"\nORDER BY {spec['order_by']}"
+    return sql, params, [alias for _expr, alias in spec['columns']]
+
+
+def json_default(value):
+    """JSON encoding for the MySQL column types json can't handle; shared with the API."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, timedelta):
+        # MySQL TIME columns
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _csv_line(values):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+class ExportStream:
+    """
+    Response body for one export.
+
+    Owns a pooled connection (primary or replica) from the moment the route
+    checks it out: rows are pulled FETCH_SIZE at a time from an unbuffered
+    cursor, so memory stays flat however large the export. The connection goes back to the
+    pool when the body is exhausted, or is dropped if the client goes away
+    mid-stream (its unread rows are still on the wire).
+    """
+
+    def __init__(self, pool, connection, sql, params, columns, fmt):
+        self.pool = pool
+        self.connection = connection
+        self.sql = sql
+        self.params = tuple(params)
+        self.columns = columns
+        self.fmt = fmt
+
+    def _release(self, discard):
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            self.pool.release(connection, discard=discard)
+
+    def close(self):
+        self._release(discard=True)
+
+    def __iter__(self):
+        if self.fmt == 'csv':
+            yield _csv_line(self.columns)
+
+        finished = False
+        started = time.perf_counter()
+        rows = 0
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(self.sql, self.params)
+            while True:
+                batch = cursor.fetchmany(FETCH_SIZE)
+                if not batch:
+                    break
+                rows += len(batch)
+                if self.fmt == 'csv':
+                    buffer = io.StringIO()
+                    csv.writer(buffer).writerows(batch)
+                    yield buffer.getvalue()
+                else:
+                    yield ''.join(
+                        json.dumps(dict(zip(self.columns, row)), default=json_default) + '\n'
+                        for row in batch
+                    )
+            cursor.close()
+            finished = True
+        except Error as e:
+            metrics.observe_query(self.sql, self.params, time.perf_counter() - started, error=True)
+            print(f"Error streaming export: {e}")
+            raise
+        finally:
+            self._release(discard=not finished)
+
+        metrics.observe_query(self.sql, self.params, time.perf_counter() - started, rows=rows)
@@ -0,0 +1,27 @@
+"""Form input helpers shared by the routes and the bulk importer."""
+
+
+def opt(value):
+    """Helper: return None for empty strings so stored procedures see NULL."""
+    if value is None:
+        return None
+    value = value.strip()
+    return value if value != "" else None
+
+
+def normalize_dt(value):
+    """
+    Accept datetime-local strings (YYYY-MM-DDTHH:MM[:SS]) and
+    convert them into MySQL-friendly 'YYYY-MM-DD HH:MM:SS'.
+    """
+    value = opt(value)
+    if not value:
+        return None
+    if value.endswith('Z'):
+        value = value[:-1]
+    if 'T' in value:
+        value = value.replace('T', ' ')
+    # datetime-local often omits seconds; pad if we only have YYYY-MM-DD HH:MM
+    if len(value) == 16:
+        value = f"{value}:00"
+    return value
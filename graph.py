@@ -0,0 +1,462 @@
+"""
+In-memory relationship graph for warm-introduction paths.
+
+People (users and connections) and organizations (employers and schools)
+are nodes with small integer ids. Each node's neighbours live in a compact
+array('i') with a parallel array('b') of edge kinds, so the whole graph is
+a handful of flat arrays rather than nested dicts:
+
+    person --KNOWS-- person        a user has talked to a connection (Last_Contact)
+    person --WORKS/WORKED-- org    Worked, current (no end date) or past
+    person --STUDIED-- org         Went_To
+
+An introduction path starts with one of the user's own contacts and moves
+person to person through a shared organization or a KNOWS edge, ending at
+someone who is (or was) at the target organization.
+
+Writes made through this process are applied incrementally by the write
+routes; writes seen only through table_versions.sync() (another worker, the
+bulk import) mark the graph stale, and it is rebuilt in the background while
+the previous copy keeps answering. With the change feed on (CHANGE_FEED=1)
+those writes arrive row by row instead and are applied incrementally too;
+only deletes and updates of job/school rows still force a rebuild.
+"""
+import os
+import threading
+import time
+from array import array
+
+from changefeed import DELETE, INSERT, change_feed
+from db import execute_query
+from statements import Statement
+from table_versions import table_versions
+
+# Default and maximum number of person-to-person hops in a path.
+INTRO_MAX_HOPS = int(os.getenv('INTRO_MAX_HOPS', 3))
+INTRO_HOPS_LIMIT = 5
+
+# Milliseconds a path search may run before returning what it has.
+INTRO_BUDGET_MS = float(os.getenv('INTRO_BUDGET_MS', 200))
+
+GRAPH_TABLES = frozenset(('User', 'Connection', 'Worked', 'Went_To', 'Last_Contact'))
+
+# Full-table loads for a rebuild; read as tuples, not dicts.
+LOAD_USERS = Statement('graph_users', "SELECT Name FROM User")
+LOAD_CONNECTIONS = Statement('graph_connections', "SELECT Name FROM Connection")
+LOAD_CONTACTS = Statement('graph_contacts', "SELECT User_N, Connect_N FROM Last_Contact")
+LOAD_JOBS = Statement('graph_jobs', "SELECT Name, Org_N, End FROM Worked")
+LOAD_SCHOOLS = Statement('graph_schools', "SELECT Name, School_N FROM Went_To")
+
+PERSON, ORG, REMOVED = 0, 1, -1
+KNOWS, WORKS, WORKED, STUDIED = 0, 1, 2, 3
+
+EDGE_LABELS = {KNOWS: 'knows', WORKS: 'works at', WORKED: 'worked at', STUDIED: 'studied at'}
+
+# How often (in visited edges) the search checks its deadline.
+_DEADLINE_CHECK_EVERY = 256
+
+
+class RelationshipGraph:
+    """Adjacency arrays over integer node ids, plus the name <-> id maps."""
+
+    def __init__(self):
+        self.names = []
+        self.kinds = array('b')
+        self.neighbours = []
+        self.edge_kinds = []
+        self.person_ids = {}
+        self.org_ids = {}
+        # Lower-cased org name -> id, for case-insensitive targets.
+        self.org_lookup = {}
+
+    def _node(self, name, kind, ids):
+        node = ids.get(name)
+        if node is None:
+            node = len(self.names)
+            ids[name] = node
+            self.names.append(name)
+            self.kinds.append(kind)
+            self.neighbours.append(array('i'))
+            self.edge_kinds.append(array('b'))
+        return node
+
+    def person(self, name):
+        return self._node(name, PERSON, self.person_ids)
+
+    def org(self, name):
+        node = self._node(name, ORG, self.org_ids)
+        self.org_lookup.setdefault(name.lower(), node)
+        return node
+
+    def copy(self):
+        """
+        A copy that shares the per-node arrays. connect() and disconnect()
+        replace a node's arrays rather than changing them, so the copy can be
+        edited while readers keep using this graph.
+        """
+        graph = RelationshipGraph.__new__(RelationshipGraph)
+        graph.names = list(self.names)
+        graph.kinds = array('b', self.kinds)
+        graph.neighbours = list(self.neighbours)
+        graph.edge_kinds = list(self.edge_kinds)
+        graph.person_ids = dict(self.person_ids)
+        graph.org_ids = dict(self.org_ids)
+        graph.org_lookup = dict(self.org_lookup)
+        return graph
+
+    def _link(self, a, b, kind):
+        for i, other in enumerate(self.neighbours[a]):
+            if other == b:
+                # A current job outranks a past one at the same place.
+                if kind == WORKS and self.edge_kinds[a][i] == WORKED:
+                    kinds = array('b', self.edge_kinds[a])
+                    kinds[i] = WORKS
+                    self.edge_kinds[a] = kinds
+                return
+        self.neighbours[a] = self.neighbours[a] + array('i', [b])
+        self.edge_kinds[a] = self.edge_kinds[a] + array('b', [kind])
+
+    def connect(self, a, b, kind):
+        self._link(a, b, kind)
+        self._link(b, a, kind)
+
+    def add_edges(self, edges):
+        """
+        Bulk-add {(a, b): kind} edges without connect()'s duplicate scan;
+        for a fresh graph, with each pair given once (see EdgeSet).
+        """
+        for (a, b), kind in edges.items():
+            self.neighbours[a].append(b)
+            self.edge_kinds[a].append(kind)
+            if a != b:
+                self.neighbours[b].append(a)
+                self.edge_kinds[b].append(kind)
+
+    def _unlink(self, a, b):
+        keep = [(n, k) for n, k in zip(self.neighbours[a], self.edge_kinds[a]) if n != b]
+        self.neighbours[a] = array('i', [n for n, _k in keep])
+        self.edge_kinds[a] = array('b', [k for _n, k in keep])
+
+    def disconnect(self, a, b):
+        self._unlink(a, b)
+        self._unlink(b, a)
+
+    def remove_person(self, name):
+        node = self.person_ids.pop(name, None)
+        if node is None:
+            return
+        for other in set(self.neighbours[node]):
+            self._unlink(other, node)
+        self.neighbours[node] = array('i')
+        self.edge_kinds[node] = array('b')
+        self.kinds[node] = REMOVED
+
+    def edge_count(self):
+        return sum(len(n) for n in self.neighbours) // 2
+
+    def paths(self, start, target, max_hops, limit, deadline):
+        """
+        Breadth-first search from `start` (a person) to people linked to the
+        `target` org. Returns (paths, complete); each path is a list of
+        (node, edge_kind) steps from the first contact to the target org.
+        """
+        parent = {start: (-1, -1, KNOWS)}  # person -> (previous person, via org, edge kind)
+        frontier = [start]
+        found = []
+        visited = 0
+
+        for hop in range(1, max_hops + 1):
+            next_frontier = []
+            for person in frontier:
+                for neighbour, kind in zip(self.neighbours[person], self.edge_kinds[person]):
+                    if kind == KNOWS:
+                        candidates = ((neighbour, -1, KNOWS),)
+                    elif hop == 1 or neighbour == target:
+                        # The first hop must be someone the user knows personally,
+                        # and there is no point walking through the target itself.
+                        continue
+                    else:
+                        candidates = (
+                            (colleague, neighbour, kind)
+                            for colleague in self.neighbours[neighbour]
+                        )
+                    for other, via, via_kind in candidates:
+                        visited += 1
+                        if visited % _DEADLINE_CHECK_EVERY == 0 and time.perf_counter() > deadline:
+                            return found, False
+                        if other in parent or self.kinds[other] != PERSON:
+                            continue
+                        parent[other] = (person, via, via_kind)
+                        next_frontier.append(other)
+                        link = self._link_kind(other, target)
+                        if link is not None:
+                            found.append(self._trace(parent, other, target, link))
+            if len(found) >= limit or not next_frontier:
+                break
+            frontier = next_frontier
+        return found, True
+
+    def _link_kind(self, person, org):
+        for neighbour, kind in zip(self.neighbours[person], self.edge_kinds[person]):
+            if neighbour == org:
+                return kind
+        return None
+
+    def _trace(self, parent, person, target, link):
+        # Each step is (node, how it relates to the step before it).
+        steps = [(target, link)]
+        while True:
+            previous, via, kind = parent[person]
+            if previous == -1:
+                break
+            steps.append((person, KNOWS if via == -1 else self._link_kind(person, via)))
+            if via != -1:
+                steps.append((via, kind))
+            person = previous
+        steps.reverse()
+        return steps
+
+
+class EdgeSet(dict):
+    """Unique undirected edges for a rebuild, resolved the way connect() would."""
+
+    def add(self, a, b, kind):
+        key = (a, b) if a <= b else (b, a)
+        current = self.get(key)
+        if current is None or (kind == WORKS and current == WORKED):
+            self[key] = kind
+
+
+class IntroIndex:
+    """
+    Owns the current RelationshipGraph: builds it, applies incremental
+    updates from this process's writes and rebuilds it after writes it
+    only learns about through table_versions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._graph = None
+        self._stale = False
+        self._rebuilding = False
+        # Bumped on every change so a rebuild that raced a write is redone.
+        self._generation = 0
+        self._app = None
+        self.built_at = None
+        self.build_seconds = None
+
+    def init_app(self, app):
+        self._app = app
+        table_versions.subscribe(self._on_tables_changed)
+        change_feed.subscribe(self.apply_changes, GRAPH_TABLES, on_error=self.invalidate)
+
+    def _on_tables_changed(self, tables, local):
+        if tables & GRAPH_TABLES and not local and not change_feed.enabled:
+            self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._stale = True
+            self._generation += 1
+
+    @staticmethod
+    def _rows(statement):
+        result = execute_query(statement, primary=True, columns=True)
+        return result[1] if result is not None else None
+
+    @classmethod
+    def _load(cls):
+        graph = RelationshipGraph()
+        for (name,) in cls._rows(LOAD_USERS) or []:
+            graph.person(name)
+        for (name,) in cls._rows(LOAD_CONNECTIONS) or []:
+            graph.person(name)
+        rows = cls._rows(LOAD_CONTACTS)
+        if rows is None:
+            return None
+        # Dedupe with a hash set up front; connect() scans a node's neighbours
+        # on every call, which is quadratic for well-connected nodes.
+        edges = EdgeSet()
+        for user_n, connect_n in rows:
+            edges.add(graph.person(user_n), graph.person(connect_n), KNOWS)
+        for name, org_n, end in cls._rows(LOAD_JOBS) or []:
+            edges.add(graph.person(name), graph.org(org_n), WORKS if end is None else WORKED)
+        for name, school_n in cls._rows(LOAD_SCHOOLS) or []:
+            edges.add(graph.person(name), graph.org(school_n), STUDIED)
+        graph.add_edges(edges)
+        return graph
+
+    def _rebuild(self):
+        with self._lock:
+            generation = self._generation
+        started = time.perf_counter()
+        graph = self._load()
+        with self._lock:
+            self._rebuilding = False
+            if graph is None:
+                return
+            self._graph = graph
+            self.built_at = time.time()
+            self.build_seconds = time.perf_counter() - started
+            # Anything that changed while loading may be missing; go again later.
+            self._stale = generation != self._generation
+
+    def _rebuild_in_background(self):
+        with self._app.app_context():
+            self._rebuild()
+
+    def graph(self):
+        """The current graph, building it on first use; None if the database is down."""
+        table_versions.sync()
+        with self._lock:
+            graph = self._graph
+            start_background = graph is not None and self._stale and not self._rebuilding
+            if graph is None or start_background:
+                self._rebuilding = True
+        if graph is None:
+            self._rebuild()
+            with self._lock:
+                return self._graph
+        if start_background:
+            threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+        return graph
+
+    def _apply(self, change):
+        # Edit a copy and swap it in, so a search running on the current
+        # graph never sees a half-applied change.
+        with self._lock:
+            self._generation += 1
+            if self._graph is not None:
+                graph = self._graph.copy()
+                change(graph)
+                self._graph = graph
+
+    def add_conversation(self, user_n, connect_n, org_n=None, job_end=None, school_n=None):
+        """Mirror Add_Connection_By_Talking."""
+        def change(graph):
+            person = graph.person(connect_n)
+            graph.connect(graph.person(user_n), person, KNOWS)
+            if org_n:
+                graph.connect(person, graph.org(org_n), WORKED if job_end else WORKS)
+            if school_n:
+                graph.connect(person, graph.org(school_n), STUDIED)
+        self._apply(change)
+
+    def add_work_experience(self, name, org_n, end=None):
+        """Mirror Add_Work_Experience."""
+        self._apply(lambda graph: graph.connect(
+            graph.person(name), graph.org(org_n), WORKED if end else WORKS))
+
+    def remove_connection(self, name):
+        """Mirror Delete_Connection."""
+        self._apply(lambda graph: graph.remove_person(name))
+
+    def apply_changes(self, changes):
+        """Apply a batch of Change_Log rows for GRAPH_TABLES (see changefeed)."""
+        # Only the last operation per row matters; Refresh_Last_Contact
+        # deletes and re-inserts the same pair on every conversation.
+        latest = {}
+        for change in changes:
+            latest[(change.table, tuple(change.key.values()))] = change
+
+        # Worked keys don't say whether the job is current.
+        jobs = [change.key for change in latest.values() if change.table == 'Worked' and change.op == INSERT]
+        ended = {}
+        if jobs:
+            rows = execute_query(
+                "SELECT Name, Org_N, End FROM Worked WHERE (Name, Org_N) IN ("
+                + ", ".join(["(%s, %s)"] * len(jobs)) + ")",
+                [value for key in jobs for value in (key['Name'], key['Org_N'])],
+                primary=True,
+            )
+            if rows is None:
+                self.invalidate()
+                return
+            ended = {(row['Name'], row['Org_N']): row['End'] is not None for row in rows}
+
+        rebuild = False
+
+        def change_graph(graph):
+            nonlocal rebuild
+            for change in latest.values():
+                key = change.key
+                if change.old_key is not None and change.old_key != key:
+                    rebuild = True
+                elif change.table in ('User', 'Connection'):
+                    if change.op == DELETE:
+                        graph.remove_person(key['Name'])
+                    else:
+                        graph.person(key['Name'])
+                elif change.table == 'Last_Contact':
+                    if change.op == DELETE:
+                        user, contact = graph.person_ids.get(key['User_N']), graph.person_ids.get(key['Connect_N'])
+                        if user is not None and contact is not None:
+                            graph.disconnect(user, contact)
+                    else:
+                        graph.connect(graph.person(key['User_N']), graph.person(key['Connect_N']), KNOWS)
+                elif change.op != INSERT:
+                    # An org node is shared by jobs and schools, so dropping one
+                    # edge could drop the other; rebuild instead.
+                    rebuild = True
+                elif change.table == 'Worked':
+                    if (key['Name'], key['Org_N']) in ended:
+                        graph.connect(graph.person(key['Name']), graph.org(key['Org_N']),
+                                      WORKED if ended[(key['Name'], key['Org_N'])] else WORKS)
+                elif change.table == 'Went_To':
+                    graph.connect(graph.person(key['Name']), graph.org(key['School_N']), STUDIED)
+
+        self._apply(change_graph)
+        if rebuild:
+            self.invalidate()
+
+    def find_paths(self, user_n, org, max_hops=INTRO_MAX_HOPS, limit=10, budget_ms=INTRO_BUDGET_MS):
+        """
+        Ranked introduction paths from `user_n` to organization `org`.
+
+        Returns a dict with the paths (shortest first, then those ending at a
+        current employee, then by name) and whether the search finished
+        inside the budget; None if the graph could not be built.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000
+        graph = self.graph()
+        if graph is None:
+            return None
+
+        start = graph.person_ids.get(user_n)
+        target = graph.org_ids.get(org, graph.org_lookup.get(org.lower()))
+        if start is None or target is None:
+            return {'paths': [], 'complete': True}
+
+        found, complete = graph.paths(start, target, max(1, min(max_hops, INTRO_HOPS_LIMIT)),
+                                      limit, deadline)
+
+        def rank(steps):
+            people = sum(1 for node, _kind in steps if graph.kinds[node] == PERSON)
+            return people, steps[-1][1] != WORKS, graph.names[steps[-2][0]]
+
+        paths = []
+        for steps in sorted(found, key=rank)[:limit]:
+            paths.append({
+                'hops': sum(1 for node, _kind in steps if graph.kinds[node] == PERSON),
+                'steps': [
+                    {'name': graph.names[node],
+                     'type': 'person' if graph.kinds[node] == PERSON else 'organization',
+                     'via': EDGE_LABELS[kind]}
+                    for node, kind in steps
+                ],
+            })
+        return {'paths': paths, 'complete': complete}
+
+    def stats(self):
+        with self._lock:
+            graph = self._graph
+            return {
+                'nodes': len(graph.names) if graph else 0,
+                'edges': graph.edge_count() if graph else 0,
+                'stale': self._stale,
+                'built_at': self.built_at,
+                'build_seconds': self.build_seconds,
+            }
+
+
+intro_index = IntroIndex()
@@ -0,0 +1,210 @@
+"""Query instrumentation: Prometheus-style metrics, slow-query log, Server-Timing."""
+import logging
+import os
+import re
+import threading
+from functools import lru_cache
+
+from flask import g, has_request_context, request
+
+# Queries at or above this many milliseconds are logged with SQL and params;
+# a negative value disables the slow-query log.
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 500))
+
+# Add a Server-Timing header (db time / query count) to every response.
+SERVER_TIMING = os.getenv('SERVER_TIMING', '0') == '1'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+slow_query_log = logging.getLogger('network_assistant.slow_query')
+
+
+class Histogram:
+    """Fixed-bucket histogram (not thread-safe on its own; guarded by Registry)."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Registry:
+    """Labelled counters and histograms behind a single lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+
+    def describe(self, name, kind, text):
+        self._help[name] = (kind, text)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                key: (h.buckets, list(h.counts), h.sum, h.count)
+                for key, h in self._histograms.items()
+            }
+        return counters, histograms
+
+
+registry = Registry()
+registry.describe('db_queries_total', 'counter', 'Queries executed, by route and statement.')
+registry.describe('db_query_errors_total', 'counter', 'Queries that raised a database error.')
+registry.describe('db_rows_returned_total', 'counter', 'Rows fetched by SELECT/CALL statements.')
+registry.describe('db_query_duration_seconds', 'histogram', 'Query execution time including fetch.')
+registry.describe('db_connection_acquire_seconds', 'histogram', 'Time to check a connection out of the pool.')
+registry.describe('db_connection_errors_total', 'counter', 'Failed attempts to obtain a connection.')
+registry.describe('http_request_db_queries', 'histogram', 'Queries issued per HTTP request.')
+
+
+@lru_cache(maxsize=512)
+def statement_label(query):
+    """Low-cardinality name for a statement: 'call:Proc_Name' or the leading keyword."""
+    match = re.match(r'\s*CALL\s+(\w+)', query, re.IGNORECASE)
+    if match:
+        return f'call:{match.group(1)}'
+    match = re.match(r'\s*(\w+)', query)
+    return match.group(1).lower() if match else 'unknown'
+
+
+def _route():
+    if has_request_context():
+        return request.endpoint or 'unknown'
+    return 'none'
+
+
+def _count_request_error():
+    if has_request_context():
+        g.db_errors = g.get('db_errors', 0) + 1
+
+
+def request_had_db_errors():
+    """True if any query or connection attempt failed during this request."""
+    return bool(g.get('db_errors'))
+
+
+def observe_acquire(seconds, ok=True):
+    """Record a pool checkout for the current route."""
+    route = _route()
+    registry.observe('db_connection_acquire_seconds', (('route', route),), seconds)
+    if not ok:
+        registry.inc('db_connection_errors_total', (('route', route),))
+        _count_request_error()
+
+
+def observe_query(query, params, seconds, rows=None, error=False):
+    """Record one execute_query call; logs it if it crossed SLOW_QUERY_MS."""
+    route = _route()
+    labels = (('route', route), ('statement', statement_label(query)))
+    registry.inc('db_queries_total', labels)
+    registry.observe('db_query_duration_seconds', labels, seconds)
+    if error:
+        registry.inc('db_query_errors_total', labels)
+        _count_request_error()
+    if rows:
+        registry.inc('db_rows_returned_total', labels, rows)
+
+    if has_request_context():
+        g.metrics_queries = g.get('metrics_queries', 0) + 1
+        g.metrics_db_seconds = g.get('metrics_db_seconds', 0.0) + seconds
+
+    if 0 <= SLOW_QUERY_MS <= seconds * 1000:
+        slow_query_log.warning(
+            "slow query (%.1f ms) on %s: %s params=%r",
+            seconds * 1000, route, ' '.join(query.split()), params,
+        )
+
+
+def _format_labels(labels, extra=()):
+    items = tuple(labels) + tuple(extra)
+    if not items:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+        for k, v in items
+    )
+    return '{' + body + '}'
+
+
+def render(gauges=None, totals=None):
+    """
+    Prometheus text exposition of all metrics plus `gauges` and `totals`
+    (counters; name -> value) sampled by the caller.
+    """
+    counters, histograms = registry.snapshot()
+    lines = []
+    seen = set()
+
+    def header(name):
+        if name in seen:
+            return
+        seen.add(name)
+        kind, text = registry._help.get(name, ('untyped', ''))
+        lines.append(f'# HELP {name} {text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    for (name, labels), value in sorted(counters.items()):
+        header(name)
+        lines.append(f'{name}{_format_labels(labels)} {value}')
+
+    for (name, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+        header(name)
+        cumulative = 0
+        for bound, bucket_count in zip(buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+        lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {count}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {total:.6f}')
+        lines.append(f'{name}_count{_format_labels(labels)} {count}')
+
+    for name, value in sorted((totals or {}).items()):
+        lines.append(f'# TYPE {name} counter')
+        lines.append(f'{name} {value}')
+
+    for name, value in sorted((gauges or {}).items()):
+        lines.append(f'# TYPE {name} gauge')
+        lines.append(f'{name} {value}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def _after_request(response):
+    queries = g.get('metrics_queries', 0)
+    registry.observe('http_request_db_queries', (('route', _route()),), queries, COUNT_BUCKETS)
+    if SERVER_TIMING:
+        db_ms = g.get('metrics_db_seconds', 0.0) * 1000
+        response.headers.add('Server-Timing', f'db;dur={db_ms:.1f};desc="{queries} queries"')
+    return response
+
+
+def init_app(app):
+    """Register per-request bookkeeping (query histogram, Server-Timing)."""
+    app.after_request(_after_request)
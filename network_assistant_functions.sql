@@ -34,6 +34,8 @@ CREATE PROCEDURE Add_Connection_By_Talking (
 )
 BEGIN
     DECLARE v_exists INT DEFAULT 0;
+    -- Tables this call actually writes, for Bump_Table_Versions
+    DECLARE v_Tables VARCHAR(255) DEFAULT 'Talked,Last_Contact';
 
     -- 1. Verify User exists
     SELECT COUNT(*) INTO v_exists
@@ -53,6 +55,7 @@ BEGIN
     IF v_exists = 0 THEN
         INSERT INTO Connection (Name, Address, Relation)
         VALUES (p_Connect_N, p_Addr, p_Relation);
+        SET v_Tables = CONCAT(v_Tables, ',Connection');
     END IF;
 
     -- 3. Add connection contact info if provided
@@ -63,12 +66,26 @@ BEGIN
             Type      = VALUES(Type),
             Phone_Num = VALUES(Phone_Num),
             Email     = VALUES(Email);
+        SET v_Tables = CONCAT(v_Tables, ',ConnectionC');
     END IF;
 
-    -- 4. Log the conversation
+    -- 4. Log the conversation (a pair can have any number of them)
+    SET p_StartTS = COALESCE(p_StartTS, NOW());
+
     INSERT INTO Talked (User_N, Connect_N, Topic, Method, Start, End)
     VALUES (p_User_N, p_Connect_N, p_Topic, p_Method, p_StartTS, p_EndTS);
 
+    -- 4a. Fold it into the pair's last-contact summary. Topic/method are
+    -- assigned before Last_Start so they compare against the old value.
+    INSERT INTO Last_Contact (User_N, Connect_N, Last_Start, Last_End, Last_Topic, Last_Method, Conversations)
+    VALUES (p_User_N, p_Connect_N, p_StartTS, p_EndTS, p_Topic, p_Method, 1)
+    ON DUPLICATE KEY UPDATE
+        Last_Topic    = IF(VALUES(Last_Start) >= Last_Start, VALUES(Last_Topic), Last_Topic),
+        Last_Method   = IF(VALUES(Last_Start) >= Last_Start, VALUES(Last_Method), Last_Method),
+        Last_End      = GREATEST(COALESCE(Last_End, VALUES(Last_End)), COALESCE(VALUES(Last_End), Last_End)),
+        Last_Start    = GREATEST(Last_Start, VALUES(Last_Start)),
+        Conversations = Conversations + 1;
+
     /* 5. If job info provided (Org_N not NULL) */
     IF p_Org_N IS NOT NULL THEN
         -- 5a. Ensure organization exists
@@ -79,6 +96,7 @@ BEGIN
         IF v_exists = 0 THEN
             INSERT INTO Organization (Name, Address, Phone_Num, Email)
             VALUES (p_Org_N, COALESCE(p_Org_A, 'Unknown address'), NULL, NULL);
+            SET v_Tables = CONCAT(v_Tables, ',Organization');
         END IF;
 
         -- 5b. If company attributes given, upsert company
@@ -90,11 +108,20 @@ BEGIN
                 Stock         = VALUES(Stock),
                 Num_Employees = VALUES(Num_Employees),
                 Industry      = VALUES(Industry);
+            SET v_Tables = CONCAT(v_Tables, ',Company');
         END IF;
 
-        -- 5c. Insert Worked row for the connection at this company
+        -- 5c. Upsert the connection's Worked row at this company (a later
+        -- conversation may repeat or update the job)
         INSERT INTO Worked (Name, Org_N, Start, End, Role, Department, Location)
-        VALUES (p_Connect_N, p_Org_N, p_JobStart, p_JobEnd, p_Role, p_Dept, p_JobLoc);
+        VALUES (p_Connect_N, p_Org_N, p_JobStart, p_JobEnd, p_Role, p_Dept, p_JobLoc)
+        ON DUPLICATE KEY UPDATE
+            Start      = COALESCE(VALUES(Start), Start),
+            End        = COALESCE(VALUES(End), End),
+            Role       = COALESCE(VALUES(Role), Role),
+            Department = COALESCE(VALUES(Department), Department),
+            Location   = COALESCE(VALUES(Location), Location);
+        SET v_Tables = CONCAT(v_Tables, ',Worked');
     END IF;
 
     /* 6. If school info provided (School_N not NULL) */
@@ -107,6 +134,9 @@ BEGIN
         IF v_exists = 0 THEN
             INSERT INTO Organization (Name, Address, Phone_Num, Email)
             VALUES (p_School_N, COALESCE(p_Org_A, 'Unknown address'), NULL, NULL);
+            IF NOT FIND_IN_SET('Organization', v_Tables) THEN
+                SET v_Tables = CONCAT(v_Tables, ',Organization');
+            END IF;
         END IF;
 
         -- 6b. Upsert School row
@@ -115,16 +145,25 @@ BEGIN
         ON DUPLICATE KEY UPDATE
             Org_A = VALUES(Org_A);
         
-        -- 6c. Insert Went_To for this connection
+        -- 6c. Upsert Went_To for this connection
         INSERT INTO Went_To (Name, School_N, Type, Subject, Graduation)
-        VALUES (p_Connect_N, p_School_N, p_DegType, p_Subject, p_Graduation);
+        VALUES (p_Connect_N, p_School_N, p_DegType, p_Subject, p_Graduation)
+        ON DUPLICATE KEY UPDATE
+            Type       = COALESCE(VALUES(Type), Type),
+            Subject    = COALESCE(VALUES(Subject), Subject),
+            Graduation = COALESCE(VALUES(Graduation), Graduation);
+        SET v_Tables = CONCAT(v_Tables, ',School,Went_To');
     END IF;
 
-    -- 7. Display confirmation (we return the new connection and conversation info)
+    CALL Bump_Table_Versions(v_Tables);
+
+    -- 7. Display confirmation (we return the new connection and conversation
+    -- info, plus the tables bumped so the app can mirror exactly those)
     SELECT p_Connect_N AS NewConnection,
            p_User_N    AS UserName,
            p_StartTS   AS ConversationStart,
-           p_EndTS     AS ConversationEnd;
+           p_EndTS     AS ConversationEnd,
+           v_Tables    AS TablesChanged;
 END$$
 
 
@@ -142,9 +181,10 @@ BEGIN
     DECLARE v_deleted_conc   INT DEFAULT 0;
     DECLARE v_deleted_conn   INT DEFAULT 0;
 
-    -- 1) Delete related Talked rows
+    -- 1) Delete related Talked rows and their summary
     DELETE FROM Talked WHERE Connect_N = p_Connect_N;
     SET v_deleted_talked = ROW_COUNT();
+    DELETE FROM Last_Contact WHERE Connect_N = p_Connect_N;
 
     -- 2) Delete related Worked rows
     DELETE FROM Worked WHERE Name = p_Connect_N;
@@ -175,6 +215,8 @@ BEGIN
       AND Sc.Org_N IS NULL
       AND WT.School_N IS NULL;
 
+    CALL Bump_Table_Versions('Talked,Last_Contact,Worked,Went_To,ConnectionC,Connection,Organization');
+
     -- 7) Show number of records deleted
     SELECT v_deleted_talked AS TalkedDeleted,
            v_deleted_worked AS WorkedDeleted,
@@ -210,6 +252,12 @@ BEGIN
       AND Connect_N = p_Connect_N
       AND Start     = p_KeyStartTS;
 
+    -- Start/End may have moved either way, so recompute this pair's summary
+    -- (a range read of its rows on the primary key).
+    CALL Refresh_Last_Contact(p_User_N, p_Connect_N);
+
+    CALL Bump_Table_Versions('Talked,Last_Contact');
+
     -- Display updated conversation
     SELECT *
     FROM Talked
@@ -275,6 +323,8 @@ BEGIN
     INSERT INTO Worked (Name, Org_N, Start, End, Role, Department, Location)
     VALUES (p_Name, p_Org_N, p_Start, p_End, p_Role, p_Dept, p_JobLoc);
 
+    CALL Bump_Table_Versions('Connection,Organization,Company,Worked');
+
     -- 5) Show the new employment row
     SELECT *
     FROM Worked
@@ -289,16 +339,22 @@ END$$
    ========================================================= */
 DROP PROCEDURE IF EXISTS Search_Connections_By_Company_Industry_Location;
 CREATE PROCEDURE Search_Connections_By_Company_Industry_Location (
-    IN p_User_N   VARCHAR(100),
-    IN p_Company  VARCHAR(150),
-    IN p_Industry VARCHAR(80),
-    IN p_City     VARCHAR(120)
+    IN p_User_N    VARCHAR(100),
+    IN p_Company   VARCHAR(150),
+    IN p_Industry  VARCHAR(80),
+    IN p_City      VARCHAR(120),
+    IN p_CityMatch VARCHAR(10)
 )
 BEGIN
     /*
       Pass NULL for any filter you don't want to apply.
       For example: p_Company = NULL means "any company".
+      p_CityMatch = 'substring' matches p_City anywhere in W.Location
+      (full scan); anything else is an indexed lookup on W.City.
     */
+    DECLARE v_City VARCHAR(120) DEFAULT Parse_City(p_City);
+    DECLARE v_Substring BOOLEAN DEFAULT COALESCE(p_CityMatch = 'substring', FALSE);
+
     SELECT DISTINCT
         C.Name,
         W.Role,
@@ -317,7 +373,9 @@ BEGIN
      AND T.User_N    = p_User_N
     WHERE (p_Company  IS NULL OR O.Name      LIKE CONCAT('%', p_Company, '%'))
       AND (p_Industry IS NULL OR Co.Industry LIKE CONCAT('%', p_Industry, '%'))
-      AND (p_City     IS NULL OR W.Location  LIKE CONCAT('%', p_City, '%'))
+      AND (p_City     IS NULL
+           OR (v_Substring AND W.Location LIKE CONCAT('%', p_City, '%'))
+           OR (NOT v_Substring AND W.City = v_City))
     ORDER BY C.Name, Company, W.Role;
 END$$
 
@@ -333,8 +391,9 @@ CREATE PROCEDURE Last_Time_Contacted (
 BEGIN
     DECLARE v_LastContact DATETIME;
 
-    SELECT MAX(End) INTO v_LastContact
-    FROM Talked
+    -- Primary-key lookup on the maintained summary
+    SELECT Last_End INTO v_LastContact
+    FROM Last_Contact
     WHERE User_N    = p_User_N
       AND Connect_N = p_Connect_N;
 
@@ -352,34 +411,789 @@ END$$
 DROP PROCEDURE IF EXISTS Connections_In_City;
 CREATE PROCEDURE Connections_In_City (
     IN p_City   VARCHAR(120),
-    IN p_User_N VARCHAR(100)
+    IN p_User_N VARCHAR(100),
+    IN p_Match  VARCHAR(10)
 )
 BEGIN
-    -- A. Home address path (only connections you've actually talked to)
-    SELECT DISTINCT
-        C.Name,
-        C.Address
-    FROM Connection C
-    LEFT JOIN Talked T
-      ON T.Connect_N = C.Name
-     AND T.User_N    = p_User_N
-    WHERE C.Address LIKE CONCAT('%', p_City, '%')
-      AND T.User_N IS NOT NULL;
+    /*
+      p_Match = 'substring' keeps the original LIKE '%city%' behaviour
+      (full scan); anything else is an indexed lookup on the parsed City.
+    */
+    DECLARE v_City VARCHAR(120) DEFAULT Parse_City(p_City);
 
-    -- B. Work location path (also restricted to your network)
-    SELECT DISTINCT
-        C.Name,
-        W.Location,
-        W.Role,
-        W.Org_N AS Company
-    FROM Connection C
-    JOIN Worked W
-      ON W.Name = C.Name
-    LEFT JOIN Talked T
-      ON T.Connect_N = C.Name
-     AND T.User_N    = p_User_N
-    WHERE W.Location LIKE CONCAT('%', p_City, '%')
-      AND T.User_N IS NOT NULL;
+    IF p_Match = 'substring' THEN
+        -- A. Home address path (only connections you've actually talked to)
+        SELECT DISTINCT
+            C.Name,
+            C.Address
+        FROM Connection C
+        JOIN Talked T
+          ON T.Connect_N = C.Name
+         AND T.User_N    = p_User_N
+        WHERE C.Address LIKE CONCAT('%', p_City, '%');
+
+        -- B. Work location path (also restricted to your network)
+        SELECT DISTINCT
+            C.Name,
+            W.Location,
+            W.Role,
+            W.Org_N AS Company
+        FROM Connection C
+        JOIN Worked W
+          ON W.Name = C.Name
+        JOIN Talked T
+          ON T.Connect_N = C.Name
+         AND T.User_N    = p_User_N
+        WHERE W.Location LIKE CONCAT('%', p_City, '%');
+    ELSE
+        -- A. Home address path via idx_connection_city
+        SELECT DISTINCT
+            C.Name,
+            C.Address
+        FROM Connection C
+        JOIN Talked T
+          ON T.Connect_N = C.Name
+         AND T.User_N    = p_User_N
+        WHERE C.City = v_City;
+
+        -- B. Work location path via idx_worked_city
+        SELECT DISTINCT
+            C.Name,
+            W.Location,
+            W.Role,
+            W.Org_N AS Company
+        FROM Worked W
+        JOIN Connection C
+          ON C.Name = W.Name
+        JOIN Talked T
+          ON T.Connect_N = C.Name
+         AND T.User_N    = p_User_N
+        WHERE W.City = v_City;
+    END IF;
+END$$
+
+
+/* =========================================================
+   City normalization (Connection.City, Worked.City)
+   ========================================================= */
+DROP FUNCTION IF EXISTS Parse_City;
+CREATE FUNCTION Parse_City (
+    p_Text VARCHAR(200)
+)
+RETURNS VARCHAR(120)
+DETERMINISTIC
+NO SQL
+BEGIN
+    /*
+      Last comma-separated segment that is not a region/postal code:
+      '44 Elm St, Metropolis' -> 'Metropolis',
+      '1 Main St, Austin, TX 78701' -> 'Austin'.
+      This is the only implementation; the City columns are filled here.
+    */
+    DECLARE v_Rest VARCHAR(200);
+    DECLARE v_Part VARCHAR(200);
+
+    IF p_Text IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    SET v_Rest = TRIM(p_Text);
+    WHILE v_Rest <> '' DO
+        SET v_Part = SUBSTRING_INDEX(v_Rest, ',', -1);
+        IF LOCATE(',', v_Rest) = 0 THEN
+            SET v_Rest = '';
+        ELSE
+            SET v_Rest = TRIM(LEFT(v_Rest, CHAR_LENGTH(v_Rest) - CHAR_LENGTH(v_Part) - 1));
+        END IF;
+        SET v_Part = TRIM(v_Part);
+
+        IF v_Part <> ''
+           AND NOT (TRIM(REPLACE(v_Rest, ',', '')) <> ''
+                    AND v_Part REGEXP '^([A-Za-z]{2})? *[0-9]{0,5}(-[0-9]{4})?$') THEN
+            RETURN LEFT(v_Part, 120);
+        END IF;
+    END WHILE;
+
+    RETURN NULL;
+END$$
+
+DROP TRIGGER IF EXISTS trg_connection_city_ins;
+CREATE TRIGGER trg_connection_city_ins BEFORE INSERT ON Connection
+FOR EACH ROW
+    SET NEW.City = Parse_City(NEW.Address)$$
+
+DROP TRIGGER IF EXISTS trg_connection_city_upd;
+CREATE TRIGGER trg_connection_city_upd BEFORE UPDATE ON Connection
+FOR EACH ROW
+    SET NEW.City = Parse_City(NEW.Address)$$
+
+DROP TRIGGER IF EXISTS trg_worked_city_ins;
+CREATE TRIGGER trg_worked_city_ins BEFORE INSERT ON Worked
+FOR EACH ROW
+    SET NEW.City = Parse_City(NEW.Location)$$
+
+DROP TRIGGER IF EXISTS trg_worked_city_upd;
+CREATE TRIGGER trg_worked_city_upd BEFORE UPDATE ON Worked
+FOR EACH ROW
+    SET NEW.City = Parse_City(NEW.Location)$$
+
+DROP PROCEDURE IF EXISTS Backfill_Cities;
+CREATE PROCEDURE Backfill_Cities (
+    IN p_BatchSize INT
+)
+BEGIN
+    /*
+      Recompute City for existing rows, walking the primary key in batches
+      so each UPDATE is a short statement (autocommit commits each one).
+    */
+    DECLARE v_Last VARCHAR(100) DEFAULT '';
+    DECLARE v_Next VARCHAR(100);
+    DECLARE v_Updated INT DEFAULT 0;
+
+    IF p_BatchSize IS NULL OR p_BatchSize < 1 THEN
+        SET p_BatchSize = 1000;
+    END IF;
+
+    connection_loop: LOOP
+        SET v_Next = NULL;
+        SELECT MAX(Name) INTO v_Next
+        FROM (SELECT Name FROM Connection
+              WHERE Name > v_Last
+              ORDER BY Name
+              LIMIT p_BatchSize) batch;
+        IF v_Next IS NULL THEN
+            LEAVE connection_loop;
+        END IF;
+
+        UPDATE Connection
+        SET City = Parse_City(Address)
+        WHERE Name > v_Last AND Name <= v_Next;
+        SET v_Updated = v_Updated + ROW_COUNT();
+        SET v_Last = v_Next;
+    END LOOP;
+
+    SET v_Last = '';
+    worked_loop: LOOP
+        SET v_Next = NULL;
+        SELECT MAX(Name) INTO v_Next
+        FROM (SELECT Name FROM Worked
+              WHERE Name > v_Last
+              ORDER BY Name
+              LIMIT p_BatchSize) batch;
+        IF v_Next IS NULL THEN
+            LEAVE worked_loop;
+        END IF;
+
+        UPDATE Worked
+        SET City = Parse_City(Location)
+        WHERE Name > v_Last AND Name <= v_Next;
+        SET v_Updated = v_Updated + ROW_COUNT();
+        SET v_Last = v_Next;
+    END LOOP;
+
+    CALL Bump_Table_Versions('Connection,Worked');
+
+    SELECT v_Updated AS RowsUpdated;
+END$$
+
+
+/* =========================================================
+   Dashboard counters (Stats_Counter)
+   ========================================================= */
+DROP PROCEDURE IF EXISTS Refresh_Stats_Counters;
+CREATE PROCEDURE Refresh_Stats_Counters ()
+BEGIN
+    -- Recount from the base tables; used after bulk loads or to repair drift.
+    UPDATE Stats_Counter SET Value = (SELECT COUNT(*) FROM User)         WHERE Name = 'users';
+    UPDATE Stats_Counter SET Value = (SELECT COUNT(*) FROM Connection)   WHERE Name = 'connections';
+    UPDATE Stats_Counter SET Value = (SELECT COUNT(*) FROM Company)      WHERE Name = 'companies';
+    UPDATE Stats_Counter SET Value = (SELECT COUNT(*) FROM School)       WHERE Name = 'schools';
+END$$
+
+DROP TRIGGER IF EXISTS trg_user_count_ins;
+CREATE TRIGGER trg_user_count_ins AFTER INSERT ON User
+FOR EACH ROW
+    UPDATE Stats_Counter SET Value = Value + 1 WHERE Name = 'users'$$
+
+DROP TRIGGER IF EXISTS trg_user_count_del;
+CREATE TRIGGER trg_user_count_del AFTER DELETE ON User
+FOR EACH ROW
+    UPDATE Stats_Counter SET Value = Value - 1 WHERE Name = 'users'$$
+
+DROP TRIGGER IF EXISTS trg_connection_count_ins;
+CREATE TRIGGER trg_connection_count_ins AFTER INSERT ON Connection
+FOR EACH ROW
+    UPDATE Stats_Counter SET Value = Value + 1 WHERE Name = 'connections'$$
+
+DROP TRIGGER IF EXISTS trg_connection_count_del;
+CREATE TRIGGER trg_connection_count_del AFTER DELETE ON Connection
+FOR EACH ROW
+    UPDATE Stats_Counter SET Value = Value - 1 WHERE Name = 'connections'$$
+
+DROP TRIGGER IF EXISTS trg_company_count_ins;
+CREATE TRIGGER trg_company_count_ins AFTER INSERT ON Company
+FOR EACH ROW
+    UPDATE Stats_Counter SET Value = Value + 1 WHERE Name = 'companies'$$
+
+DROP TRIGGER IF EXISTS trg_company_count_del;
+CREATE TRIGGER trg_company_count_del AFTER DELETE ON Company
+FOR EACH ROW
+    UPDATE Stats_Counter SET Value = Value - 1 WHERE Name = 'companies'$$
+
+DROP TRIGGER IF EXISTS trg_school_count_ins;
+CREATE TRIGGER trg_school_count_ins AFTER INSERT ON School
+FOR EACH ROW
+    UPDATE Stats_Counter SET Value = Value + 1 WHERE Name = 'schools'$$
+
+DROP TRIGGER IF EXISTS trg_school_count_del;
+CREATE TRIGGER trg_school_count_del AFTER DELETE ON School
+FOR EACH ROW
+    UPDATE Stats_Counter SET Value = Value - 1 WHERE Name = 'schools'$$
+
+
+
+/* =========================================================
+   Last-contact summary (Last_Contact)
+   ========================================================= */
+DROP PROCEDURE IF EXISTS Refresh_Last_Contact;
+CREATE PROCEDURE Refresh_Last_Contact (
+    IN p_User_N    VARCHAR(100),
+    IN p_Connect_N VARCHAR(100)
+)
+BEGIN
+    -- Rebuild one pair's summary from its conversations.
+    DELETE FROM Last_Contact
+    WHERE User_N    = p_User_N
+      AND Connect_N = p_Connect_N;
+
+    INSERT INTO Last_Contact (User_N, Connect_N, Last_Start, Last_End, Last_Topic, Last_Method, Conversations)
+    SELECT T.User_N, T.Connect_N, T.Start, agg.Last_End, T.Topic, T.Method, agg.Conversations
+    FROM (
+        SELECT MAX(Start) AS Last_Start, MAX(End) AS Last_End, COUNT(*) AS Conversations
+        FROM Talked
+        WHERE User_N    = p_User_N
+          AND Connect_N = p_Connect_N
+    ) agg
+    JOIN Talked T
+      ON T.User_N    = p_User_N
+     AND T.Connect_N = p_Connect_N
+     AND T.Start     = agg.Last_Start;
+END$$
+
+DROP PROCEDURE IF EXISTS Refresh_Last_Contacts;
+CREATE PROCEDURE Refresh_Last_Contacts ()
+BEGIN
+    -- Rebuild every summary; used after bulk loads or to repair drift.
+    DELETE FROM Last_Contact;
+
+    INSERT INTO Last_Contact (User_N, Connect_N, Last_Start, Last_End, Last_Topic, Last_Method, Conversations)
+    SELECT T.User_N, T.Connect_N, T.Start, agg.Last_End, T.Topic, T.Method, agg.Conversations
+    FROM (
+        SELECT User_N, Connect_N, MAX(Start) AS Last_Start, MAX(End) AS Last_End, COUNT(*) AS Conversations
+        FROM Talked
+        GROUP BY User_N, Connect_N
+    ) agg
+    JOIN Talked T
+      ON T.User_N    = agg.User_N
+     AND T.Connect_N = agg.Connect_N
+     AND T.Start     = agg.Last_Start;
+
+    CALL Bump_Table_Versions('Last_Contact');
+END$$
+
+DROP PROCEDURE IF EXISTS Stale_Contacts;
+CREATE PROCEDURE Stale_Contacts (
+    IN p_User_N VARCHAR(100),
+    IN p_Before DATETIME,
+    IN p_Limit  INT
+)
+BEGIN
+    -- Connections not spoken to since p_Before, longest-neglected first. A
+    -- conversation with no recorded end counts from its start (Last_Seen),
+    -- so this is a range scan of idx_lastcontact_stale (User_N, Last_Seen).
+    SELECT Connect_N, Last_Start, Last_End, Last_Topic, Last_Method, Conversations
+    FROM Last_Contact
+    WHERE User_N = p_User_N
+      AND Last_Seen < p_Before
+    ORDER BY Last_Seen
+    LIMIT p_Limit;
+END$$
+
+
+/* =========================================================
+   Read models (Work_View, Education_View)
+   ========================================================= */
+DROP PROCEDURE IF EXISTS Refresh_Work_View_Row;
+CREATE PROCEDURE Refresh_Work_View_Row (
+    IN p_Name  VARCHAR(100),
+    IN p_Org_N VARCHAR(150)
+)
+BEGIN
+    -- Re-derive one Worked row's read-model row (or drop it if the job is gone).
+    DELETE FROM Work_View WHERE Name = p_Name AND Org_N = p_Org_N;
+
+    INSERT INTO Work_View (Name, Org_N, Start, End, Role, Department, Location, City,
+                           OrgAddress, Industry, Stock, Num_Employees)
+    SELECT w.Name, w.Org_N, w.Start, w.End, w.Role, w.Department, w.Location, w.City,
+           o.Address, c.Industry, c.Stock, c.Num_Employees
+    FROM Worked w
+    JOIN Organization o ON w.Org_N = o.Name
+    LEFT JOIN Company c ON o.Name = c.Org_N AND o.Address = c.Org_A
+    WHERE w.Name = p_Name
+      AND w.Org_N = p_Org_N;
+END$$
+
+DROP PROCEDURE IF EXISTS Refresh_Work_View_Org;
+CREATE PROCEDURE Refresh_Work_View_Org (
+    IN p_Org_N VARCHAR(150)
+)
+BEGIN
+    -- Copy an organization's (and its company's) columns onto its jobs.
+    UPDATE Work_View wv
+    JOIN Organization o ON o.Name = wv.Org_N
+    LEFT JOIN Company c ON o.Name = c.Org_N AND o.Address = c.Org_A
+    SET wv.OrgAddress    = o.Address,
+        wv.Industry      = c.Industry,
+        wv.Stock         = c.Stock,
+        wv.Num_Employees = c.Num_Employees
+    WHERE wv.Org_N = p_Org_N;
+END$$
+
+DROP PROCEDURE IF EXISTS Refresh_Education_View_Row;
+CREATE PROCEDURE Refresh_Education_View_Row (
+    IN p_Name     VARCHAR(100),
+    IN p_School_N VARCHAR(150)
+)
+BEGIN
+    -- Re-derive one Went_To row's read-model row (or drop it if it is gone).
+    DELETE FROM Education_View WHERE Name = p_Name AND School_N = p_School_N;
+
+    INSERT INTO Education_View (Name, School_N, Type, Subject, Graduation, PersonType,
+                                SchoolAddress, Enrollment, Ranking)
+    SELECT wt.Name, wt.School_N, wt.Type, wt.Subject, wt.Graduation,
+           CASE
+               WHEN EXISTS (SELECT 1 FROM User u WHERE u.Name = wt.Name) THEN 'User'
+               WHEN EXISTS (SELECT 1 FROM Connection c WHERE c.Name = wt.Name) THEN 'Connection'
+               ELSE 'Unknown'
+           END,
+           o.Address, s.Enrollment, s.Ranking
+    FROM Went_To wt
+    JOIN School s ON wt.School_N = s.Org_N
+    JOIN Organization o ON s.Org_N = o.Name AND s.Org_A = o.Address
+    WHERE wt.Name = p_Name
+      AND wt.School_N = p_School_N;
+END$$
+
+DROP PROCEDURE IF EXISTS Refresh_Education_View_Person;
+CREATE PROCEDURE Refresh_Education_View_Person (
+    IN p_Name VARCHAR(100)
+)
+BEGIN
+    -- A user or connection with this name was added or removed.
+    UPDATE Education_View
+    SET PersonType = CASE
+            WHEN EXISTS (SELECT 1 FROM User u WHERE u.Name = p_Name) THEN 'User'
+            WHEN EXISTS (SELECT 1 FROM Connection c WHERE c.Name = p_Name) THEN 'Connection'
+            ELSE 'Unknown'
+        END
+    WHERE Name = p_Name;
+END$$
+
+DROP PROCEDURE IF EXISTS Refresh_Education_View_School;
+CREATE PROCEDURE Refresh_Education_View_School (
+    IN p_School_N VARCHAR(150)
+)
+BEGIN
+    -- Re-derive every Went_To row at this school. The join on the school's
+    -- address can start or stop matching, so rows may appear or disappear.
+    DELETE FROM Education_View WHERE School_N = p_School_N;
+
+    INSERT INTO Education_View (Name, School_N, Type, Subject, Graduation, PersonType,
+                                SchoolAddress, Enrollment, Ranking)
+    SELECT wt.Name, wt.School_N, wt.Type, wt.Subject, wt.Graduation,
+           CASE
+               WHEN EXISTS (SELECT 1 FROM User u WHERE u.Name = wt.Name) THEN 'User'
+               WHEN EXISTS (SELECT 1 FROM Connection c WHERE c.Name = wt.Name) THEN 'Connection'
+               ELSE 'Unknown'
+           END,
+           o.Address, s.Enrollment, s.Ranking
+    FROM Went_To wt
+    JOIN School s ON wt.School_N = s.Org_N
+    JOIN Organization o ON s.Org_N = o.Name AND s.Org_A = o.Address
+    WHERE wt.School_N = p_School_N;
+END$$
+
+DROP PROCEDURE IF EXISTS Refresh_Read_Models;
+CREATE PROCEDURE Refresh_Read_Models ()
+BEGIN
+    -- Rebuild both read models; used after bulk loads or to repair drift
+    -- (flask check-read-models --repair).
+    DELETE FROM Work_View;
+
+    INSERT INTO Work_View (Name, Org_N, Start, End, Role, Department, Location, City,
+                           OrgAddress, Industry, Stock, Num_Employees)
+    SELECT w.Name, w.Org_N, w.Start, w.End, w.Role, w.Department, w.Location, w.City,
+           o.Address, c.Industry, c.Stock, c.Num_Employees
+    FROM Worked w
+    JOIN Organization o ON w.Org_N = o.Name
+    LEFT JOIN Company c ON o.Name = c.Org_N AND o.Address = c.Org_A;
+
+    DELETE FROM Education_View;
+
+    INSERT INTO Education_View (Name, School_N, Type, Subject, Graduation, PersonType,
+                                SchoolAddress, Enrollment, Ranking)
+    SELECT wt.Name, wt.School_N, wt.Type, wt.Subject, wt.Graduation,
+           CASE
+               WHEN u.Name IS NOT NULL THEN 'User'
+               WHEN c.Name IS NOT NULL THEN 'Connection'
+               ELSE 'Unknown'
+           END,
+           o.Address, s.Enrollment, s.Ranking
+    FROM Went_To wt
+    LEFT JOIN User u ON wt.Name = u.Name
+    LEFT JOIN Connection c ON wt.Name = c.Name
+    JOIN School s ON wt.School_N = s.Org_N
+    JOIN Organization o ON s.Org_N = o.Name AND s.Org_A = o.Address;
+
+    -- The pages' ETags are keyed on the base tables.
+    CALL Bump_Table_Versions('Worked,Went_To');
+END$$
+
+-- Jobs and education rows: re-derive the row on insert/update, drop it on delete.
+DROP TRIGGER IF EXISTS trg_worked_view_ins;
+CREATE TRIGGER trg_worked_view_ins AFTER INSERT ON Worked
+FOR EACH ROW
+    CALL Refresh_Work_View_Row(NEW.Name, NEW.Org_N)$$
+
+DROP TRIGGER IF EXISTS trg_worked_view_upd;
+CREATE TRIGGER trg_worked_view_upd AFTER UPDATE ON Worked
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.Name <=> NEW.Name AND OLD.Org_N <=> NEW.Org_N) THEN
+        CALL Refresh_Work_View_Row(OLD.Name, OLD.Org_N);
+    END IF;
+    CALL Refresh_Work_View_Row(NEW.Name, NEW.Org_N);
+END$$
+
+DROP TRIGGER IF EXISTS trg_worked_view_del;
+CREATE TRIGGER trg_worked_view_del AFTER DELETE ON Worked
+FOR EACH ROW
+    DELETE FROM Work_View WHERE Name = OLD.Name AND Org_N = OLD.Org_N$$
+
+DROP TRIGGER IF EXISTS trg_went_to_view_ins;
+CREATE TRIGGER trg_went_to_view_ins AFTER INSERT ON Went_To
+FOR EACH ROW
+    CALL Refresh_Education_View_Row(NEW.Name, NEW.School_N)$$
+
+DROP TRIGGER IF EXISTS trg_went_to_view_upd;
+CREATE TRIGGER trg_went_to_view_upd AFTER UPDATE ON Went_To
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.Name <=> NEW.Name AND OLD.School_N <=> NEW.School_N) THEN
+        CALL Refresh_Education_View_Row(OLD.Name, OLD.School_N);
+    END IF;
+    CALL Refresh_Education_View_Row(NEW.Name, NEW.School_N);
+END$$
+
+DROP TRIGGER IF EXISTS trg_went_to_view_del;
+CREATE TRIGGER trg_went_to_view_del AFTER DELETE ON Went_To
+FOR EACH ROW
+    DELETE FROM Education_View WHERE Name = OLD.Name AND School_N = OLD.School_N$$
+
+-- Joined-in tables. Inserts and deletes of organizations and schools need no
+-- trigger: the foreign keys keep them from having jobs or students at the time.
+DROP TRIGGER IF EXISTS trg_organization_view_upd;
+CREATE TRIGGER trg_organization_view_upd AFTER UPDATE ON Organization
+FOR EACH ROW
+BEGIN
+    CALL Refresh_Work_View_Org(NEW.Name);
+    CALL Refresh_Education_View_School(NEW.Name);
+END$$
+
+DROP TRIGGER IF EXISTS trg_company_view_ins;
+CREATE TRIGGER trg_company_view_ins AFTER INSERT ON Company
+FOR EACH ROW
+    CALL Refresh_Work_View_Org(NEW.Org_N)$$
+
+DROP TRIGGER IF EXISTS trg_company_view_upd;
+CREATE TRIGGER trg_company_view_upd AFTER UPDATE ON Company
+FOR EACH ROW
+    CALL Refresh_Work_View_Org(NEW.Org_N)$$
+
+DROP TRIGGER IF EXISTS trg_company_view_del;
+CREATE TRIGGER trg_company_view_del AFTER DELETE ON Company
+FOR EACH ROW
+    CALL Refresh_Work_View_Org(OLD.Org_N)$$
+
+DROP TRIGGER IF EXISTS trg_school_view_upd;
+CREATE TRIGGER trg_school_view_upd AFTER UPDATE ON School
+FOR EACH ROW
+    CALL Refresh_Education_View_School(NEW.Org_N)$$
+
+-- PersonType depends on whether the name is a user, a connection or neither.
+DROP TRIGGER IF EXISTS trg_user_view_ins;
+CREATE TRIGGER trg_user_view_ins AFTER INSERT ON User
+FOR EACH ROW
+    CALL Refresh_Education_View_Person(NEW.Name)$$
+
+DROP TRIGGER IF EXISTS trg_user_view_del;
+CREATE TRIGGER trg_user_view_del AFTER DELETE ON User
+FOR EACH ROW
+    CALL Refresh_Education_View_Person(OLD.Name)$$
+
+DROP TRIGGER IF EXISTS trg_connection_view_ins;
+CREATE TRIGGER trg_connection_view_ins AFTER INSERT ON Connection
+FOR EACH ROW
+    CALL Refresh_Education_View_Person(NEW.Name)$$
+
+DROP TRIGGER IF EXISTS trg_connection_view_del;
+CREATE TRIGGER trg_connection_view_del AFTER DELETE ON Connection
+FOR EACH ROW
+    CALL Refresh_Education_View_Person(OLD.Name)$$
+
+
+/* =========================================================
+   Change log (Change_Log)
+   ========================================================= */
+-- One row per inserted, updated or deleted row of the tables below, written in
+-- the same transaction as the change; changefeed.py tails it by Seq.
+
+DROP TRIGGER IF EXISTS trg_user_cdc_ins;
+CREATE TRIGGER trg_user_cdc_ins AFTER INSERT ON User
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('User', 'I', JSON_OBJECT('Name', NEW.Name), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_user_cdc_upd;
+CREATE TRIGGER trg_user_cdc_upd AFTER UPDATE ON User
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('User', 'U', JSON_OBJECT('Name', NEW.Name), JSON_OBJECT('Name', OLD.Name))$$
+
+DROP TRIGGER IF EXISTS trg_user_cdc_del;
+CREATE TRIGGER trg_user_cdc_del AFTER DELETE ON User
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('User', 'D', JSON_OBJECT('Name', OLD.Name), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_userc_cdc_ins;
+CREATE TRIGGER trg_userc_cdc_ins AFTER INSERT ON UserC
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('UserC', 'I', JSON_OBJECT('Name', NEW.Name), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_userc_cdc_upd;
+CREATE TRIGGER trg_userc_cdc_upd AFTER UPDATE ON UserC
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('UserC', 'U', JSON_OBJECT('Name', NEW.Name), JSON_OBJECT('Name', OLD.Name))$$
+
+DROP TRIGGER IF EXISTS trg_userc_cdc_del;
+CREATE TRIGGER trg_userc_cdc_del AFTER DELETE ON UserC
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('UserC', 'D', JSON_OBJECT('Name', OLD.Name), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_connection_cdc_ins;
+CREATE TRIGGER trg_connection_cdc_ins AFTER INSERT ON Connection
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Connection', 'I', JSON_OBJECT('Name', NEW.Name), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_connection_cdc_upd;
+CREATE TRIGGER trg_connection_cdc_upd AFTER UPDATE ON Connection
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Connection', 'U', JSON_OBJECT('Name', NEW.Name), JSON_OBJECT('Name', OLD.Name))$$
+
+DROP TRIGGER IF EXISTS trg_connection_cdc_del;
+CREATE TRIGGER trg_connection_cdc_del AFTER DELETE ON Connection
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Connection', 'D', JSON_OBJECT('Name', OLD.Name), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_connectionc_cdc_ins;
+CREATE TRIGGER trg_connectionc_cdc_ins AFTER INSERT ON ConnectionC
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('ConnectionC', 'I', JSON_OBJECT('Name', NEW.Name), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_connectionc_cdc_upd;
+CREATE TRIGGER trg_connectionc_cdc_upd AFTER UPDATE ON ConnectionC
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('ConnectionC', 'U', JSON_OBJECT('Name', NEW.Name), JSON_OBJECT('Name', OLD.Name))$$
+
+DROP TRIGGER IF EXISTS trg_connectionc_cdc_del;
+CREATE TRIGGER trg_connectionc_cdc_del AFTER DELETE ON ConnectionC
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('ConnectionC', 'D', JSON_OBJECT('Name', OLD.Name), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_organization_cdc_ins;
+CREATE TRIGGER trg_organization_cdc_ins AFTER INSERT ON Organization
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Organization', 'I', JSON_OBJECT('Name', NEW.Name, 'Address', NEW.Address), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_organization_cdc_upd;
+CREATE TRIGGER trg_organization_cdc_upd AFTER UPDATE ON Organization
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Organization', 'U', JSON_OBJECT('Name', NEW.Name, 'Address', NEW.Address), JSON_OBJECT('Name', OLD.Name, 'Address', OLD.Address))$$
+
+DROP TRIGGER IF EXISTS trg_organization_cdc_del;
+CREATE TRIGGER trg_organization_cdc_del AFTER DELETE ON Organization
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Organization', 'D', JSON_OBJECT('Name', OLD.Name, 'Address', OLD.Address), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_company_cdc_ins;
+CREATE TRIGGER trg_company_cdc_ins AFTER INSERT ON Company
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Company', 'I', JSON_OBJECT('Org_N', NEW.Org_N, 'Org_A', NEW.Org_A), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_company_cdc_upd;
+CREATE TRIGGER trg_company_cdc_upd AFTER UPDATE ON Company
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Company', 'U', JSON_OBJECT('Org_N', NEW.Org_N, 'Org_A', NEW.Org_A), JSON_OBJECT('Org_N', OLD.Org_N, 'Org_A', OLD.Org_A))$$
+
+DROP TRIGGER IF EXISTS trg_company_cdc_del;
+CREATE TRIGGER trg_company_cdc_del AFTER DELETE ON Company
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Company', 'D', JSON_OBJECT('Org_N', OLD.Org_N, 'Org_A', OLD.Org_A), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_school_cdc_ins;
+CREATE TRIGGER trg_school_cdc_ins AFTER INSERT ON School
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('School', 'I', JSON_OBJECT('Org_N', NEW.Org_N, 'Org_A', NEW.Org_A), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_school_cdc_upd;
+CREATE TRIGGER trg_school_cdc_upd AFTER UPDATE ON School
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('School', 'U', JSON_OBJECT('Org_N', NEW.Org_N, 'Org_A', NEW.Org_A), JSON_OBJECT('Org_N', OLD.Org_N, 'Org_A', OLD.Org_A))$$
+
+DROP TRIGGER IF EXISTS trg_school_cdc_del;
+CREATE TRIGGER trg_school_cdc_del AFTER DELETE ON School
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('School', 'D', JSON_OBJECT('Org_N', OLD.Org_N, 'Org_A', OLD.Org_A), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_makes_cdc_ins;
+CREATE TRIGGER trg_makes_cdc_ins AFTER INSERT ON Makes
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Makes', 'I', JSON_OBJECT('User_N', NEW.User_N, 'Job', NEW.Job, 'Posted', NEW.Posted), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_makes_cdc_upd;
+CREATE TRIGGER trg_makes_cdc_upd AFTER UPDATE ON Makes
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Makes', 'U', JSON_OBJECT('User_N', NEW.User_N, 'Job', NEW.Job, 'Posted', NEW.Posted), JSON_OBJECT('User_N', OLD.User_N, 'Job', OLD.Job, 'Posted', OLD.Posted))$$
+
+DROP TRIGGER IF EXISTS trg_makes_cdc_del;
+CREATE TRIGGER trg_makes_cdc_del AFTER DELETE ON Makes
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Makes', 'D', JSON_OBJECT('User_N', OLD.User_N, 'Job', OLD.Job, 'Posted', OLD.Posted), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_worked_cdc_ins;
+CREATE TRIGGER trg_worked_cdc_ins AFTER INSERT ON Worked
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Worked', 'I', JSON_OBJECT('Name', NEW.Name, 'Org_N', NEW.Org_N), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_worked_cdc_upd;
+CREATE TRIGGER trg_worked_cdc_upd AFTER UPDATE ON Worked
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Worked', 'U', JSON_OBJECT('Name', NEW.Name, 'Org_N', NEW.Org_N), JSON_OBJECT('Name', OLD.Name, 'Org_N', OLD.Org_N))$$
+
+DROP TRIGGER IF EXISTS trg_worked_cdc_del;
+CREATE TRIGGER trg_worked_cdc_del AFTER DELETE ON Worked
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Worked', 'D', JSON_OBJECT('Name', OLD.Name, 'Org_N', OLD.Org_N), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_went_to_cdc_ins;
+CREATE TRIGGER trg_went_to_cdc_ins AFTER INSERT ON Went_To
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Went_To', 'I', JSON_OBJECT('Name', NEW.Name, 'School_N', NEW.School_N), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_went_to_cdc_upd;
+CREATE TRIGGER trg_went_to_cdc_upd AFTER UPDATE ON Went_To
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Went_To', 'U', JSON_OBJECT('Name', NEW.Name, 'School_N', NEW.School_N), JSON_OBJECT('Name', OLD.Name, 'School_N', OLD.School_N))$$
+
+DROP TRIGGER IF EXISTS trg_went_to_cdc_del;
+CREATE TRIGGER trg_went_to_cdc_del AFTER DELETE ON Went_To
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Went_To', 'D', JSON_OBJECT('Name', OLD.Name, 'School_N', OLD.School_N), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_talked_cdc_ins;
+CREATE TRIGGER trg_talked_cdc_ins AFTER INSERT ON Talked
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Talked', 'I', JSON_OBJECT('User_N', NEW.User_N, 'Connect_N', NEW.Connect_N, 'Start', NEW.Start), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_talked_cdc_upd;
+CREATE TRIGGER trg_talked_cdc_upd AFTER UPDATE ON Talked
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Talked', 'U', JSON_OBJECT('User_N', NEW.User_N, 'Connect_N', NEW.Connect_N, 'Start', NEW.Start), JSON_OBJECT('User_N', OLD.User_N, 'Connect_N', OLD.Connect_N, 'Start', OLD.Start))$$
+
+DROP TRIGGER IF EXISTS trg_talked_cdc_del;
+CREATE TRIGGER trg_talked_cdc_del AFTER DELETE ON Talked
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Talked', 'D', JSON_OBJECT('User_N', OLD.User_N, 'Connect_N', OLD.Connect_N, 'Start', OLD.Start), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_last_contact_cdc_ins;
+CREATE TRIGGER trg_last_contact_cdc_ins AFTER INSERT ON Last_Contact
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Last_Contact', 'I', JSON_OBJECT('User_N', NEW.User_N, 'Connect_N', NEW.Connect_N), NULL)$$
+
+DROP TRIGGER IF EXISTS trg_last_contact_cdc_upd;
+CREATE TRIGGER trg_last_contact_cdc_upd AFTER UPDATE ON Last_Contact
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Last_Contact', 'U', JSON_OBJECT('User_N', NEW.User_N, 'Connect_N', NEW.Connect_N), JSON_OBJECT('User_N', OLD.User_N, 'Connect_N', OLD.Connect_N))$$
+
+DROP TRIGGER IF EXISTS trg_last_contact_cdc_del;
+CREATE TRIGGER trg_last_contact_cdc_del AFTER DELETE ON Last_Contact
+FOR EACH ROW
+    INSERT INTO Change_Log (Table_Name, Op, Row_Key, Old_Key)
+    VALUES ('Last_Contact', 'D', JSON_OBJECT('User_N', OLD.User_N, 'Connect_N', OLD.Connect_N), NULL)$$
+
+
+/* =========================================================
+   Table versions (Table_Version)
+   ========================================================= */
+DROP PROCEDURE IF EXISTS Bump_Table_Versions;
+CREATE PROCEDURE Bump_Table_Versions (
+    IN p_Tables VARCHAR(255)
+)
+BEGIN
+    -- p_Tables is a comma-separated list of table names, e.g. 'Talked,Worked'.
+    UPDATE Table_Version
+    SET Version = Version + 1,
+        Updated = CURRENT_TIMESTAMP(6)
+    WHERE FIND_IN_SET(Name, p_Tables);
 END$$
 
 DELIMITER ;
+
+-- Seed the counters, summaries, parsed cities and read models from whatever data is already loaded.
+CALL Refresh_Stats_Counters();
+CALL Refresh_Last_Contacts();
+CALL Backfill_Cities(1000);
+CALL Refresh_Read_Models();
@@ -43,7 +43,7 @@ INSERT INTO Makes VALUES
 ('David Lee', 'DevOps Engineer', '2025-03-01', '2025-03-15',
  '2025-02-20 14:15:00', 1, 1, 'Henry Patel');
 
-INSERT INTO Worked VALUES
+INSERT INTO Worked (Name, Org_N, Start, End, Role, Department, Location) VALUES
 ('Alice Johnson', 'Acme Corp', '2022-06-01', '2024-05-31',
  'Junior Engineer','R&D','Springfield'),
 ('Alice Johnson', 'Globex Inc', '2024-06-01', NULL,
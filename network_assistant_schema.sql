@@ -5,6 +5,12 @@ SET time_zone = "+00:00";
 
 -- Logical Database Design — DDL with composite keys
 SET FOREIGN_KEY_CHECKS = 0;
+DROP TABLE IF EXISTS Change_Log;
+DROP TABLE IF EXISTS Education_View;
+DROP TABLE IF EXISTS Work_View;
+DROP TABLE IF EXISTS Table_Version;
+DROP TABLE IF EXISTS Last_Contact;
+DROP TABLE IF EXISTS Stats_Counter;
 DROP TABLE IF EXISTS Talked;
 DROP TABLE IF EXISTS Went_To;
 DROP TABLE IF EXISTS Worked;
@@ -34,7 +40,9 @@ CREATE TABLE UserC (
 CREATE TABLE Connection (
   Name VARCHAR(100) PRIMARY KEY,
   Address VARCHAR(200),
-  Relation VARCHAR(80)
+  Relation VARCHAR(80),
+  -- Parsed from Address by trigger (see Parse_City in network_assistant_functions.sql)
+  City VARCHAR(120)
 ) ENGINE=InnoDB;
 
 CREATE TABLE ConnectionC (
@@ -97,6 +105,8 @@ CREATE TABLE Worked (
   Role VARCHAR(120),
   Department VARCHAR(120),
   Location VARCHAR(120),
+  -- Parsed from Location by trigger (see Parse_City in network_assistant_functions.sql)
+  City VARCHAR(120),
   PRIMARY KEY (Name, Org_N),
   CONSTRAINT fk_worked_org FOREIGN KEY (Org_N) REFERENCES Organization(Name)
 ) ENGINE=InnoDB;
@@ -106,9 +116,10 @@ CREATE TABLE Talked (
   Connect_N VARCHAR(100),
   Topic VARCHAR(200),
   Method VARCHAR(80),
-  Start DATETIME,
+  Start DATETIME NOT NULL,
   End DATETIME,
-  PRIMARY KEY (User_N, Connect_N),
+  -- Full history: any number of conversations per pair, one per start time
+  PRIMARY KEY (User_N, Connect_N, Start),
   CONSTRAINT fk_talked_user FOREIGN KEY (User_N) REFERENCES User(Name),
   CONSTRAINT fk_talked_conn FOREIGN KEY (Connect_N) REFERENCES Connection(Name)
 ) ENGINE=InnoDB;
@@ -123,8 +134,115 @@ CREATE TABLE Went_To (
   CONSTRAINT fk_wentto_school FOREIGN KEY (School_N) REFERENCES School(Org_N)
 ) ENGINE=InnoDB;
 
+-- Dashboard counters, kept current by triggers in network_assistant_functions.sql
+CREATE TABLE Stats_Counter (
+  Name VARCHAR(40) PRIMARY KEY,
+  Value BIGINT NOT NULL DEFAULT 0
+) ENGINE=InnoDB;
+
+INSERT INTO Stats_Counter (Name, Value) VALUES
+('users', 0),
+('connections', 0),
+('companies', 0),
+('schools', 0);
+
+-- Latest conversation per (user, connection), maintained by Add_Connection_By_Talking,
+-- Update_Conversation and Delete_Connection so "last contacted", stale contacts and
+-- the dashboard's recent list are index lookups instead of aggregates over Talked.
+CREATE TABLE Last_Contact (
+  User_N VARCHAR(100),
+  Connect_N VARCHAR(100),
+  Last_Start DATETIME NOT NULL,   -- start of the most recent conversation
+  Last_End DATETIME,              -- MAX(End) over all conversations
+  -- When the pair last spoke: the last end, or the last start if no end was recorded
+  Last_Seen DATETIME AS (COALESCE(Last_End, Last_Start)) STORED,
+  Last_Topic VARCHAR(200),
+  Last_Method VARCHAR(80),
+  Conversations INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (User_N, Connect_N),
+  KEY idx_lastcontact_recent (Last_Start),
+  KEY idx_lastcontact_stale (User_N, Last_Seen),
+  KEY idx_lastcontact_conn (Connect_N)
+) ENGINE=InnoDB;
+
+-- Read models for /work-experience and /education: one row per Worked / Went_To
+-- row with the organization, company, school and person columns those pages
+-- show already joined in, kept current by triggers (see Refresh_Read_Models).
+CREATE TABLE Work_View (
+  Name VARCHAR(100) NOT NULL,
+  Org_N VARCHAR(150) NOT NULL,
+  Start DATE,
+  End DATE,
+  Role VARCHAR(120),
+  Department VARCHAR(120),
+  Location VARCHAR(120),
+  City VARCHAR(120),
+  OrgAddress VARCHAR(200),
+  Industry VARCHAR(80),
+  Stock VARCHAR(50),
+  Num_Employees INT,
+  PRIMARY KEY (Name, Org_N),
+  KEY idx_workview_start (Start, Name, Org_N),
+  KEY idx_workview_org (Org_N)
+) ENGINE=InnoDB;
+
+CREATE TABLE Education_View (
+  Name VARCHAR(100) NOT NULL,
+  School_N VARCHAR(150) NOT NULL,
+  Type VARCHAR(80),
+  Subject VARCHAR(120),
+  Graduation DATE,
+  PersonType VARCHAR(10) NOT NULL,   -- 'User', 'Connection' or 'Unknown'
+  SchoolAddress VARCHAR(200),
+  Enrollment INT,
+  Ranking INT,
+  PRIMARY KEY (Name, School_N),
+  KEY idx_educationview_graduation (Graduation, Name, School_N),
+  KEY idx_educationview_school (School_N)
+) ENGINE=InnoDB;
+
+-- Per-table change counters for HTTP caching (ETag / Last-Modified); bumped by
+-- Bump_Table_Versions() from every write procedure and by the bulk import.
+CREATE TABLE Table_Version (
+  Name VARCHAR(64) PRIMARY KEY,
+  Version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  Updated TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6)
+) ENGINE=InnoDB;
+
+INSERT INTO Table_Version (Name) VALUES
+('User'), ('UserC'), ('Connection'), ('ConnectionC'), ('Organization'), ('Company'),
+('School'), ('Makes'), ('Worked'), ('Went_To'), ('Talked'), ('Last_Contact');
+
+-- Row-level change feed, appended to by the *_cdc_* triggers (one row per
+-- inserted/updated/deleted row) and tailed by Seq from changefeed.py.
+CREATE TABLE Change_Log (
+  Seq BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+  Table_Name VARCHAR(64) NOT NULL,
+  Op CHAR(1) NOT NULL,            -- 'I'nsert, 'U'pdate, 'D'elete
+  Row_Key JSON NOT NULL,          -- primary key of the row (new key for updates)
+  Old_Key JSON,                   -- key before an update
+  Changed_At TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+  KEY idx_changelog_time (Changed_At)
+) ENGINE=InnoDB;
+
 CREATE INDEX idx_makes_user ON Makes(User_N);
 CREATE INDEX idx_worked_org ON Worked(Org_N);
 CREATE INDEX idx_talked_conn ON Talked(Connect_N);
 CREATE INDEX idx_wentto_school ON Went_To(School_N);
+
+-- Keyset pagination indexes: sort key followed by the primary key tie-breakers
+CREATE INDEX idx_talked_start ON Talked(Start, User_N, Connect_N);
+CREATE INDEX idx_worked_start ON Worked(Start, Name, Org_N);
+CREATE INDEX idx_makes_posted ON Makes(Posted, User_N, Job);
+CREATE INDEX idx_wentto_graduation ON Went_To(Graduation, Name, School_N);
+
+-- City lookups for Connections_In_City / Search_Connections_By_Company_Industry_Location
+CREATE INDEX idx_connection_city ON Connection(City);
+CREATE INDEX idx_worked_city ON Worked(City, Name);
+
+-- Full-text indexes backing /search (MATCH ... AGAINST in BOOLEAN MODE)
+CREATE FULLTEXT INDEX ft_user_search ON User(Name, Address);
+CREATE FULLTEXT INDEX ft_connection_search ON Connection(Name, Address, Relation);
+CREATE FULLTEXT INDEX ft_org_name ON Organization(Name);
+CREATE FULLTEXT INDEX ft_company_industry ON Company(Industry);
 COMMIT;
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""Keyset (cursor) pagination for the list pages."""
+import base64
+import json
+from datetime import date, datetime
+
+from db import execute_query
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def page_size(value):
+    """Parse a ?limit= argument, clamped to 1..MAX_PAGE_SIZE."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return ['dt', value.isoformat()]
+    if isinstance(value, date):
+        return ['d', value.isoformat()]
+    return ['v', value]
+
+
+def _decode_value(item):
+    kind, value = item
+    if value is None:
+        return None
+    if kind == 'dt':
+        return datetime.fromisoformat(value)
+    if kind == 'd':
+        return date.fromisoformat(value)
+    return value
+
+
+def encode_cursor(values):
+    """Turn a row's sort-key values into an opaque URL-safe token."""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, expected_len):
+    """Inverse of encode_cursor; returns None for a missing or malformed token."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        items = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(item) for item in items]
+    except (ValueError, TypeError):
+        return None
+    if len(values) != expected_len:
+        return None
+    return values
+
+
+def _keyset_predicate(sort_keys, values, forward):
+    """
+    Build "row comes strictly after `values`" for the given sort keys.
+
+    Expands to a OR (a = x AND b) ... so MySQL can use a range scan on the
+    matching index. NULLs sort first in MySQL, so a nullable key moving
+    towards smaller values also has to admit NULL rows.
+    """
+    clauses = []
+    params = []
+    equal_sql = []
+    equal_params = []
+
+    for (column, _field, direction, nullable), value in zip(sort_keys, values):
+        descending = (direction == 'DESC') == forward
+        op = '<' if descending else '>'
+
+        if value is None:
+            # Inside the NULL group: only non-NULL rows can follow, and only
+            # when travelling towards larger values.
+            after_sql = None if descending else f"{column} IS NOT NULL"
+            after_params = []
+        else:
+            after_sql = f"{column} {op} %s"
+            after_params = [value]
+            if nullable and descending:
+                after_sql = f"({after_sql} OR {column} IS NULL)"
+
+        if after_sql:
+            clauses.append(' AND '.join(equal_sql + [after_sql]))
+            params.extend(equal_params + after_params)
+
+        if value is None:
+            equal_sql.append(f"{column} IS NULL")
+        else:
+            equal_sql.append(f"{column} = %s")
+            equal_params.append(value)
+
+    if not clauses:
+        return '1 = 0', []
+    return '(' + ' OR '.join(f"({c})" for c in clauses) + ')', params
+
+
+def filter_conditions(args, allowed):
+    """
+    Map optional equality filters from the query string onto SQL.
+
+    `allowed` maps request argument names to column expressions.
+    Returns (conditions, params, active_filters).
+    """
+    conditions = []
+    params = []
+    active = {}
+    for arg, column in allowed.items():
+        value = (args.get(arg) or '').strip()
+        if value:
+            conditions.append(f"{column} = %s")
+            params.append(value)
+            active[arg] = value
+    return conditions, params, active
+
+
+def keyset_page(select_sql, sort_keys, conditions=None, params=(),
+                after=None, before=None, limit=DEFAULT_PAGE_SIZE, columns=False):
+    """
+    Run one page of `select_sql` ordered by `sort_keys`.
+
+    `select_sql` is a SELECT ... FROM ... JOIN ... without WHERE/ORDER BY.
+    `sort_keys` is a list of (column, row_field, 'ASC'|'DESC', nullable)
+    and must end in a unique key so every row has a distinct position.
+    Returns {'rows', 'next', 'prev', 'limit'}; next/prev are cursor tokens
+    (or None at either end of the result). With columns=True the rows are
+    tuples and the page also carries their 'columns'.
+    """
+    conditions = list(conditions or [])
+    params = list(params)
+
+    cursor_values = decode_cursor(before, len(sort_keys))
+    forward = cursor_values is None
+    if forward:
+        cursor_values = decode_cursor(after, len(sort_keys))
+
+    if cursor_values is not None:
+        predicate, predicate_params = _keyset_predicate(sort_keys, cursor_values, forward)
+        conditions.append(predicate)
+        params.extend(predicate_params)
+
+    order = []
+    for column, _field, direction, _nullable in sort_keys:
+        if not forward:
+            direction = 'ASC' if direction == 'DESC' else 'DESC'
+        order.append(f"{column} {direction}")
+
+    sql = select_sql
+    if conditions:
+        sql += "\nWHERE " + "\n  AND ".join(conditions)
+    sql += "\nORDER BY " + ", ".join(order) + "\nLIMIT %s"
+
+    result = execute_query(sql, tuple(params) + (limit + 1,), columns=columns)
+    if result is None:
+        return None
+    if columns:
+        names, rows = result
+        positions = {name: i for i, name in enumerate(names)}
+    else:
+        rows = result
+        positions = None
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not forward:
+        rows.reverse()
+
+    def token(row):
+        return encode_cursor([row[positions[field] if positions else field]
+                              for _c, field, _d, _n in sort_keys])
+
+    next_token = prev_token = None
+    if rows:
+        if forward:
+            next_token = token(rows[-1]) if has_more else None
+            prev_token = token(rows[0]) if cursor_values is not None else None
+        else:
+            prev_token = token(rows[0]) if has_more else None
+            next_token = token(rows[-1])
+
+    page = {'rows': rows, 'next': next_token, 'prev': prev_token, 'limit': limit}
+    if columns:
+        page['columns'] = list(names)
+    return page
@@ -0,0 +1,88 @@
+"""
+Consistency checks for the Work_View / Education_View read models.
+
+Each read model is compared with the join it materializes (the queries the
+/work-experience and /education pages used to run): rows missing from the
+read model, rows it has that the base tables don't, and rows whose columns
+differ. Refresh_Read_Models() rebuilds both from scratch.
+"""
+from db import execute_query
+
+SAMPLE_SIZE = 5
+
+READ_MODELS = {
+    'Work_View': {
+        'key': ('Name', 'Org_N'),
+        'columns': ('Start', 'End', 'Role', 'Department', 'Location', 'City',
+                    'OrgAddress', 'Industry', 'Stock', 'Num_Employees'),
+        'source': """
+            SELECT w.Name, w.Org_N, w.Start, w.End, w.Role, w.Department, w.Location, w.City,
+                   o.Address AS OrgAddress, c.Industry, c.Stock, c.Num_Employees
+            FROM Worked w
+            JOIN Organization o ON w.Org_N = o.Name
+            LEFT JOIN Company c ON o.Name = c.Org_N AND o.Address = c.Org_A
+        """,
+    },
+    'Education_View': {
+        'key': ('Name', 'School_N'),
+        'columns': ('Type', 'Subject', 'Graduation', 'PersonType',
+                    'SchoolAddress', 'Enrollment', 'Ranking'),
+        'source': """
+            SELECT wt.Name, wt.School_N, wt.Type, wt.Subject, wt.Graduation,
+                   CASE
+                       WHEN u.Name IS NOT NULL THEN 'User'
+                       WHEN c.Name IS NOT NULL THEN 'Connection'
+                       ELSE 'Unknown'
+                   END AS PersonType,
+                   o.Address AS SchoolAddress, s.Enrollment, s.Ranking
+            FROM Went_To wt
+            LEFT JOIN User u ON wt.Name = u.Name
+            LEFT JOIN Connection c ON wt.Name = c.Name
+            JOIN School s ON wt.School_N = s.Org_N
+            JOIN Organization o ON s.Org_N = o.Name AND s.Org_A = o.Address
+        """,
+    },
+}
+
+
+def _queries(view, spec):
+    """(from/where clause, selected key columns) for each kind of drift."""
+    on = " AND ".join(f"v.{column} = src.{column}" for column in spec['key'])
+    same = " AND ".join(f"v.{column} <=> src.{column}" for column in spec['columns'])
+    source = f"({spec['source']}) src"
+    return {
+        'missing': (f"FROM {source} LEFT JOIN {view} v ON {on} WHERE v.{spec['key'][0]} IS NULL", 'src'),
+        'extra': (f"FROM {view} v LEFT JOIN {source} ON {on} WHERE src.{spec['key'][0]} IS NULL", 'v'),
+        'different': (f"FROM {view} v JOIN {source} ON {on} WHERE NOT ({same})", 'v'),
+    }
+
+
+def check(sample_size=SAMPLE_SIZE):
+    """
+    Compare every read model with its base tables. Returns
+    {view: {kind: {'count': n, 'sample': [key, ...]}}}, or None if the
+    database is unavailable.
+    """
+    report = {}
+    for view, spec in READ_MODELS.items():
+        report[view] = {}
+        for kind, (clause, alias) in _queries(view, spec).items():
+            counted = execute_query(f"SELECT COUNT(*) AS n {clause}", primary=True)
+            if counted is None:
+                return None
+            sample = []
+            if counted[0]['n']:
+                keys = ", ".join(f"{alias}.{column}" for column in spec['key'])
+                sample = execute_query(f"SELECT {keys} {clause} LIMIT %s", (sample_size,), primary=True) or []
+            report[view][kind] = {'count': counted[0]['n'], 'sample': sample}
+    return report
+
+
+def drift(report):
+    """Total number of inconsistent rows in a check() report."""
+    return sum(result['count'] for kinds in report.values() for result in kinds.values())
+
+
+def rebuild():
+    """Rebuild every read model from the base tables; returns False on error."""
+    return execute_query("CALL Refresh_Read_Models()", fetch=False, primary=True) is not None
@@ -0,0 +1,94 @@
+"""Cached reference lists for form dropdowns, plus typeahead lookups."""
+import os
+import threading
+import time
+
+from db import execute_query
+from statements import Statement
+from table_versions import table_versions
+
+# Upper bound on staleness from writes made by other worker processes.
+REFDATA_TTL = float(os.getenv('REFDATA_TTL', 60))
+
+TYPEAHEAD_LIMIT = 10
+
+# name -> (statement, tables it reads)
+REFERENCE_LISTS = {
+    'users': (Statement('users', "SELECT Name FROM User ORDER BY Name"), ('User',)),
+}
+
+# kind -> statement for prefix lookups; LIKE 'prefix%' is a range scan on the Name keys.
+TYPEAHEAD_QUERIES = {
+    'users': Statement('typeahead_users', "SELECT Name FROM User WHERE Name LIKE %s ORDER BY Name LIMIT %s"),
+    'connections': Statement('typeahead_connections',
+                             "SELECT Name FROM Connection WHERE Name LIKE %s ORDER BY Name LIMIT %s"),
+    'people': Statement('typeahead_people', """
+        SELECT Name FROM (
+            (SELECT Name FROM Connection WHERE Name LIKE %s ORDER BY Name LIMIT %s)
+            UNION
+            (SELECT Name FROM User WHERE Name LIKE %s ORDER BY Name LIMIT %s)
+        ) people
+        ORDER BY Name
+        LIMIT %s
+    """),
+    'organizations': Statement('typeahead_organizations',
+                               "SELECT Name FROM Organization WHERE Name LIKE %s ORDER BY Name LIMIT %s"),
+}
+
+
+class ReferenceCache:
+    """
+    Process-local cache of the REFERENCE_LISTS.
+
+    Each entry remembers the table versions it was loaded at; a change to
+    any of those tables (see table_versions) makes the next get() reload it.
+    Callers must treat the returned rows as read-only.
+    """
+
+    def __init__(self, ttl=REFDATA_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, name):
+        sql, tables = REFERENCE_LISTS[name]
+        table_versions.sync()
+        versions = table_versions.get(*tables)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry and entry[0] == versions and time.monotonic() < entry[1]:
+                return entry[2]
+
+        # Read from the primary: the result is cached under the current
+        # versions, so it must already include the writes that produced them.
+        rows = execute_query(sql, primary=True)
+        if rows is None:
+            return []
+
+        with self._lock:
+            # Only keep the result if no write landed while we were loading.
+            if table_versions.get(*tables) == versions:
+                self._entries[name] = (versions, time.monotonic() + self.ttl, rows)
+        return rows
+
+
+reference_data = ReferenceCache()
+
+
+def _like_prefix(text):
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'{escaped}%'
+
+
+def typeahead(kind, prefix, limit=TYPEAHEAD_LIMIT):
+    """Up to `limit` names of the given kind starting with `prefix`."""
+    prefix = (prefix or '').strip()
+    if not prefix or kind not in TYPEAHEAD_QUERIES:
+        return []
+    pattern = _like_prefix(prefix)
+    if kind == 'people':
+        params = (pattern, limit, pattern, limit, limit)
+    else:
+        params = (pattern, limit)
+    rows = execute_query(TYPEAHEAD_QUERIES[kind], params) or []
+    return [row['Name'] for row in rows]
@@ -0,0 +1,235 @@
+"""Full-text search across users, connections and companies, and the network search."""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import statements
+from db import execute_query
+from table_versions import PROCEDURE_READS, table_versions
+
+SEARCH_LIMIT = int(os.getenv('SEARCH_LIMIT', 50))
+
+# Search results kept per worker; entries also expire after SEARCH_CACHE_TTL
+# seconds and whenever a table they read is written (0 disables caching,
+# identical concurrent searches are still coalesced).
+SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', 256))
+SEARCH_CACHE_TTL = float(os.getenv('SEARCH_CACHE_TTL', 60))
+
+# Seconds a request waits for an identical in-flight search before running its own.
+SEARCH_COALESCE_TIMEOUT = 10
+
+SEARCH_TABLES = ('User', 'Connection', 'Organization', 'Company')
+NETWORK_SEARCH_TABLES = PROCEDURE_READS['Search_Connections_By_Company_Industry_Location']
+
+# InnoDB does not index words shorter than innodb_ft_min_token_size.
+MIN_TOKEN_SIZE = int(os.getenv('SEARCH_MIN_TOKEN_SIZE', 3))
+
+# One statement, one round trip. Every branch is driven by a FULLTEXT index
+# (see network_assistant_schema.sql) and capped at the result limit before
+# the union is ranked; company hits by name and by industry are merged so a
+# match on both scores higher.
+FULLTEXT_QUERY = """
+    SELECT type, title, subtitle, extra, SUM(score) AS score
+    FROM (
+        (SELECT 'User' AS type, Name AS title, Address AS subtitle, NULL AS extra,
+                MATCH(Name, Address) AGAINST (%(q)s IN BOOLEAN MODE) AS score
+         FROM User
+         WHERE MATCH(Name, Address) AGAINST (%(q)s IN BOOLEAN MODE)
+         ORDER BY score DESC
+         LIMIT %(limit)s)
+        UNION ALL
+        (SELECT 'Connection', Name, Address, Relation,
+                MATCH(Name, Address, Relation) AGAINST (%(q)s IN BOOLEAN MODE) AS score
+         FROM Connection
+         WHERE MATCH(Name, Address, Relation) AGAINST (%(q)s IN BOOLEAN MODE)
+         ORDER BY score DESC
+         LIMIT %(limit)s)
+        UNION ALL
+        (SELECT 'Company', o.Name, o.Address, c.Industry,
+                MATCH(o.Name) AGAINST (%(q)s IN BOOLEAN MODE) AS score
+         FROM Organization o
+         JOIN Company c ON o.Name = c.Org_N AND o.Address = c.Org_A
+         WHERE MATCH(o.Name) AGAINST (%(q)s IN BOOLEAN MODE)
+         ORDER BY score DESC
+         LIMIT %(limit)s)
+        UNION ALL
+        (SELECT 'Company', o.Name, o.Address, c.Industry,
+                MATCH(c.Industry) AGAINST (%(q)s IN BOOLEAN MODE) AS score
+         FROM Company c
+         JOIN Organization o ON o.Name = c.Org_N AND o.Address = c.Org_A
+         WHERE MATCH(c.Industry) AGAINST (%(q)s IN BOOLEAN MODE)
+         ORDER BY score DESC
+         LIMIT %(limit)s)
+    ) hits
+    GROUP BY type, title, subtitle, extra
+    ORDER BY score DESC, title
+    LIMIT %(limit)s
+"""
+
+# Queries made only of words too short for the full-text index fall back to
+# name-prefix matching, which can still use the Name primary/unique keys.
+PREFIX_QUERY = """
+    SELECT type, title, subtitle, extra, score
+    FROM (
+        (SELECT 'User' AS type, Name AS title, Address AS subtitle, NULL AS extra,
+                IF(Name = %(exact)s, 2, 1) AS score
+         FROM User
+         WHERE Name LIKE %(prefix)s
+         ORDER BY Name
+         LIMIT %(limit)s)
+        UNION ALL
+        (SELECT 'Connection', Name, Address, Relation, IF(Name = %(exact)s, 2, 1)
+         FROM Connection
+         WHERE Name LIKE %(prefix)s
+         ORDER BY Name
+         LIMIT %(limit)s)
+        UNION ALL
+        (SELECT 'Company', o.Name, o.Address, c.Industry, IF(o.Name = %(exact)s, 2, 1)
+         FROM Organization o
+         JOIN Company c ON o.Name = c.Org_N AND o.Address = c.Org_A
+         WHERE o.Name LIKE %(prefix)s
+         ORDER BY o.Name
+         LIMIT %(limit)s)
+    ) hits
+    ORDER BY score DESC, title
+    LIMIT %(limit)s
+"""
+
+
+def _tokens(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def boolean_query(text):
+    """
+    Build a BOOLEAN MODE expression requiring every indexable word as a prefix,
+    e.g. "acme spring" -> "+acme* +spring*". Returns '' if no word is long enough.
+    """
+    words = [w for w in _tokens(text) if len(w) >= MIN_TOKEN_SIZE]
+    return ' '.join(f'+{w}*' for w in words)
+
+
+def _like_prefix(text):
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'{escaped}%'
+
+
+class _Flight:
+    """One in-flight load that identical requests wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+class ResultCache:
+    """
+    LRU of query results keyed by normalized parameters plus the versions
+    of the tables the query reads, so any write to them makes old entries
+    unreachable. Loads are single-flight: while one request runs a query,
+    identical requests wait for its result instead of running it again.
+    Failed loads (None) are handed to the waiters but never cached.
+    """
+
+    def __init__(self, size=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL,
+                 wait_timeout=SEARCH_COALESCE_TIMEOUT):
+        self.size = size
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._flights = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key, tables, load):
+        table_versions.sync()
+        key = (key, table_versions.get(*tables))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if flight.done.wait(self.wait_timeout):
+                return flight.value
+            return load()
+
+        try:
+            flight.value = load()
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.value is not None and self.size > 0:
+                    self._entries[key] = (time.monotonic() + self.ttl, flight.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.size:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return flight.value
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+            }
+
+
+search_cache = ResultCache()
+
+
+def _normalize(value):
+    """Cache-key form of a search argument (the columns compare case-insensitively)."""
+    value = (value or '').strip()
+    return value.casefold() or None
+
+
+def search_all(text, limit=SEARCH_LIMIT):
+    """Relevance-ranked matches as dicts with type/title/subtitle/extra/score."""
+    text = (text or '').strip()
+    if not text:
+        return []
+
+    def load():
+        expression = boolean_query(text)
+        if expression:
+            return execute_query(FULLTEXT_QUERY, {'q': expression, 'limit': limit})
+        return execute_query(
+            PREFIX_QUERY,
+            {'exact': text, 'prefix': _like_prefix(text), 'limit': limit},
+        )
+
+    return search_cache.get(('all', _normalize(text), limit), SEARCH_TABLES, load) or []
+
+
+def network_search(user_n, company=None, industry=None, city=None, city_match='exact', columns=False):
+    """
+    Search_Connections_By_Company_Industry_Location, through the result cache.
+
+    Returns the rows (or (columns, rows) with columns=True), or None if the
+    query failed.
+    """
+    key = ('network', _normalize(user_n), _normalize(company), _normalize(industry),
+           _normalize(city), city_match, columns)
+    return search_cache.get(key, NETWORK_SEARCH_TABLES, lambda: execute_query(
+        statements.SEARCH_CONNECTIONS,
+        (user_n, company, industry, city, city_match),
+        columns=columns,
+    ))
@@ -0,0 +1,70 @@
+"""
+Registry of the fixed statements the app runs on every request.
+
+Each statement is declared once, by name, and passed to execute_query()
+instead of SQL text. SELECTs are run as server-side prepared statements:
+the first execution on a pooled connection prepares the statement and the
+handle is kept with that connection, so later executions send only the
+parameters and MySQL skips parsing. CALLs go through the registry too, but
+as text. The procedure bodies are already parsed once per connection by
+the server's stored-program cache, the CALL itself costs almost nothing to
+parse, and Connector/Python's prepared cursors don't reliably read the
+trailing status result a CALL sends.
+
+Modules that own their SQL (refdata, stats, graph, table_versions) declare
+their statements next to it; the procedures and list queries used by the
+routes are declared here.
+"""
+import os
+
+# Set to 0 to send every statement as text (e.g. behind a proxy that can't
+# route the binary protocol).
+DB_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', '1') == '1'
+
+STATEMENTS = {}
+
+
+class Statement:
+    """A named SQL statement; prepared on first use per connection unless it is a CALL."""
+
+    __slots__ = ('name', 'sql', 'prepare')
+
+    def __init__(self, name, sql):
+        if name in STATEMENTS:
+            raise ValueError(f"Statement '{name}' is already declared")
+        self.name = name
+        self.sql = sql
+        self.prepare = DB_PREPARED_STATEMENTS and not sql.lstrip().upper().startswith('CALL')
+        STATEMENTS[name] = self
+
+    def __repr__(self):
+        return f'Statement({self.name!r})'
+
+
+def _call(procedure, arity):
+    return Statement(procedure, f"CALL {procedure}({','.join(['%s'] * arity)})")
+
+
+COMPANIES = Statement('companies', """
+    SELECT o.*, c.Stock, c.Num_Employees, c.Industry
+    FROM Organization o
+    JOIN Company c ON o.Name = c.Org_N AND o.Address = c.Org_A
+    ORDER BY o.Name
+""")
+
+SCHOOLS = Statement('schools', """
+    SELECT o.*, s.Enrollment, s.Ranking
+    FROM Organization o
+    JOIN School s ON o.Name = s.Org_N AND o.Address = s.Org_A
+    ORDER BY o.Name
+""")
+
+ADD_CONNECTION_BY_TALKING = _call('Add_Connection_By_Talking', 24)
+DELETE_CONNECTION = _call('Delete_Connection', 1)
+UPDATE_CONVERSATION = _call('Update_Conversation', 7)
+ADD_WORK_EXPERIENCE = _call('Add_Work_Experience', 11)
+SEARCH_CONNECTIONS = _call('Search_Connections_By_Company_Industry_Location', 5)
+LAST_TIME_CONTACTED = _call('Last_Time_Contacted', 2)
+STALE_CONTACTS = _call('Stale_Contacts', 3)
+CONNECTIONS_IN_CITY = _call('Connections_In_City', 3)
+BACKFILL_CITIES = _call('Backfill_Cities', 1)
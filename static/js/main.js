@@ -78,6 +78,39 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    // Typeahead: inputs with data-typeahead fetch matching names into a datalist
+    document.querySelectorAll('input[data-typeahead]').forEach(input => {
+        const list = document.createElement('datalist');
+        list.id = input.id + '-options';
+        input.after(list);
+        input.setAttribute('list', list.id);
+
+        let timer = null;
+        let lastQuery = null;
+        input.addEventListener('input', function() {
+            clearTimeout(timer);
+            timer = setTimeout(() => {
+                const q = input.value.trim();
+                if (!q || q === lastQuery) {
+                    return;
+                }
+                lastQuery = q;
+                const url = input.dataset.typeahead + '?q=' + encodeURIComponent(q);
+                fetch(url)
+                    .then(response => response.ok ? response.json() : { results: [] })
+                    .then(data => {
+                        list.innerHTML = '';
+                        data.results.forEach(name => {
+                            const option = document.createElement('option');
+                            option.value = name;
+                            list.appendChild(option);
+                        });
+                    })
+                    .catch(() => {});
+            }, 200);
+        });
+    });
+
     // Animate stat cards on scroll
     const observerOptions = {
         threshold: 0.1,
@@ -0,0 +1,112 @@
+"""Cached dashboard statistics for the homepage."""
+import os
+import threading
+import time
+
+from db import execute_query
+from statements import Statement
+from table_versions import table_versions
+
+DASHBOARD_CACHE_TTL = float(os.getenv('DASHBOARD_CACHE_TTL', 30))
+
+# Default cut-off and list size for the stale-contacts list (/last-contacted
+# and the API); both come from the Last_Contact summary.
+STALE_AFTER_DAYS = int(os.getenv('STALE_AFTER_DAYS', 90))
+STALE_CONTACTS_LIMIT = 100
+# Upper bound on ?days= so the cut-off date can't underflow datetime.
+STALE_MAX_DAYS = 36500
+
+# Counters come from the trigger-maintained Stats_Counter table (primary key
+# lookups instead of COUNT(*) scans); the most recently contacted pairs come
+# from the Last_Contact summary (a short scan of idx_lastcontact_recent) and
+# ride along in the same statement so a cache miss costs exactly one round trip.
+DASHBOARD_QUERY = Statement('dashboard', """
+    SELECT k.*, r.*
+    FROM (
+        SELECT
+            COALESCE(MAX(CASE WHEN Name = 'users'       THEN Value END), 0) AS stat_users,
+            COALESCE(MAX(CASE WHEN Name = 'connections' THEN Value END), 0) AS stat_connections,
+            COALESCE(MAX(CASE WHEN Name = 'companies'   THEN Value END), 0) AS stat_companies,
+            COALESCE(MAX(CASE WHEN Name = 'schools'     THEN Value END), 0) AS stat_schools
+        FROM Stats_Counter
+    ) k
+    LEFT JOIN (
+        SELECT lc.User_N, lc.Connect_N, lc.Last_Topic AS Topic, lc.Last_Method AS Method,
+               lc.Last_Start AS Start, lc.Last_End AS End,
+               lc.User_N AS UserName, lc.Connect_N AS ConnectionName
+        FROM Last_Contact lc
+        ORDER BY lc.Last_Start DESC
+        LIMIT 5
+    ) r ON 1 = 1
+    ORDER BY r.Start DESC
+""")
+
+STAT_COLUMNS = ('users', 'connections', 'companies', 'schools')
+
+# Tables the dashboard reads, directly or through the Stats_Counter triggers.
+DASHBOARD_TABLES = ('User', 'Connection', 'Company', 'School', 'Last_Contact')
+
+
+class DashboardStats:
+    """
+    Process-local cache of the dashboard counters and recent conversations.
+
+    Invalidated whenever a write bumps one of DASHBOARD_TABLES (see
+    table_versions); the TTL bounds staleness caused by writes made through
+    other worker processes.
+    """
+
+    def __init__(self, ttl=DASHBOARD_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._expires = 0.0
+        self._generation = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self._generation += 1
+
+    def get(self):
+        """Return (stats, recent_talks), loading them with one query on a miss."""
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires:
+                return self._value
+            generation = self._generation
+
+        rows = execute_query(DASHBOARD_QUERY, primary=True)
+        if rows is None:
+            # Database unavailable: show zeros but don't cache them.
+            return {name: 0 for name in STAT_COLUMNS}, []
+
+        value = self._from_rows(rows)
+        with self._lock:
+            # A write that landed while we were querying wins; don't cache.
+            if generation == self._generation:
+                self._value = value
+                self._expires = time.monotonic() + self.ttl
+        return value
+
+    @staticmethod
+    def _from_rows(rows):
+        if not rows:
+            return {name: 0 for name in STAT_COLUMNS}, []
+        stats = {name: rows[0][f'stat_{name}'] for name in STAT_COLUMNS}
+        recent_talks = []
+        for row in rows:
+            if row.get('User_N') is None:
+                continue
+            recent_talks.append({k: v for k, v in row.items() if not k.startswith('stat_')})
+        return stats, recent_talks
+
+
+dashboard_stats = DashboardStats()
+
+
+def _on_tables_changed(tables, local):
+    if not tables.isdisjoint(DASHBOARD_TABLES):
+        dashboard_stats.invalidate()
+
+
+table_versions.subscribe(_on_tables_changed)
@@ -0,0 +1,146 @@
+"""Per-table version counters that write paths bump and caches key off."""
+import os
+import threading
+import time
+
+from flask import has_app_context
+
+from db import execute_query
+from statements import Statement
+
+# Seconds between reads of the Table_Version table. Writes made by this
+# process are seen immediately; writes from other workers within this window.
+TABLE_VERSION_SYNC = float(os.getenv('TABLE_VERSION_SYNC', 2))
+
+TABLE_VERSIONS_QUERY = Statement(
+    'table_versions', "SELECT Name, Version, UNIX_TIMESTAMP(Updated) AS Updated FROM Table_Version",
+)
+
+# Tables each stored procedure can modify (see network_assistant_functions.sql);
+# the SQL side bumps the same tables through Bump_Table_Versions().
+# Add_Connection_By_Talking only bumps the ones a call touched and returns
+# them as TablesChanged.
+PROCEDURE_WRITES = {
+    'Add_Connection_By_Talking': (
+        'Connection', 'ConnectionC', 'Talked', 'Last_Contact', 'Organization', 'Company', 'Worked',
+        'School', 'Went_To',
+    ),
+    'Delete_Connection': (
+        'Talked', 'Last_Contact', 'Worked', 'Went_To', 'ConnectionC', 'Connection', 'Organization',
+    ),
+    'Update_Conversation': ('Talked', 'Last_Contact'),
+    'Add_Work_Experience': ('Connection', 'Organization', 'Company', 'Worked'),
+    'Backfill_Cities': ('Connection', 'Worked'),
+}
+
+# Tables the read-only procedures depend on, for routes that declare them.
+PROCEDURE_READS = {
+    'Search_Connections_By_Company_Industry_Location': (
+        'Talked', 'Connection', 'Worked', 'Organization', 'Company',
+    ),
+    'Last_Time_Contacted': ('Last_Contact',),
+    'Connections_In_City': ('Connection', 'Talked', 'Worked'),
+}
+
+
+class TableVersions:
+    """
+    Version number and last-change time per table.
+
+    The database's Table_Version rows are the source of truth: every write
+    procedure (and the bulk import) bumps them. bump() re-reads them right
+    after a write made by this process, so every worker ends up with the same
+    version for the same data; sync() picks up writes from other processes
+    at most every TABLE_VERSION_SYNC seconds. Versions only ever move forward. Listeners registered with subscribe() are called with the
+    set of tables that changed and whether the write was made by this process.
+    """
+
+    def __init__(self, sync_interval=TABLE_VERSION_SYNC):
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._updated = {}
+        self._listeners = []
+        self._next_sync = 0.0
+
+    def get(self, *tables):
+        with self._lock:
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+    def last_modified(self, *tables):
+        """Epoch seconds of the most recent change to any of `tables`, or None."""
+        with self._lock:
+            times = [self._updated[table] for table in tables if table in self._updated]
+        return max(times) if times else None
+
+    def _notify(self, changed, local):
+        if not changed:
+            return
+        with self._lock:
+            listeners = list(self._listeners)
+        changed = frozenset(changed)
+        for listener in listeners:
+            listener(changed, local)
+
+    def bump(self, *tables):
+        """
+        Pick up the versions a write by this process just committed to
+        `tables`. They are read back from Table_Version, never counted
+        locally, so two workers can't give different data the same version.
+        """
+        self.sync(force=True, local=tables)
+
+    def bump_procedure(self, name, changed=None):
+        """
+        Pick up a procedure's writes. `changed` is the comma-separated list of
+        tables the procedure reports having bumped, when it reports one;
+        otherwise every table it can write is treated as this process's own.
+        """
+        self.bump(*(changed.split(',') if changed else PROCEDURE_WRITES[name]))
+
+    def sync(self, force=False, local=()):
+        """
+        Merge in the database's versions if the sync interval has passed.
+        Tables in `local` that moved by exactly one were written by this
+        process; anything else is reported to listeners as a remote change.
+        """
+        if not has_app_context():
+            return
+        with self._lock:
+            now = time.monotonic()
+            if not force and now < self._next_sync:
+                return
+            # Claim this round so concurrent requests don't all query.
+            self._next_sync = now + self.sync_interval
+
+        rows = execute_query(TABLE_VERSIONS_QUERY, primary=True)
+        if rows is None:
+            with self._lock:
+                # Try again on the next request rather than serve stale versions.
+                self._next_sync = 0.0
+            return
+
+        changed, own = [], []
+        with self._lock:
+            for row in rows:
+                table, version = row['Name'], int(row['Version'])
+                previous = self._versions.get(table, 0)
+                if version > previous:
+                    self._versions[table] = version
+                    if table in local and version == previous + 1:
+                        own.append(table)
+                    else:
+                        changed.append(table)
+                if row['Updated'] is not None:
+                    updated = float(row['Updated'])
+                    if updated > self._updated.get(table, 0.0):
+                        self._updated[table] = updated
+        self._notify(own, local=True)
+        self._notify(changed, local=False)
+
+    def subscribe(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+
+
+table_versions = TableVersions()
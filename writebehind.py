@@ -0,0 +1,281 @@
+"""
+Optional write-behind queue for /add/conversation.
+
+With WRITE_BEHIND=1 a validated submission is appended to a local SQLite
+queue (WAL mode, so it survives a restart) and the request returns at once
+with the job id. A background thread drains the queue in id order, running
+up to WRITE_BEHIND_BATCH CALLs inside one MySQL transaction and committing
+them together (group commit). Each CALL runs under its own savepoint, so a
+submission the procedure rejects (unknown user, bad data) is rolled back on
+its own and marked failed while the rest of the batch commits. If MySQL
+itself is unreachable the whole batch is rolled back and retried later,
+with backoff, in the same order.
+
+Several worker processes may share one queue file; a lease row makes sure
+only one of them drains at a time, so submissions for the same (user,
+connection) are always applied in the order they were made.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from mysql.connector import Error, InterfaceError, OperationalError
+
+import db
+import statements
+from graph import intro_index
+from table_versions import table_versions
+
+WRITE_BEHIND = os.getenv('WRITE_BEHIND', '0') == '1'
+WRITE_BEHIND_PATH = os.getenv('WRITE_BEHIND_PATH', 'write_behind.sqlite3')
+WRITE_BEHIND_BATCH = int(os.getenv('WRITE_BEHIND_BATCH', 100))
+# Seconds the drainer waits for more submissions before committing a batch.
+WRITE_BEHIND_INTERVAL = float(os.getenv('WRITE_BEHIND_INTERVAL', 0.5))
+WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv('WRITE_BEHIND_MAX_ATTEMPTS', 10))
+
+# Finished jobs are kept this long so their status can still be polled.
+RETAIN_SECONDS = 24 * 3600
+LEASE_SECONDS = 30
+MAX_BACKOFF = 60
+
+# MySQL error for a conversation that is already stored; expected on a retry
+# when a batch committed but the process died before marking its jobs done.
+# It only counts as applied if the job's own Talked row is there; any other
+# duplicate (e.g. a unique organization or job row) fails the job.
+ER_DUP_ENTRY = 1062
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS job (
+        id        INTEGER PRIMARY KEY AUTOINCREMENT,
+        params    TEXT NOT NULL,
+        status    TEXT NOT NULL DEFAULT 'queued',
+        attempts  INTEGER NOT NULL DEFAULT 0,
+        error     TEXT,
+        created   REAL NOT NULL,
+        updated   REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_job_status ON job (status, id);
+    CREATE TABLE IF NOT EXISTS lease (
+        id        INTEGER PRIMARY KEY CHECK (id = 1),
+        owner     TEXT,
+        expires   REAL NOT NULL DEFAULT 0
+    );
+    INSERT OR IGNORE INTO lease (id, expires) VALUES (1, 0);
+"""
+
+
+class LeaseLost(Exception):
+    """Another worker took over the drain lease in the middle of a batch."""
+
+
+class WriteBehindQueue:
+    """The SQLite-backed queue plus the thread that drains it into MySQL."""
+
+    def __init__(self, path=WRITE_BEHIND_PATH, batch_size=WRITE_BEHIND_BATCH,
+                 interval=WRITE_BEHIND_INTERVAL, max_attempts=WRITE_BEHIND_MAX_ATTEMPTS):
+        self.path = path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.owner = f'{socket.gethostname()}:{os.getpid()}'
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._thread = None
+        self._app = None
+        self._failures = 0
+
+    def _db(self):
+        # One SQLite connection per thread; sqlite3 connections can't be shared.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=FULL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def init_app(self, app):
+        """Start the drainer if write-behind is switched on."""
+        if not WRITE_BEHIND or self._thread is not None:
+            return
+        self._app = app
+        self._db()
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+
+    def enqueue(self, params):
+        """Durably queue one Add_Connection_By_Talking call; returns the job id."""
+        now = time.time()
+        cursor = self._db().execute(
+            "INSERT INTO job (params, created, updated) VALUES (?, ?, ?)",
+            (json.dumps(list(params)), now, now),
+        )
+        self._wake.set()
+        return cursor.lastrowid
+
+    def status(self, job_id):
+        row = self._db().execute(
+            "SELECT id, status, attempts, error, created, updated FROM job WHERE id = ?", (job_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def stats(self):
+        counts = {'queued': 0, 'done': 0, 'failed': 0}
+        for row in self._db().execute("SELECT status, COUNT(*) AS n FROM job GROUP BY status"):
+            counts[row['status']] = row['n']
+        return counts
+
+    def _take_lease(self):
+        now = time.time()
+        cursor = self._db().execute(
+            "UPDATE lease SET owner = ?, expires = ? WHERE id = 1 AND (owner = ? OR expires < ?)",
+            (self.owner, now + LEASE_SECONDS, self.owner, now),
+        )
+        return cursor.rowcount == 1
+
+    def _finish(self, job_id, status, error=None):
+        self._db().execute(
+            "UPDATE job SET status = ?, error = ?, updated = ? WHERE id = ?",
+            (status, error, time.time(), job_id),
+        )
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                # Renew the lease before every batch and stop as soon as
+                # another worker holds it. The app context lets the
+                # table_versions bump after each batch read Table_Version.
+                with self._app.app_context():
+                    while self._take_lease() and self.drain_once() == self.batch_size:
+                        pass
+                self._failures = 0
+            except Error as e:
+                self._failures += 1
+                print(f"Write-behind batch failed, retrying: {e}")
+                time.sleep(min(MAX_BACKOFF, 2 ** self._failures))
+            except sqlite3.Error as e:
+                print(f"Write-behind queue error: {e}")
+                time.sleep(self.interval)
+            except Exception as e:
+                # Keep the drainer alive; the jobs stay queued for the next pass.
+                print(f"Unexpected write-behind error: {e!r}")
+                time.sleep(self.interval)
+
+    def _talked_exists(self, cursor, params):
+        """Whether this job's own Talked row (user, connection, start) is stored."""
+        cursor.execute(
+            "SELECT 1 FROM Talked WHERE User_N = %s AND Connect_N = %s AND Start = %s",
+            (params[0], params[1], params[8]),
+        )
+        return cursor.fetchone() is not None
+
+    def drain_once(self):
+        """
+        Apply up to batch_size queued jobs in one transaction; returns how
+        many were taken. Raises mysql.connector.Error (after rolling back)
+        if the connection to MySQL fails, leaving the jobs queued. The lease
+        is renewed before every job and checked again before the commit; if
+        another worker has taken it, the batch is rolled back and 0 returned.
+        """
+        now = time.time()
+        self._db().execute("DELETE FROM job WHERE status != 'queued' AND updated < ?",
+                           (now - RETAIN_SECONDS,))
+        jobs = self._db().execute(
+            "SELECT id, params, attempts FROM job WHERE status = 'queued' ORDER BY id LIMIT ?",
+            (self.batch_size,),
+        ).fetchall()
+        if not jobs:
+            return 0
+
+        connection = db.pool.acquire()
+        # Count the attempt before running anything, so a retry after a crash
+        # knows the batch may already have been committed.
+        self._db().executemany("UPDATE job SET attempts = attempts + 1 WHERE id = ?",
+                               [(job['id'],) for job in jobs])
+        applied, failed = [], []
+        changed = set()
+        discard = False
+        try:
+            connection.autocommit = False
+            cursor = connection.cursor()
+            for job in jobs:
+                if not self._take_lease():
+                    raise LeaseLost()
+                params = json.loads(job['params'])
+                cursor.execute("SAVEPOINT job")
+                try:
+                    cursor.execute(statements.ADD_CONNECTION_BY_TALKING.sql, params)
+                    # (NewConnection, UserName, ConversationStart, ConversationEnd, TablesChanged)
+                    confirmation = cursor.fetchall()
+                except (InterfaceError, OperationalError):
+                    raise
+                except Error as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT job")
+                    if (e.errno == ER_DUP_ENTRY and job['attempts'] > 0
+                            and self._talked_exists(cursor, params)):
+                        applied.append((job['id'], params))
+                    else:
+                        failed.append((job['id'], str(e)))
+                    continue
+                applied.append((job['id'], params))
+                if confirmation and confirmation[0][4]:
+                    changed.update(confirmation[0][4].split(','))
+            cursor.close()
+            if not self._take_lease():
+                raise LeaseLost()
+            connection.commit()
+        except LeaseLost:
+            # The new holder drains these jobs; committing too would apply
+            # them twice and out of order.
+            print("Write-behind lease lost mid-batch; rolling back")
+            try:
+                connection.rollback()
+            except Error:
+                discard = True
+            return 0
+        except Error as e:
+            discard = isinstance(e, (InterfaceError, OperationalError))
+            try:
+                connection.rollback()
+            except Error:
+                discard = True
+            self._db().executemany(
+                "UPDATE job SET error = ?, updated = ? WHERE id = ?",
+                [(str(e), time.time(), job['id']) for job in jobs],
+            )
+            self._db().execute(
+                "UPDATE job SET status = 'failed' WHERE status = 'queued' AND attempts >= ?",
+                (self.max_attempts,),
+            )
+            raise
+        finally:
+            try:
+                connection.autocommit = True
+            except Error:
+                discard = True
+            db.pool.release(connection, discard=discard)
+
+        for job_id, _params in applied:
+            self._finish(job_id, 'done')
+        for job_id, error in failed:
+            self._finish(job_id, 'failed', error)
+
+        if changed:
+            # Replayed duplicates report nothing; their bumps were committed
+            # with the earlier batch and arrive through sync().
+            table_versions.bump_procedure('Add_Connection_By_Talking', ','.join(sorted(changed)))
+        if applied:
+            for _job_id, params in applied:
+                # user_n, connect_n, org_n, job_end, school_n
+                intro_index.add_conversation(params[0], params[1], params[10], params[16], params[20])
+        return len(jobs)
+
+
+write_behind = WriteBehindQueue()